@@ -0,0 +1,200 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Индекс штрих-кодов: остатки, места хранения и описание товара по складам в локальной базе SQLite.
+
+Объединение обновляет в индексе только склады, файлы которых изменились с прошлого запуска.
+Поиск по штрих-коду не читает CSV файлы.
+
+Пример: python barcode_index.py 4600000000000             # где хранится товар и сколько осталось
+        python barcode_index.py 4600000000000 4600000000001 --path logs/barcode_index.sqlite3
+"""
+
+from contextlib import closing
+from datetime import datetime
+from decimal import Decimal
+from json import dumps, loads
+from math import isnan
+from pathlib import Path
+from sqlite3 import connect, Connection
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+from column_enums import PackingColumns
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+def barcode_key(value: Any) -> str:
+    """Штрих-код в виде строки: целые значения из столбцов float записываются без дробной части"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def json_value(value: Any) -> Any:
+    """Значение для JSON: пропуски - null, типы numpy - встроенные типы Python"""
+    if value is None or isinstance(value, float) and isnan(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+class BarcodeIndex:
+    """Индекс штрих-кодов; строки хранятся по складам, итоги считаются при поиске"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def _connect(self) -> Connection:
+        """Открывает базу, создавая файл и таблицы при необходимости"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Задания [CSV:имя] обновляют индекс одновременно: ожидание блокировки вместо ошибки
+        conn = connect(self.path, timeout=30)
+        conn.executescript(
+            'CREATE TABLE IF NOT EXISTS stores ('
+            'store TEXT PRIMARY KEY, job TEXT NOT NULL, position INTEGER NOT NULL, signature TEXT NOT NULL, '
+            'items INTEGER NOT NULL, updated_at TEXT NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS items ('
+            'barcode TEXT NOT NULL, store TEXT NOT NULL REFERENCES stores(store), quantity REAL, '
+            'free_balance REAL, place TEXT NOT NULL, attributes TEXT NOT NULL, PRIMARY KEY (barcode, store)'
+            ') WITHOUT ROWID;'
+            'CREATE INDEX IF NOT EXISTS items_store ON items (store);'
+        )
+        return conn
+
+    def is_current(self, store: str, signature: str) -> bool:
+        """Проверяет, построены ли строки склада по этой же версии файла"""
+        if not self.path.exists():
+            return False
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT signature FROM stores WHERE store = ?', (store,)).fetchone()
+        return row is not None and row[0] == signature
+
+    def replace_store(self, job: str, store: str, position: int, signature: str, grouped_df: 'DataFrame') -> int:
+        """
+        Заменяет строки склада одной транзакцией.
+
+        :param position: Порядок склада в объединении; первые значения описания берутся по нему.
+        :param signature: Версия файла склада (время изменения и размер).
+        :param grouped_df: Товары склада, сгруппированные по штрих-коду (csv_tasks.aggregate_store_items).
+        :return: Количество товаров склада.
+        """
+        barcode = PackingColumns.BARCODE.value
+        quantity = PackingColumns.QUANTITY.value
+        free_balance = PackingColumns.FREE_BALANCE.value
+        place = PackingColumns.STORAGE_PLACE.value
+        attribute_columns = [
+            column for column in grouped_df.columns if column not in (barcode, quantity, free_balance, place)
+        ]
+        rows = [
+            (
+                barcode_key(record[barcode]), store, json_value(record.get(quantity)),
+                json_value(record.get(free_balance)), record.get(place) or '',
+                dumps({column: json_value(record[column]) for column in attribute_columns}, ensure_ascii=False)
+            )
+            for record in grouped_df.to_dict('records')
+        ]
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM items WHERE store = ?', (store,))
+            conn.execute(
+                'INSERT OR REPLACE INTO stores (store, job, position, signature, items, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (store, job, position, signature, len(rows), datetime.now().isoformat(timespec='seconds'))
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO items (barcode, store, quantity, free_balance, place, attributes) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows
+            )
+        return len(rows)
+
+    def sync_stores(self, job: str, stores: List[str]) -> List[str]:
+        """
+        Удаляет склады задания, файлов которых больше нет, и обновляет порядок остальных.
+
+        :param stores: Склады, найденные в текущем запуске задания, в порядке объединения.
+        :return: Удаленные склады.
+        """
+        if not self.path.exists():
+            return []
+        with closing(self._connect()) as conn, conn:
+            removed = [
+                store for store, in conn.execute('SELECT store FROM stores WHERE job = ?', (job,))
+                if store not in stores
+            ]
+            for store in removed:
+                conn.execute('DELETE FROM items WHERE store = ?', (store,))
+                conn.execute('DELETE FROM stores WHERE store = ?', (store,))
+            conn.executemany('UPDATE stores SET position = ? WHERE store = ?', [
+                (position, store) for position, store in enumerate(stores)
+            ])
+        return removed
+
+    def lookup(self, barcode: Any) -> Optional[Dict[str, Any]]:
+        """
+        Поиск товара по штрих-коду.
+
+        :return: Итоговые остатки, первые непустые значения описания и строки по складам; None - товара нет.
+        """
+        if not self.path.exists():
+            return None
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT items.store, quantity, free_balance, place, attributes, updated_at FROM items '
+                'JOIN stores USING (store) WHERE barcode = ? ORDER BY stores.job, stores.position',
+                (barcode_key(barcode),)
+            ).fetchall()
+        if not rows:
+            return None
+
+        attributes: Dict[str, Any] = {}
+        for row in rows:
+            for column, value in loads(row[4]).items():
+                if attributes.get(column) is None:
+                    attributes[column] = value
+        return {
+            'barcode': barcode_key(barcode),
+            'quantity': self._total(row[1] for row in rows),
+            'free_balance': self._total(row[2] for row in rows),
+            'attributes': attributes,
+            'stores': [
+                {'store': store, 'quantity': quantity, 'free_balance': free, 'place': place, 'updated_at': updated}
+                for store, quantity, free, place, _, updated in rows
+            ],
+        }
+
+    @staticmethod
+    def _total(values) -> float:
+        """Точная сумма остатков складов через Decimal"""
+        total = Decimal(0)
+        for value in values:
+            if value is not None:
+                total += Decimal(str(value))
+        return float(total)
+
+
+if __name__ == '__main__':
+    # Разбор аргументов нужен только при запуске из командной строки
+    from argparse import ArgumentParser
+
+    arg_parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('barcodes', nargs='+', help='штрих-коды для поиска')
+    arg_parser.add_argument('--path', help='база индекса (по умолчанию [INDEX] PATH)')
+    args = arg_parser.parse_args()
+
+    if args.path:
+        index_path = args.path
+    else:
+        from config import Config
+        index_path = Config().index.path
+    if not index_path:
+        arg_parser.error('barcode index is disabled: [INDEX] PATH is empty')
+    index = BarcodeIndex(index_path)
+    print(dumps({code: index.lookup(code) for code in args.barcodes}, ensure_ascii=False, indent=2))
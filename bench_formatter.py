@@ -0,0 +1,112 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Development'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Сравнение MessageFormatter с прежней реализацией на больших пакетах оповещений.
+
+Пример: python bench_formatter.py --alerts 20000 --repeat 5
+"""
+
+import re
+from argparse import ArgumentParser
+from random import Random
+from timeit import repeat
+from typing import Callable, List
+
+from send_msg_optimized import MessageFormatter, ParseMode
+
+
+class LegacyMessageFormatter:
+    """Прежняя реализация: плейсхолдеры, три прохода re.findall и посимвольные replace"""
+
+    @staticmethod
+    def escape_html(text: str) -> str:
+        html_escapes = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}
+        for char, escape in html_escapes.items():
+            text = text.replace(char, escape)
+        return text
+
+    @staticmethod
+    def format_markdown_v2(text: str) -> str:
+        placeholders = {}
+        code_blocks = re.findall(r'```(.*?)```', text, flags=re.DOTALL)
+        for i, block in enumerate(code_blocks):
+            placeholder = f'CODEBLOCK{i}'
+            placeholders[placeholder] = f'```{block}```'
+            text = text.replace(f'```{block}```', placeholder)
+        inline_codes = re.findall(r'`([^`]+)`', text)
+        for i, code in enumerate(inline_codes):
+            placeholder = f'INLINECODE{i}'
+            placeholders[placeholder] = f'`{code}`'
+            text = text.replace(f'`{code}`', placeholder)
+        bold_texts = re.findall(r'\*([^*]+)\*', text)
+        for i, bold in enumerate(bold_texts):
+            placeholder = f'BOLD{i}'
+            placeholders[placeholder] = f'*{bold}*'
+            text = text.replace(f'*{bold}*', placeholder)
+        special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
+        for char in special_chars:
+            text = text.replace(char, f'\\{char}')
+        for placeholder, original in placeholders.items():
+            text = text.replace(placeholder, original)
+        return text
+
+    @staticmethod
+    def format_html(text: str) -> str:
+        text = LegacyMessageFormatter.escape_html(text)
+        text = re.sub(r'```(.*?)```', r'<pre><code>\1</code></pre>', text, flags=re.DOTALL)
+        text = re.sub(r'`([^`]+)`', r'<code>\1</code>', text)
+        text = re.sub(r'\*([^*]+)\*', r'<b>\1</b>', text)
+        return text
+
+
+def generate_alerts(count: int, seed: int = 0) -> List[str]:
+    """Генерирует оповещения в формате, который отправляет конвейер объединения"""
+    rnd = Random(seed)
+    alerts = []
+    for _ in range(count):
+        if rnd.random() < 0.8:
+            alerts.append(
+                f'️🟥 *For product:* `46{rnd.randrange(10 ** 11):011d}` the width value `{rnd.randint(221, 999)}.0` '
+                f'was outside the acceptable range.\n\n*Source:* ```MSK-{rnd.choice("ABCDEF")}{rnd.randint(1, 99)}```')
+        else:
+            alerts.append(
+                f'🟥️ *File:*```\nC:\\SoftLand Systems\\SLS-Shared\\DCT\\Upload\\MSK-{rnd.randint(1, 99)}-Nomenclature.csv ```'
+                f'has not been modified for more than *24* hours.\n\n*The file was modified at:*\n'
+                f'25.{rnd.randint(10, 28)}.06 12:{rnd.randint(10, 59)}:00\n*{rnd.randint(1, 9)}* days, '
+                f'*{rnd.randint(1, 23)}* hours, *{rnd.randint(0, 59)}* minutes ago.')
+    return alerts
+
+
+def measure(name: str, func: Callable[[str], str], alerts: List[str], repeats: int) -> float:
+    """Замеряет лучшее время форматирования всего пакета"""
+    best = min(repeat(lambda: [func(alert) for alert in alerts], number=1, repeat=repeats))
+    print(f'  {name:<10} {best * 1000:9.1f} ms  ({best / len(alerts) * 1e6:.2f} us/alert)')
+    return best
+
+
+if __name__ == '__main__':
+    arg_parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--alerts', type=int, default=20000, help='количество оповещений в пакете')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='количество повторов замера')
+    args = arg_parser.parse_args()
+
+    batch = generate_alerts(args.alerts)
+    modes = [
+        ('MarkdownV2', LegacyMessageFormatter.format_markdown_v2, ParseMode.MARKDOWN_V2),
+        ('HTML', LegacyMessageFormatter.format_html, ParseMode.HTML),
+    ]
+    for mode_name, legacy, parse_mode in modes:
+        current = lambda text, mode=parse_mode: MessageFormatter.format_message(text, mode)
+        print(f'{mode_name}, {len(batch)} alerts:')
+        legacy_time = measure('legacy', legacy, batch, args.repeat)
+        current_time = measure('current', current, batch, args.repeat)
+        mismatches = sum(legacy(alert) != current(alert) for alert in batch)
+        print(f'  speedup    {legacy_time / current_time:9.2f}x  (outputs differing from legacy: {mismatches})')
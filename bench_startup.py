@@ -0,0 +1,101 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Development'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Замер времени запуска: импорт модулей объединения под python -X importtime и сравнение с бюджетом.
+
+merge_csv импортирует csv_processor внутри main(), поэтому по умолчанию замеряется csv_processor -
+все, что загружается до начала объединения.
+
+Пример: python bench_startup.py --module csv_processor --repeat 7 --budget-ms 250
+"""
+
+import re
+from argparse import ArgumentParser
+from pathlib import Path
+from statistics import median
+from os import environ
+from subprocess import run as sub_run
+from sys import executable, exit as sys_exit
+from typing import Dict, List, Tuple
+
+# Строка вывода -X importtime: "import time: <self us> | <cumulative us> | <отступ><модуль>"
+IMPORT_TIME_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+# Тяжелые модули, которые должны загружаться при первом использовании, а не при запуске
+LAZY_MODULES = ('pandas', 'numpy', 'aiohttp')
+
+
+def measure_import(module: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Импортирует модуль в отдельном процессе.
+
+    Запись байт-кода не отключается (PYTHONDONTWRITEBYTECODE), иначе каждый запуск компилировал бы
+    измененные модули заново: первый запуск создает кэш, медиана остальных соответствует установке.
+
+    :return: Общее время импорта модуля (мс) и накопленное время верхнеуровневых импортов (мс).
+    """
+    result = sub_run(
+        [executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=Path(__file__).parent,
+        env={name: value for name, value in environ.items() if name != 'PYTHONDONTWRITEBYTECODE'}
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'Import of "{module}" failed:\n{result.stderr}')
+
+    total = 0.0
+    imports: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        found = IMPORT_TIME_PATTERN.match(line)
+        if not found:
+            continue
+        cumulative, indent, name = int(found.group(2)) / 1000, found.group(3), found.group(4)
+        imports[name] = cumulative
+        if name == module and not indent:
+            total = cumulative
+    return total, imports
+
+
+def top_imports(imports: Dict[str, float], count: int) -> List[Tuple[str, float]]:
+    """Самые долгие импорты верхнего уровня пакетов"""
+    packages = {name: cumulative for name, cumulative in imports.items() if '.' not in name}
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:count]
+
+
+if __name__ == '__main__':
+    arg_parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--module', default='csv_processor', help='импортируемый модуль')
+    arg_parser.add_argument('--repeat', type=int, default=7, help='количество запусков (берется медиана)')
+    arg_parser.add_argument('--budget-ms', type=float, default=250.0, help='допустимое время импорта, мс')
+    arg_parser.add_argument('--top', type=int, default=10, help='сколько самых долгих импортов показать')
+    args = arg_parser.parse_args()
+
+    runs = [measure_import(args.module) for _ in range(args.repeat)]
+    totals = [total for total, _ in runs]
+    startup = median(totals)
+    last_imports = runs[-1][1]
+
+    print(f'Import of {args.module}: median {startup:.1f} ms, min {min(totals):.1f} ms, max {max(totals):.1f} ms')
+    print('Slowest imports (last run):')
+    for name, cumulative in top_imports(last_imports, args.top):
+        print(f'  {name:<24} {cumulative:8.1f} ms')
+
+    problems = []
+    if startup > args.budget_ms:
+        problems.append(f'startup {startup:.1f} ms exceeds the budget of {args.budget_ms:.0f} ms')
+    eager = [name for name in LAZY_MODULES if name in last_imports]
+    if eager:
+        problems.append(f'modules imported at startup instead of first use: {", ".join(eager)}')
+
+    for problem in problems:
+        print(f'FAIL: {problem}')
+    if not problems:
+        print(f'OK: within the budget of {args.budget_ms:.0f} ms')
+    sys_exit(1 if problems else 0)
@@ -0,0 +1,101 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Development'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Нагрузочный тест TelegramMessenger на локальной заглушке Telegram API.
+
+Пропускает через мессенджер тысячи оповещений и выводит пропускную способность,
+задержку постановки в очередь и задержку доставки (p50/p95/p99/max).
+
+Пример: python bench_telegram.py --alerts 5000 --latency 0.02 --rate-429 0.01 --rate-5xx 0.01
+"""
+
+from asyncio import run as aio_run
+from re import compile as re_compile
+from statistics import quantiles
+from time import perf_counter
+from typing import Dict, List
+
+from flow_control import TelegramRateLimiter
+from send_msg_optimized import TelegramMessenger
+from telegram_stub import build_arg_parser, settings_from_args, start_stub
+
+
+ALERT_ID_PATTERN = re_compile(r'alert (\d+) ')
+
+
+def describe(values: List[float]) -> str:
+    """Форматирует перцентили ряда значений в миллисекундах"""
+    if not values:
+        return 'n/a'
+    if len(values) == 1:
+        return f'{values[0] * 1000:.2f} ms'
+    cuts = quantiles(values, n=100, method='inclusive')
+    return (f'p50={cuts[49] * 1000:.2f} ms  p95={cuts[94] * 1000:.2f} ms  '
+            f'p99={cuts[98] * 1000:.2f} ms  max={max(values) * 1000:.2f} ms')
+
+
+async def run_benchmark(args) -> None:
+    """Запускает заглушку, отправляет оповещения и печатает отчет"""
+    stub, runner, base_url = await start_stub(settings_from_args(args))
+    try:
+        messenger = TelegramMessenger(
+            telegram_token='BENCH', telegram_chat_id=str(args.chat_id), max_message_length=args.max_length,
+            parse_mode=args.parse_mode, api_url=base_url, outbox_path='', queue_overflow=args.overflow,
+        )
+        if args.rate:
+            messenger.rate_limiter = TelegramRateLimiter(args.rate, args.rate, args.rate * 60)
+
+        enqueued: Dict[int, float] = {}
+        enqueue_latency: List[float] = []
+        started = perf_counter()
+        for alert_id in range(args.alerts):
+            before = perf_counter()
+            enqueued[alert_id] = before
+            await messenger.add_message(
+                f'🟥 *For product:* `46000{alert_id:08d}` alert {alert_id} width value outside the range.')
+            enqueue_latency.append(perf_counter() - before)
+        produced = perf_counter() - started
+
+        await messenger.close()
+        elapsed = perf_counter() - started
+
+        delivery_latency = []
+        for request in stub.received:
+            for alert_id in ALERT_ID_PATTERN.findall(request['text']):
+                delivery_latency.append(request['time'] - enqueued[int(alert_id)])
+
+        print(f'Stub responses:    {dict(sorted(stub.responses.items()))}')
+        print(f'Alerts delivered:  {len(delivery_latency)} / {args.alerts}')
+        print(f'HTTP requests:     {len(stub.received)} successful')
+        print(f'Producer time:     {produced:.3f} s')
+        print(f'Total time:        {elapsed:.3f} s')
+        print(f'Throughput:        {len(delivery_latency) / elapsed:.1f} alerts/s '
+              f'(dropped on overflow: {messenger.dropped_messages}, policy {args.overflow})')
+        print(f'Enqueue latency:   {describe(enqueue_latency)}')
+        print(f'Delivery latency:  {describe(delivery_latency)}')
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    arg_parser = build_arg_parser()
+    arg_parser.description = __doc__.strip().splitlines()[0]
+    arg_parser.add_argument('--alerts', type=int, default=5000, help='количество оповещений')
+    arg_parser.add_argument('--chat-id', type=int, default=1, help='chat_id (отрицательный — группа)')
+    arg_parser.add_argument('--max-length', type=int, default=3700, help='максимальная длина сообщения')
+    arg_parser.add_argument('--parse-mode', default='MarkdownV2', help='Markdown, MarkdownV2 или HTML')
+    arg_parser.add_argument(
+        '--overflow', default='block', choices=('block', 'drop_new', 'drop_oldest'),
+        help='поведение при переполнении очереди; block измеряет пропускную способность без потерь')
+    arg_parser.add_argument(
+        '--rate', type=float, default=1000.0,
+        help='лимит отправки в секунду вместо лимитов Telegram (0 — лимиты из config.ini)')
+    aio_run(run_benchmark(arg_parser.parse_args()))
@@ -76,6 +76,16 @@ class ColumnGroups:
         """Возвращает все столбцы описаний"""
         return [col.value for col in DescriptionColumns]
     
+    @staticmethod
+    def get_required_columns() -> List[str]:
+        """Возвращает столбцы, без которых файл склада нельзя объединить"""
+        return [
+            PackingColumns.BARCODE.value,
+            PackingColumns.QUANTITY.value,
+            PackingColumns.FREE_BALANCE.value,
+            PackingColumns.STORAGE_PLACE.value,
+        ]
+    
     @staticmethod
     def get_storage_columns_pattern() -> str:
         """Возвращает паттерн для поиска столбцов хранения"""
@@ -7,13 +7,13 @@
 # __status__ = 'Development'  # 'Production / Development'
 # __version__ = '2.0.0.1'
 
+from dataclasses import dataclass, fields
 from enum import Enum
 from os import getenv
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime as dt
 from configparser import ConfigParser
 from pathlib import Path
-from dotenv import load_dotenv
 
 
 class ConfigNames(Enum):
@@ -31,6 +31,9 @@ class ConfigNames(Enum):
     MSG = 'msg'
     LOG = 'log'
     LOGFORMAT = 'logformat'
+    HISTORY = 'history'
+    INDEX = 'index'
+    EXECUTOR = 'executor'
     RUN = 'run'
 
     def __str__(self):
@@ -42,6 +45,212 @@ class ConfigNames(Enum):
         return f'<ConfigNames.{self.name} (value={self.value})>'
 
 
+LOG_LEVELS = ('NOTSET', 'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+PARSE_MODES = ('Markdown', 'MarkdownV2', 'HTML')
+QUEUE_OVERFLOW_POLICIES = ('block', 'drop_new', 'drop_oldest')
+RUN_MODES = ('once', 'worker')
+EXECUTOR_POLICIES = ('inline', 'thread', 'process')
+MERGE_ENGINES = ('pandas', 'sqlite', 'stream')
+PREFLIGHT_MODES = ('off', 'skip', 'fail')
+
+
+def _require(condition: bool, message: str) -> None:
+    """Проверка значения конфигурации при загрузке"""
+    if not condition:
+        raise ValueError(f'Invalid configuration: {message}')
+
+
+@dataclass(frozen=True, slots=True)
+class CsvConfig:
+    """Параметры секции [CSV]"""
+    separator: str
+    path_template_directory: Optional[str]
+    path_directory: Optional[str]
+    file_pattern: Optional[str]
+    file_name: str
+    file_name_for_dta: str
+    file_name_for_checker: str
+    max_concurrent_reads: int
+    mmap_min_size_mb: int
+    engine: str
+    staging_dir: str
+    delta_file_name: str
+    delta_state_path: str
+    preflight: str
+    quarantine_dir: str
+
+    def __post_init__(self):
+        _require(bool(self.separator), 'CSV_SEPARATOR must not be empty')
+        _require(self.max_concurrent_reads > 0, 'CSV_MAX_CONCURRENT_READS must be positive')
+        _require(self.mmap_min_size_mb >= 0, 'CSV_MMAP_MIN_SIZE_MB must not be negative')
+        _require(self.engine in MERGE_ENGINES, f'CSV_ENGINE must be one of {", ".join(MERGE_ENGINES)}')
+        _require(self.preflight in PREFLIGHT_MODES, f'CSV_PREFLIGHT must be one of {", ".join(PREFLIGHT_MODES)}')
+
+
+@dataclass(frozen=True, slots=True)
+class DatasConfig:
+    """Параметры секции [DATAS]"""
+    max_width: int
+    decimal_places: int
+    name_of_product_type: Optional[str]
+    cache_path: str
+    cache_max_entries: int
+
+    def __post_init__(self):
+        _require(self.max_width > 0, 'DATAS_MAX_WIDTH must be positive')
+        _require(self.decimal_places >= 0, 'DATAS_DECIMAL_PLACES must not be negative')
+        _require(self.cache_max_entries > 0, 'DATAS_CACHE_MAX_ENTRIES must be positive')
+
+
+@dataclass(frozen=True, slots=True)
+class InactivityConfig:
+    """Параметры секции [INACTIVITY]"""
+    limit_hours: int
+
+    def __post_init__(self):
+        _require(self.limit_hours >= 0, 'INACTIVITY_LIMIT_HOURS must not be negative')
+
+
+@dataclass(frozen=True, slots=True)
+class TelegramConfig:
+    """Параметры секции [TELEGRAM] (токен и чат - из .env)"""
+    token: Optional[str]
+    chat_id: Optional[str]
+    max_msg_length: int
+    line_height: int
+    parse_mode: Optional[str]
+    api_url: str
+    queue_size: int
+    queue_overflow: str
+    batch_delay: float
+    timeout: float
+    rate_global: float
+    rate_per_chat: float
+    rate_per_group: float
+    max_retry_after: float
+    circuit_failures: int
+    circuit_cooldown: float
+    outbox_path: str
+    digest: bool
+
+    def __post_init__(self):
+        _require(self.max_msg_length > 0, 'TELEGRAM_MAX_MSG_LENGTH must be positive')
+        _require(not self.parse_mode or self.parse_mode in PARSE_MODES,
+                 f'TELEGRAM_PARSE_MODE must be one of {", ".join(PARSE_MODES)}')
+        _require(self.queue_size > 0, 'TELEGRAM_QUEUE_SIZE must be positive')
+        _require(self.queue_overflow in QUEUE_OVERFLOW_POLICIES,
+                 f'TELEGRAM_QUEUE_OVERFLOW must be one of {", ".join(QUEUE_OVERFLOW_POLICIES)}')
+        _require(self.batch_delay >= 0, 'TELEGRAM_BATCH_DELAY must not be negative')
+        _require(self.timeout > 0, 'TELEGRAM_TIMEOUT must be positive')
+        _require(min(self.rate_global, self.rate_per_chat, self.rate_per_group) > 0,
+                 'TELEGRAM_RATE_* must be positive')
+        _require(self.circuit_failures > 0, 'TELEGRAM_CIRCUIT_FAILURES must be positive')
+
+
+@dataclass(frozen=True, slots=True)
+class MsgConfig:
+    """Параметры секции [MSG]"""
+    language: str
+
+
+@dataclass(frozen=True, slots=True)
+class LogConfig:
+    """Параметры секции [LOG] (форматы - с подставленными значениями [LOGFORMAT])"""
+    dir: str
+    file: str
+    level_root: str
+    level_console: str
+    level_file: str
+    ignore_list: Tuple[str, ...]
+    format_console: str
+    format_file: str
+    date_format: str
+    console_language: str
+    queue_size: int
+    json_file: str
+    level_json: str
+
+    def __post_init__(self):
+        for name in ('level_root', 'level_console', 'level_file', 'level_json'):
+            _require(getattr(self, name) in LOG_LEVELS, f'LOG_{name.upper()} must be one of {", ".join(LOG_LEVELS)}')
+        _require(self.queue_size > 0, 'LOG_QUEUE_SIZE must be positive')
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryConfig:
+    """Параметры секции [HISTORY]"""
+    path: str
+    window: int
+    min_runs: int
+    slow_factor: float
+    min_seconds: float
+
+    def __post_init__(self):
+        _require(self.window > 0, 'HISTORY_WINDOW must be positive')
+        _require(self.min_runs > 0, 'HISTORY_MIN_RUNS must be positive')
+        _require(self.slow_factor > 1, 'HISTORY_SLOW_FACTOR must be greater than 1')
+
+
+@dataclass(frozen=True, slots=True)
+class ExecutorConfig:
+    """Параметры секции [EXECUTOR]"""
+    policy: str
+    threads: int
+    processes: int
+    aggregate_shards: int
+
+    def __post_init__(self):
+        _require(self.policy in EXECUTOR_POLICIES, f'EXECUTOR_POLICY must be one of {", ".join(EXECUTOR_POLICIES)}')
+        _require(self.threads >= 0, 'EXECUTOR_THREADS must not be negative')
+        _require(self.processes >= 0, 'EXECUTOR_PROCESSES must not be negative')
+        _require(self.aggregate_shards >= 0, 'EXECUTOR_AGGREGATE_SHARDS must not be negative')
+
+
+@dataclass(frozen=True, slots=True)
+class IndexConfig:
+    """Параметры секции [INDEX]"""
+    path: str
+
+
+@dataclass(frozen=True, slots=True)
+class RunConfig:
+    """Параметры секции [RUN]"""
+    main_script: str
+    requirements_file: str
+    venv_path: str
+    venv_individual: bool
+    git_pull_enabled: bool
+    log_output_enabled: bool
+    mode: str
+    worker_port: int
+    worker_interval: float
+    worker_max_memory_mb: float
+    worker_check_interval: float
+    pip_upgrade: bool
+
+    def __post_init__(self):
+        _require(bool(self.main_script), 'RUN_MAIN_SCRIPT must not be empty')
+        _require(self.mode in RUN_MODES, f'RUN_MODE must be one of {", ".join(RUN_MODES)}')
+        _require(0 < self.worker_port < 65536, 'RUN_WORKER_PORT must be a TCP port number')
+        _require(self.worker_interval >= 0, 'RUN_WORKER_INTERVAL must not be negative')
+        _require(self.worker_check_interval > 0, 'RUN_WORKER_CHECK_INTERVAL must be positive')
+
+
+# Типизированные представления секций; поля совпадают с ключами _load_env без префикса секции
+SECTION_VIEWS = {
+    ConfigNames.CSV: CsvConfig,
+    ConfigNames.DATAS: DatasConfig,
+    ConfigNames.INACTIVITY: InactivityConfig,
+    ConfigNames.TELEGRAM: TelegramConfig,
+    ConfigNames.MSG: MsgConfig,
+    ConfigNames.LOG: LogConfig,
+    ConfigNames.HISTORY: HistoryConfig,
+    ConfigNames.INDEX: IndexConfig,
+    ConfigNames.EXECUTOR: ExecutorConfig,
+    ConfigNames.RUN: RunConfig,
+}
+
+
 class Config:
     """
     Синглтон для загрузки и хранения конфигурации приложения.
@@ -79,10 +288,129 @@ class Config:
             self._initialized = True  # Устанавливаем флаг инициализации
             # Убираем логирование отсюда, чтобы не логировать до настройки логирования
             # logging.info('Загрузка переменных окружения из файла .env и config.ini')
+            # python-dotenv нужен только здесь, поэтому импортируется при первом создании Config
+            from dotenv import load_dotenv
             load_dotenv()
-            self._current_date = dt.now()
-            self._config_ini = self._load_ini()
-            self._env = self._load_env()
+            self._load()
+    
+    def _load(self) -> None:
+        """
+        Загружает параметры и один раз строит по ним словари и типизированные представления секций.
+        """
+        self._current_date = dt.now()
+        self._ini_mtime = self._get_ini_mtime()
+        self._config_ini = self._load_ini()
+        self._env = self._load_env()
+        
+        self._groups: Dict[str, Dict[str, Any]] = {}
+        for key, value in self._env.items():
+            self._groups.setdefault(key.split('_', 1)[0], {})[key.lower()] = value
+        
+        self._sections: Dict[ConfigNames, Any] = {}
+        for section, view in SECTION_VIEWS.items():
+            prefix = section.value.upper()
+            values = {field.name: self._env[f'{prefix}_{field.name.upper()}'] for field in fields(view)}
+            self._sections[section] = view(**{
+                name: tuple(value) if isinstance(value, list) else value for name, value in values.items()
+            })
+        self._csv_jobs = self._load_csv_jobs()
+    
+    def _load_csv_jobs(self) -> Dict[str, CsvConfig]:
+        """
+        Загружает именованные задания из секций [CSV:имя] файла config.ini.
+        
+        Недостающие параметры задания берутся из секции [CSV].
+
+        :return: Словарь имя задания -> параметры; пустой, если заданий нет.
+        """
+        field_names = [field.name for field in fields(CsvConfig)]
+        ini_csv = self._get_ini_section(ConfigNames.CSV)
+        jobs: Dict[str, CsvConfig] = {}
+        for section_name in self._config_ini.sections():
+            prefix, _, job_name = section_name.partition(':')
+            if prefix.upper() != ConfigNames.CSV.value.upper() or not job_name.strip():
+                continue
+            overrides = {key.upper(): value for key, value in self._config_ini[section_name].items()}
+            unknown = sorted(key for key in overrides if key.lower() not in field_names)
+            _require(not unknown, f'unknown keys in [{section_name}]: {", ".join(unknown)}')
+            # Параметры задания поверх [CSV] проходят то же приведение типов и регистра, что и сама секция
+            values = self._load_csv_values({**ini_csv, **overrides})
+            jobs[job_name.strip()] = CsvConfig(**{name: values[f'CSV_{name.upper()}'] for name in field_names})
+        return jobs
+    
+    @staticmethod
+    def _get_ini_mtime() -> Optional[float]:
+        """Время изменения config.ini или None, если файла нет"""
+        ini_path = Path(Path(__file__).parent, 'config.ini')
+        return ini_path.stat().st_mtime if ini_path.exists() else None
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Перечитывает конфигурацию, если config.ini изменился с момента загрузки.
+        
+        Уже полученные представления секций не меняются (они неизменяемые);
+        новые значения доступны через Config() после перезагрузки.
+
+        :return: True, если конфигурация была перечитана.
+        """
+        if self._get_ini_mtime() == self._ini_mtime:
+            return False
+        self._load()
+        return True
+    
+    def section(self, section: ConfigNames) -> Any:
+        """
+        Типизированное представление секции (frozen dataclass).
+
+        :param section: Член Enum ConfigNames.
+        :return: Экземпляр класса из SECTION_VIEWS.
+        """
+        return self._sections[section]
+    
+    @property
+    def csv(self) -> CsvConfig:
+        return self._sections[ConfigNames.CSV]
+    
+    @property
+    def csv_jobs(self) -> Dict[str, CsvConfig]:
+        """Именованные задания [CSV:имя]; пустой словарь - одно задание из секции [CSV]"""
+        return self._csv_jobs
+    
+    @property
+    def datas(self) -> DatasConfig:
+        return self._sections[ConfigNames.DATAS]
+    
+    @property
+    def inactivity(self) -> InactivityConfig:
+        return self._sections[ConfigNames.INACTIVITY]
+    
+    @property
+    def telegram(self) -> TelegramConfig:
+        return self._sections[ConfigNames.TELEGRAM]
+    
+    @property
+    def msg(self) -> MsgConfig:
+        return self._sections[ConfigNames.MSG]
+    
+    @property
+    def log(self) -> LogConfig:
+        return self._sections[ConfigNames.LOG]
+    
+    @property
+    def history(self) -> HistoryConfig:
+        return self._sections[ConfigNames.HISTORY]
+    
+    @property
+    def index(self) -> IndexConfig:
+        return self._sections[ConfigNames.INDEX]
+    
+    @property
+    def executor(self) -> ExecutorConfig:
+        return self._sections[ConfigNames.EXECUTOR]
+    
+    @property
+    def run(self) -> RunConfig:
+        return self._sections[ConfigNames.RUN]
     
     @staticmethod
     def _load_ini():
@@ -108,6 +436,36 @@ class Config:
             return {k.upper(): v for k, v in self._config_ini[section_name].items()}
         return {}
 
+    @staticmethod
+    def _load_csv_values(ini_csv: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Параметры CSV из секции config.ini с подстановкой .env и значений по умолчанию.
+        
+        Используется для [CSV] и для заданий [CSV:имя], чтобы их значения приводились одинаково.
+        
+        :param ini_csv: Параметры секции (ключи в верхнем регистре).
+        :return: Словарь с ключами CSV_*.
+        """
+        return {
+            'CSV_SEPARATOR': ini_csv.get('SEPARATOR', getenv('CSV_SEPARATOR', ';')),
+            'CSV_PATH_TEMPLATE_DIRECTORY': ini_csv.get('PATH_TEMPLATE_DIRECTORY', getenv('CSV_PATH_TEMPLATE_DIRECTORY')),
+            'CSV_PATH_DIRECTORY': ini_csv.get('PATH_DIRECTORY', getenv('CSV_PATH_DIRECTORY')),
+            'CSV_FILE_PATTERN': ini_csv.get('FILE_PATTERN', getenv('CSV_FILE_PATTERN')),
+            'CSV_FILE_NAME': ini_csv.get('FILE_NAME', getenv('CSV_FILE_NAME', '')),
+            'CSV_FILE_NAME_FOR_DTA': ini_csv.get('FILE_NAME_FOR_DTA', getenv('CSV_FILE_NAME_FOR_DTA', '')),
+            'CSV_FILE_NAME_FOR_CHECKER': ini_csv.get('FILE_NAME_FOR_CHECKER', getenv('CSV_FILE_NAME_FOR_CHECKER', '')),
+            'CSV_MAX_CONCURRENT_READS': int(ini_csv.get(
+                'MAX_CONCURRENT_READS', getenv('CSV_MAX_CONCURRENT_READS', 8))),
+            'CSV_MMAP_MIN_SIZE_MB': int(ini_csv.get('MMAP_MIN_SIZE_MB', getenv('CSV_MMAP_MIN_SIZE_MB', 64))),
+            'CSV_ENGINE': ini_csv.get('ENGINE', getenv('CSV_ENGINE', 'pandas')).lower(),
+            'CSV_STAGING_DIR': ini_csv.get('STAGING_DIR', getenv('CSV_STAGING_DIR', '')),
+            'CSV_DELTA_FILE_NAME': ini_csv.get('DELTA_FILE_NAME', getenv('CSV_DELTA_FILE_NAME', '')),
+            'CSV_DELTA_STATE_PATH': ini_csv.get(
+                'DELTA_STATE_PATH', getenv('CSV_DELTA_STATE_PATH', 'logs/delta_state.sqlite3')),
+            'CSV_PREFLIGHT': ini_csv.get('PREFLIGHT', getenv('CSV_PREFLIGHT', 'skip')).lower(),
+            'CSV_QUARANTINE_DIR': ini_csv.get('QUARANTINE_DIR', getenv('CSV_QUARANTINE_DIR', '')),
+        }
+    
     def _load_env(self) -> Dict[str, Any]:
         """
         Загружает и объединяет параметры из config.ini и .env файлов.
@@ -126,6 +484,9 @@ class Config:
         ini_telegram = self._get_ini_section(ConfigNames.TELEGRAM)
         ini_msg = self._get_ini_section(ConfigNames.MSG)
         ini_inactivity = self._get_ini_section(ConfigNames.INACTIVITY)
+        ini_history = self._get_ini_section(ConfigNames.HISTORY)
+        ini_index = self._get_ini_section(ConfigNames.INDEX)
+        ini_executor = self._get_ini_section(ConfigNames.EXECUTOR)
         ini_run = self._get_ini_section(ConfigNames.RUN)
         
         # Подстановка переменных LOGFORMAT в форматы
@@ -144,17 +505,15 @@ class Config:
 
         return {
             # CSV
-            'CSV_SEPARATOR': ini_csv.get('SEPARATOR', getenv('CSV_SEPARATOR', ';')),
-            'CSV_PATH_TEMPLATE_DIRECTORY': ini_csv.get('PATH_TEMPLATE_DIRECTORY', getenv('CSV_PATH_TEMPLATE_DIRECTORY')),
-            'CSV_PATH_DIRECTORY': ini_csv.get('PATH_DIRECTORY', getenv('CSV_PATH_DIRECTORY')),
-            'CSV_FILE_PATTERN': ini_csv.get('FILE_PATTERN', getenv('CSV_FILE_PATTERN')),
-            'CSV_FILE_NAME_FOR_DTA': ini_csv.get('FILE_NAME_FOR_DTA', getenv('CSV_FILE_NAME_FOR_DTA', '')),
-            'CSV_FILE_NAME_FOR_CHECKER': ini_csv.get('FILE_NAME_FOR_CHECKER', getenv('CSV_FILE_NAME_FOR_CHECKER', '')),
+            **self._load_csv_values(ini_csv),
             
             # DATAS
             'DATAS_MAX_WIDTH': int(ini_datas.get('MAX_WIDTH', getenv('DATAS_MAX_WIDTH', 200))),
             'DATAS_DECIMAL_PLACES': int(ini_datas.get('DECIMAL_PLACES', getenv('DATAS_DECIMAL_PLACES', 2))),
             'DATAS_NAME_OF_PRODUCT_TYPE': ini_datas.get('NAME_OF_PRODUCT_TYPE', getenv('DATAS_NAME_OF_PRODUCT_TYPE')),
+            'DATAS_CACHE_PATH': ini_datas.get('CACHE_PATH', getenv('DATAS_CACHE_PATH', '')),
+            'DATAS_CACHE_MAX_ENTRIES': int(ini_datas.get(
+                'CACHE_MAX_ENTRIES', getenv('DATAS_CACHE_MAX_ENTRIES', 200000))),
             
             # INACTIVITY
             'INACTIVITY_LIMIT_HOURS': int(ini_inactivity.get('LIMIT_HOURS', getenv('INACTIVITY_LIMIT_HOURS', 24))),
@@ -165,6 +524,25 @@ class Config:
             'TELEGRAM_MAX_MSG_LENGTH': int(ini_telegram.get('MAX_MSG_LENGTH', getenv('TELEGRAM_MAX_MSG_LENGTH', 4096))),
             'TELEGRAM_LINE_HEIGHT': int(ini_telegram.get('LINE_HEIGHT', getenv('TELEGRAM_LINE_HEIGHT', 25))),
             'TELEGRAM_PARSE_MODE': ini_telegram.get('PARSE_MODE', getenv('TELEGRAM_PARSE_MODE', None)),
+            'TELEGRAM_API_URL': ini_telegram.get(
+                'API_URL', getenv('TELEGRAM_API_URL', 'https://api.telegram.org')).rstrip('/'),
+            'TELEGRAM_QUEUE_SIZE': int(ini_telegram.get('QUEUE_SIZE', getenv('TELEGRAM_QUEUE_SIZE', 1000))),
+            'TELEGRAM_QUEUE_OVERFLOW': ini_telegram.get(
+                'QUEUE_OVERFLOW', getenv('TELEGRAM_QUEUE_OVERFLOW', 'drop_oldest')).lower(),
+            'TELEGRAM_BATCH_DELAY': float(ini_telegram.get('BATCH_DELAY', getenv('TELEGRAM_BATCH_DELAY', 1.0))),
+            'TELEGRAM_TIMEOUT': float(ini_telegram.get('TIMEOUT', getenv('TELEGRAM_TIMEOUT', 10))),
+            'TELEGRAM_RATE_GLOBAL': float(ini_telegram.get('RATE_GLOBAL', getenv('TELEGRAM_RATE_GLOBAL', 30))),
+            'TELEGRAM_RATE_PER_CHAT': float(ini_telegram.get('RATE_PER_CHAT', getenv('TELEGRAM_RATE_PER_CHAT', 1))),
+            'TELEGRAM_RATE_PER_GROUP': float(ini_telegram.get('RATE_PER_GROUP', getenv('TELEGRAM_RATE_PER_GROUP', 20))),
+            'TELEGRAM_MAX_RETRY_AFTER': float(ini_telegram.get(
+                'MAX_RETRY_AFTER', getenv('TELEGRAM_MAX_RETRY_AFTER', 30))),
+            'TELEGRAM_CIRCUIT_FAILURES': int(ini_telegram.get(
+                'CIRCUIT_FAILURES', getenv('TELEGRAM_CIRCUIT_FAILURES', 3))),
+            'TELEGRAM_CIRCUIT_COOLDOWN': float(ini_telegram.get(
+                'CIRCUIT_COOLDOWN', getenv('TELEGRAM_CIRCUIT_COOLDOWN', 60))),
+            'TELEGRAM_OUTBOX_PATH': ini_telegram.get(
+                'OUTBOX_PATH', getenv('TELEGRAM_OUTBOX_PATH', 'telegram_outbox.sqlite3')),
+            'TELEGRAM_DIGEST': ini_telegram.get('DIGEST', getenv('TELEGRAM_DIGEST', 'False')).lower() in ('true', '1'),
             
             # MSG
             'MSG_LANGUAGE': ini_msg.get('LANGUAGE', getenv('MSG_LANGUAGE', 'en')).lower(),
@@ -181,6 +559,26 @@ class Config:
             'LOG_FORMAT_FILE': substitute_logformat(ini_log.get('FORMAT_FILE', getenv('LOG_FORMAT_FILE', ''))),
             'LOG_DATE_FORMAT': ini_log.get('DATE_FORMAT', getenv('LOG_DATE_FORMAT', '%Y.%m.%d %H:%M:%S')),
             'LOG_CONSOLE_LANGUAGE': ini_log.get('CONSOLE_LANGUAGE', getenv('LOG_CONSOLE_LANGUAGE', 'en')).lower(),
+            'LOG_QUEUE_SIZE': int(ini_log.get('QUEUE_SIZE', getenv('LOG_QUEUE_SIZE', 10000))),
+            'LOG_JSON_FILE': current_date.strftime(ini_log.get('JSON_FILE', getenv('LOG_JSON_FILE', ''))),
+            'LOG_LEVEL_JSON': ini_log.get('LEVEL_JSON', getenv('LOG_LEVEL_JSON', 'INFO')).upper(),
+            
+            # HISTORY
+            'HISTORY_PATH': ini_history.get('PATH', getenv('HISTORY_PATH', 'logs/run_history.sqlite3')),
+            'HISTORY_WINDOW': int(ini_history.get('WINDOW', getenv('HISTORY_WINDOW', 20))),
+            'HISTORY_MIN_RUNS': int(ini_history.get('MIN_RUNS', getenv('HISTORY_MIN_RUNS', 5))),
+            'HISTORY_SLOW_FACTOR': float(ini_history.get('SLOW_FACTOR', getenv('HISTORY_SLOW_FACTOR', 2.0))),
+            'HISTORY_MIN_SECONDS': float(ini_history.get('MIN_SECONDS', getenv('HISTORY_MIN_SECONDS', 1.0))),
+            
+            # INDEX
+            'INDEX_PATH': ini_index.get('PATH', getenv('INDEX_PATH', 'logs/barcode_index.sqlite3')),
+            
+            # EXECUTOR
+            'EXECUTOR_POLICY': ini_executor.get('POLICY', getenv('EXECUTOR_POLICY', 'thread')).lower(),
+            'EXECUTOR_THREADS': int(ini_executor.get('THREADS', getenv('EXECUTOR_THREADS', 0))),
+            'EXECUTOR_PROCESSES': int(ini_executor.get('PROCESSES', getenv('EXECUTOR_PROCESSES', 0))),
+            'EXECUTOR_AGGREGATE_SHARDS': int(
+                ini_executor.get('AGGREGATE_SHARDS', getenv('EXECUTOR_AGGREGATE_SHARDS', 0))),
             
             # RUN
             'RUN_MAIN_SCRIPT': ini_run.get('MAIN_SCRIPT', getenv('RUN_MAIN_SCRIPT', 'merge_csv')),
@@ -191,6 +589,14 @@ class Config:
                 'VENV_INDIVIDUAL', getenv('RUN_VENV_INDIVIDUAL', 'True')).lower() in ('true', '1'),
             'RUN_GIT_PULL_ENABLED': ini_run.get('GIT_PULL_ENABLED', getenv('RUN_GIT_PULL_ENABLED', 'True')).lower() in ('true', '1'),
             'RUN_LOG_OUTPUT_ENABLED': ini_run.get('LOG_OUTPUT_ENABLED', getenv('RUN_LOG_OUTPUT_ENABLED', 'True')).lower() in ('true', '1'),
+            'RUN_MODE': ini_run.get('MODE', getenv('RUN_MODE', 'once')).lower(),
+            'RUN_WORKER_PORT': int(ini_run.get('WORKER_PORT', getenv('RUN_WORKER_PORT', 8765))),
+            'RUN_WORKER_INTERVAL': float(ini_run.get('WORKER_INTERVAL', getenv('RUN_WORKER_INTERVAL', 0))),
+            'RUN_WORKER_MAX_MEMORY_MB': float(ini_run.get(
+                'WORKER_MAX_MEMORY_MB', getenv('RUN_WORKER_MAX_MEMORY_MB', 1024))),
+            'RUN_WORKER_CHECK_INTERVAL': float(ini_run.get(
+                'WORKER_CHECK_INTERVAL', getenv('RUN_WORKER_CHECK_INTERVAL', 30))),
+            'RUN_PIP_UPGRADE': ini_run.get('PIP_UPGRADE', getenv('RUN_PIP_UPGRADE', 'False')).lower() in ('true', '1'),
         }
 
     def get_config(self, *config_types: str | ConfigNames) -> Dict[str, Any]:
@@ -198,9 +604,11 @@ class Config:
         Получение конфигурационных параметров по указанным типам.
         
         Можно передавать как строки, так и члены Enum ConfigNames.
-        Метод ищет все переменные окружения в self._env, название которых 
-        начинается с указанного префикса (в верхнем регистре, с добавленным подчеркиванием). 
-        Например, для префикса 'CSV' он ищет переменные, начинающиеся с 'CSV_'.
+        Метод возвращает все параметры, название которых начинается с указанного префикса 
+        (в верхнем регистре, с добавленным подчеркиванием). Например, для префикса 'CSV' 
+        возвращаются параметры, начинающиеся с 'CSV_'. Параметры сгруппированы по префиксам 
+        при загрузке, поэтому для секций поиск по всем ключам не выполняется.
+        Для доступа к отдельным значениям лучше использовать типизированные секции (Config().csv и др.).
 
         :param config_types: Один или несколько префиксов, или членов Enum ConfigNames, 
             по которым осуществляется поиск переменных окружения.
@@ -209,8 +617,11 @@ class Config:
         """
         result = {}
         for config_type in config_types:
-            prefix = config_type.value if isinstance(config_type, ConfigNames) else config_type
-            result.update({key.lower(): self._env[key] for key in self._env if key.startswith(prefix.upper() + '_')})
+            prefix = (config_type.value if isinstance(config_type, ConfigNames) else config_type).upper()
+            if prefix in self._groups:
+                result.update(self._groups[prefix])
+            else:
+                result.update({key.lower(): self._env[key] for key in self._env if key.startswith(prefix + '_')})
         return result
 
 
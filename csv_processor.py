@@ -8,46 +8,111 @@
 # __status__ = 'Production'  # 'Production / Development'
 # __version__ = '2.0.0.1'
 
-from io import StringIO
-from asyncio import gather as aio_gather, create_task as aio_create_task, Task as aio_Task
-from typing import Dict, List, Optional
-from pandas import concat, read_csv, Series, DataFrame, notna
-from decimal import Decimal, ROUND_HALF_UP
-from os.path import join as os_join
+from functools import partial
+from itertools import accumulate
+from asyncio import (
+    gather as aio_gather, Task as aio_Task, Semaphore as aio_Semaphore, AbstractEventLoop, get_running_loop
+)
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+from os import stat as os_stat
+from os.path import join as os_join, getsize as os_getsize
 
-from config import Config, ConfigNames
+from config import Config, CsvConfig
 from logger import logging
 from send_msg_optimized import TelegramMessenger, MessageState
-from column_enums import PackingColumns, DescriptionColumns, StorageColumns, AggregationColumns, ColumnGroups
+from column_enums import PackingColumns, DescriptionColumns, StorageColumns, ColumnGroups
 from file_manager import FileManager
-from data_extractors import WidthExtractor, CompoundExtractor
+from data_extractors import RuleExtractor
+from validation_rules import default_rules
+from report_digest import ReportDigest
+from run_metrics import RunMetrics
+from run_history import RunHistory
+from barcode_index import BarcodeIndex
+from delta_export import DeltaState
+from derived_cache import DerivedCache
+from stage_executor import StageExecutor
+from csv_tasks import (
+    split_headers, safe_sum, aggregate_by_barcode, aggregate_store_items, shard_by_barcode, concat_shards,
+    read_header_line, check_headers
+)
+from sqlite_merge import SqliteMergeEngine
+from stream_merge import StreamMergeEngine
+
+if TYPE_CHECKING:
+    # pandas импортируется при первом чтении файла, чтобы не замедлять запуск
+    from pandas import Series, DataFrame
+
+# Движки объединения без общего DataFrame (CSV_ENGINE); pandas объединяет в памяти
+MERGE_ENGINE_CLASSES = {'sqlite': SqliteMergeEngine, 'stream': StreamMergeEngine}
 
 
 class CSVProcessor:
     """Основной класс для обработки CSV файлов"""
     
-    def __init__(self):
+    def __init__(
+            self, csv_config: Optional[CsvConfig] = None, job_name: str = '', parent: Optional['CSVProcessor'] = None
+    ):
+        """
+        :param csv_config: Параметры задания; по умолчанию - секция [CSV].
+        :param job_name: Имя задания [CSV:имя]; пустое - основной процессор.
+        :param parent: Основной процессор, с которым задание делит отчет, историю и идентификатор запуска.
+        """
         self.config = Config()
-        self.csv_config = self.config.get_config(ConfigNames.CSV)
-        self.datas_config = self.config.get_config(ConfigNames.DATAS)
-        self.inactivity_config = self.config.get_config(ConfigNames.INACTIVITY)
+        self.csv_config = csv_config or self.config.csv
+        self.job_name = job_name
+        self.datas_config = self.config.datas
+        self.inactivity_config = self.config.inactivity
+        self.history_config = self.config.history
         self.telegram_messenger = TelegramMessenger()
         self.logger = logging.getLogger(__name__)
+        self.metrics = RunMetrics(parent.metrics.run_id if parent else None)
+        # Блокирующие этапы выполняются в общих пулах, цикл событий остается свободным для Telegram
+        self.executor = StageExecutor()
+        # Ограничение одновременно читаемых файлов задания
+        self._read_limit = aio_Semaphore(self.csv_config.max_concurrent_reads)
+        # История запусков для поиска замедлений; пустой путь отключает ее
+        self.run_history: Optional[RunHistory] = parent.run_history if parent else (
+            RunHistory(self.history_config.path, self.history_config.window)
+            if self.history_config.path else None
+        )
+        # Индекс штрих-кодов для поиска без чтения CSV; пустой путь отключает его
+        index_path = self.config.index.path
+        self.barcode_index: Optional[BarcodeIndex] = parent.barcode_index if parent else (
+            BarcodeIndex(index_path) if index_path else None
+        )
+        
+        # Значения, извлеченные из описаний в прошлых запусках; пустой путь отключает кэш
+        # Экземпляр у каждого задания: счетчики попаданий относятся к его файлам
+        self.derived_cache: Optional[DerivedCache] = (
+            DerivedCache(self.datas_config.cache_path, self.datas_config.cache_max_entries)
+            if self.datas_config.cache_path else None
+        )
+        
+        # Хеши строк прошлых выгрузок для файлов изменений; без имени файла изменений не ведутся
+        self.delta_state: Optional[DeltaState] = (
+            DeltaState(self.csv_config.delta_state_path)
+            if self.csv_config.delta_file_name and self.csv_config.delta_state_path else None
+        )
+        
+        # В режиме сводки подробности собираются в один отчет, отправляемый документом
+        self.report_digest: Optional[ReportDigest] = parent.report_digest if parent else (
+            ReportDigest(self.csv_config.separator)
+            if self.config.telegram.digest else None
+        )
         
         # Инициализация вспомогательных классов
         self.file_manager = FileManager(self.logger)
-        self.width_extractor = WidthExtractor(
+        self.rule_extractor = RuleExtractor(
             self.telegram_messenger, 
             self.logger, 
-            self.datas_config['datas_max_width']
+            default_rules(self.datas_config.max_width),
+            self.report_digest,
+            self.derived_cache
         )
-        self.compound_extractor = CompoundExtractor(self.telegram_messenger, self.logger)
     
     async def process_headers(self, header_line: str) -> List[str]:
         """Обработка строки заголовков CSV"""
-        csv_sep = self.csv_config.get('csv_separator', ';')
-        headers = header_line.strip().split(csv_sep)
-        return [header for header in headers if header.strip()]
+        return split_headers(header_line, self.csv_config.separator)
     
     async def load_header_template(self, template_path: str) -> List[str]:
         """Загрузка шаблона заголовка из файла"""
@@ -56,112 +121,200 @@ class CSVProcessor:
             return await self.process_headers(lines[0])
         return []
     
-    async def read_csv_async(self, file_path: str) -> Optional[DataFrame]:
+    async def read_csv_async(self, file_path: str) -> Optional['DataFrame']:
         """Чтение CSV файла в DataFrame"""
-        csv_sep = self.csv_config.get('csv_separator', ';')
-        self.logger.info(f'Reading file: {file_path}')
-        
-        lines = await self.file_manager.read_file_lines(file_path)
-        if not lines:
-            self.logger.warning(f'File is empty: {file_path}')
-            return None
-        
-        valid_headers = await self.process_headers(lines[0])
-        data_lines = lines[1:]
+        with self.metrics.source_file(file_path):
+            self.logger.info(f'Reading file: {file_path}')
+            
+            async with self._read_limit:
+                df = await self.file_manager.read_csv(
+                    file_path, self.csv_config.separator, self.csv_config.mmap_min_size_mb * 2 ** 20)
+            if df is None:
+                self.logger.warning(f'File is empty: {file_path}')
+                return None
+            
+            self.metrics.add('files_read')
+            self.metrics.add('rows_read', len(df))
+            
+            return df
+    
+    async def sort_columns_by_template(self, df: 'DataFrame', header_template: List[str]) -> 'DataFrame':
+        """Сортировка столбцов по шаблону"""
+        return await self.executor.run_in_thread(partial(df.reindex, columns=header_template))
+    
+    @staticmethod
+    def select_store_columns(merged_df: 'DataFrame', place_column: str) -> 'DataFrame':
+        """Копия объединенных данных, где столбец мест хранения склада стал основным, а столбцы других складов удалены"""
+        current_df = merged_df.rename(columns={place_column: PackingColumns.STORAGE_PLACE.value})
+        place_columns = [col for col in current_df.columns if ColumnGroups.is_storage_column(col)]
+        current_df.drop(columns=place_columns, inplace=True)
+        return current_df
+    
+    def safe_sum(self, series: 'Series', decimal_places: Optional[int] = None) -> float:
+        """Безопасное суммирование с округлением"""
+        return safe_sum(series, decimal_places)
+    
+    def prepare_store_dataframe(self, file_name: str, df: 'DataFrame') -> 'DataFrame':
+        """Отмечает строки складом: столбец источника и столбец мест хранения Storage_<склад>"""
+        if self.report_digest is not None:
+            self.report_digest.update_store(self.get_store_key(file_name), input_rows=len(df))
+        df[StorageColumns.SOURCE_FILE.value] = file_name
+        storage_column = StorageColumns.get_storage_column(file_name)
+        df[storage_column] = df[PackingColumns.STORAGE_PLACE.value].fillna('').astype(str).apply(lambda x: f'{x}')
+        df.drop(columns=[PackingColumns.STORAGE_PLACE.value], inplace=True)
+        return df
+    
+    def log_product_name(self) -> None:
+        """Сообщение о замене значений столбца «Наименование»"""
+        message = 'The value of the cells in the "Наименование" column has'
+        if self.datas_config.name_of_product_type:
+            self.logger.warning(f'{message} been replaced with "{self.datas_config.name_of_product_type}"')
+        else:
+            self.logger.warning(f'{message} not been changed, the "CSV_NEW_NAME_VALUE" constant is empty.')
+    
+    def extract_fields(self, df: 'DataFrame', tasks: List[aio_Task], loop: AbstractEventLoop) -> 'DataFrame':
+        """
+        Замена наименования, проверка ширины и состава (выполняется в пуле потоков).
         
-        cleaned_data = []
-        for line in data_lines:
-            trimmed_line = csv_sep.join([item.strip() for item in line.rstrip(f'{csv_sep}\n').split(csv_sep)])
-            cleaned_data.append(trimmed_line)
+        :param tasks: Сюда добавляются задачи отправки предупреждений; они создаются в цикле событий loop.
+        """
+        # Обновление столбца "Наименование"
+        if self.datas_config.name_of_product_type:
+            df[DescriptionColumns.NAME.value] = self.datas_config.name_of_product_type
         
-        content = '\n'.join(cleaned_data)
-        df = read_csv(StringIO(content), sep=csv_sep, names=valid_headers, header=None)
+        # Обработка столбцов хранения
+        for column in df.columns:
+            if ColumnGroups.is_storage_column(column):
+                df[column] = df[column].fillna('').astype(str)
         
+        # Ширина, состав и другие столбцы по декларативным правилам, без прохода по строкам
+        if self.derived_cache is None:
+            return self.rule_extractor.extract(df, tasks, loop)
+        hits, misses = self.derived_cache.hits, self.derived_cache.misses
+        df = self.rule_extractor.extract(df, tasks, loop)
+        self.metrics.add('derived_cache_hits', self.derived_cache.hits - hits)
+        self.metrics.add('derived_cache_misses', self.derived_cache.misses - misses)
         return df
     
-    async def sort_columns_by_template(self, df: DataFrame, header_template: List[str]) -> DataFrame:
-        """Сортировка столбцов по шаблону"""
-        return df.reindex(columns=header_template)
-    
-    def safe_sum(self, series: Series, decimal_places: Optional[int] = None) -> float:
-        """Безопасное суммирование с округлением"""
-        total = Decimal(0)
-        for item in series.dropna():
-            total += Decimal(str(item))
+    def transform_dataframes(
+            self, named_dataframes: List[Tuple[str, 'DataFrame']], tasks: List[aio_Task], loop: AbstractEventLoop
+    ) -> 'DataFrame':
+        """
+        Объединение прочитанных файлов, проверка ширины и состава (выполняется в пуле потоков).
         
-        if decimal_places is not None:
-            total = total.quantize(Decimal(10) ** -decimal_places, rounding=ROUND_HALF_UP)
+        :param tasks: Сюда добавляются задачи отправки предупреждений; они создаются в цикле событий loop.
+        """
+        from pandas import concat
         
-        return float(total)
+        combined_df = concat(
+            [self.prepare_store_dataframe(file_name, df) for file_name, df in named_dataframes], ignore_index=True)
+        self.logger.info('Successfully merged dataframes.')
+        self.log_product_name()
+        return self.extract_fields(combined_df, tasks, loop)
     
-    async def merge_csv_files(self, files_dict: Dict[str, str]) -> Optional[DataFrame]:
+    def transform_store_dataframe(
+            self, file_name: str, df: 'DataFrame', tasks: List[aio_Task], loop: AbstractEventLoop
+    ) -> 'DataFrame':
+        """Подготовка файла одного склада для движков sqlite и stream (выполняется в пуле потоков)"""
+        return self.extract_fields(self.prepare_store_dataframe(file_name, df), tasks, loop)
+    
+    async def merge_csv_files(self, files_dict: Dict[str, str]) -> Optional['DataFrame']:
         """Объединение CSV файлов"""
-        dataframes = await aio_gather(*[self.read_csv_async(file_path) for file_path in files_dict.values()])
-        dataframes = [df for df in dataframes if df is not None]
+        with self.metrics.stage('read'):
+            dataframes = await aio_gather(*[self.read_csv_async(file_path) for file_path in files_dict.values()])
+        named_dataframes = [(file_name, df) for file_name, df in zip(files_dict.keys(), dataframes) if df is not None]
         
-        if not dataframes:
+        if not named_dataframes:
             self.logger.warning('No valid dataframes to merge.')
             return None
         
-        combined_data = []
-        for df, file_name in zip(dataframes, files_dict.keys()):
-            df[StorageColumns.SOURCE_FILE.value] = file_name
-            storage_column = StorageColumns.get_storage_column(file_name)
-            df[storage_column] = df[PackingColumns.STORAGE_PLACE.value].fillna('').astype(str).apply(lambda x: f'{x}')
-            df.drop(columns=[PackingColumns.STORAGE_PLACE.value], inplace=True)
-            combined_data.append(df)
+        # Границы строк складов в объединенных данных: объединение и правила сохраняют порядок и число строк
+        bounds = list(accumulate((len(df) for _, df in named_dataframes), initial=0))
         
-        combined_df = concat(combined_data, ignore_index=True)
-        self.logger.info('Successfully merged dataframes.')
+        with self.metrics.stage('transform'):
+            tasks: List[aio_Task] = []
+            combined_df = await self.executor.run_in_thread(
+                self.transform_dataframes, named_dataframes, tasks, get_running_loop()
+            )
+            await aio_gather(*tasks)
         
-        # Обновление столбца "Наименование"
-        message = 'The value of the cells in the "Наименование" column has'
-        if self.datas_config['datas_name_of_product_type']:
-            combined_df[DescriptionColumns.NAME.value] = self.datas_config['datas_name_of_product_type']
-            self.logger.warning(f'{message} been replaced with "{self.datas_config["datas_name_of_product_type"]}"')
-        else:
-            self.logger.warning(f'{message} not been changed, the "CSV_NEW_NAME_VALUE" constant is empty.')
+        # Индекс строится по строкам после правил, чтобы описание в нем совпадало с выгрузкой
+        with self.metrics.stage('index'):
+            await aio_gather(*[
+                self.update_barcode_index(
+                    file_name, files_dict[file_name], position, combined_df.iloc[bounds[position]:bounds[position + 1]])
+                for position, (file_name, _) in enumerate(named_dataframes)
+            ])
         
-        tasks = []
+        with self.metrics.stage('aggregate'):
+            grouped_df = await self.aggregate(combined_df)
         
-        # Обработка столбцов хранения
-        for column in combined_df.columns:
-            if ColumnGroups.is_storage_column(column):
-                combined_df[column] = combined_df[column].fillna('').astype(str)
+        self.metrics.add('rows_merged', len(grouped_df))
         
-        # Извлечение данных с использованием специализированных классов
-        combined_df[PackingColumns.WIDTH.value] = combined_df.apply(
-            lambda row: self.width_extractor.extract(row, tasks), axis=1
-        )
-        await aio_gather(*tasks)
+        return grouped_df
+    
+    async def update_barcode_index(self, file_name: str, file_path: str, position: int, df: 'DataFrame') -> None:
+        """
+        Обновляет строки склада в индексе штрих-кодов, если файл изменился с прошлого обновления.
         
-        combined_df[PackingColumns.COMPOUND.value] = combined_df.apply(
-            lambda row: self.compound_extractor.extract(row), axis=1
-        )
+        :param position: Порядок склада в объединении.
+        :param df: Строки склада после extract_fields.
+        """
+        if self.barcode_index is None:
+            return
+        store = self.get_store_key(file_name)
+        try:
+            file_stat = await self.executor.run_in_thread(os_stat, file_path)
+            signature = f'{file_stat.st_mtime_ns}:{file_stat.st_size}'
+            if await self.executor.run_in_thread(self.barcode_index.is_current, store, signature):
+                return
+            grouped_df = await self.executor.run_cpu(
+                aggregate_store_items, df, StorageColumns.get_storage_column(file_name), self.datas_config.decimal_places)
+            items = await self.executor.run_in_thread(
+                self.barcode_index.replace_store, self.job_name, store, position, signature, grouped_df)
+            self.metrics.add('index_stores_updated')
+            self.logger.info(f'Barcode index updated for {store}: {items} items.')
+        except Exception as e:
+            self.logger.error(f'Failed to update barcode index for {store}: {e}')
+    
+    async def sync_barcode_index(self, files_dict: Dict[str, str]) -> None:
+        """Удаляет из индекса штрих-кодов склады задания, файлов которых больше нет, и обновляет порядок складов"""
+        if self.barcode_index is None:
+            return
+        try:
+            stores = [self.get_store_key(file_name) for file_name in files_dict]
+            removed = await self.executor.run_in_thread(self.barcode_index.sync_stores, self.job_name, stores)
+        except Exception as e:
+            self.logger.error(f'Failed to sync barcode index: {e}')
+            return
+        for store in removed:
+            self.logger.info(f'Store {store} removed from the barcode index.')
+    
+    async def aggregate(self, combined_df: 'DataFrame') -> 'DataFrame':
+        """
+        Группировка и агрегация по штрих-коду.
         
-        # Группировка и агрегация
-        all_columns = combined_df.columns.tolist()
-        first_columns = [col for col in all_columns if col not in AggregationColumns.get_sum_columns()]
-        
-        grouped_df = combined_df.groupby(PackingColumns.BARCODE.value, as_index=False).agg(
-            {
-                PackingColumns.QUANTITY.value: lambda x: self.safe_sum(x, self.datas_config['datas_decimal_places']),
-                PackingColumns.FREE_BALANCE.value: lambda x: self.safe_sum(x, self.datas_config['datas_decimal_places']),
-                **{col: 'first' for col in first_columns},
-                **{col: lambda x: ', '.join(filter(None, x)) for col in combined_df.columns if ColumnGroups.is_storage_column(col)}
-            }
-        )
+        При EXECUTOR_AGGREGATE_SHARDS > 1 строки делятся по хешу штрих-кода, части группируются
+        одновременно (при EXECUTOR_POLICY = process - в разных процессах) и объединяются по порядку.
+        """
+        decimal_places = self.datas_config.decimal_places
+        shards = self.executor.config.aggregate_shards
+        if shards <= 1 or combined_df.empty:
+            return await self.executor.run_cpu(aggregate_by_barcode, combined_df, decimal_places)
         
-        return grouped_df
+        parts = await self.executor.run_in_thread(shard_by_barcode, combined_df, shards)
+        grouped_parts = await aio_gather(
+            *[self.executor.run_cpu(aggregate_by_barcode, part, decimal_places) for part in parts])
+        return await self.executor.run_in_thread(concat_shards, grouped_parts)
     
-    async def save_dataframe_to_csv(self, df: DataFrame, output_path: str, sep: str) -> None:
+    async def save_dataframe_to_csv(self, df: 'DataFrame', output_path: str, sep: str) -> None:
         """Сохранение DataFrame в CSV файл"""
-        df.to_csv(output_path, index=False, sep=sep)
+        await self.executor.run_in_thread(partial(df.to_csv, output_path, index=False, sep=sep))
     
     def get_valid_file_name(self) -> Optional[str]:
         """Получение корректного имени файла"""
-        csv_file_name = self.csv_config.get('csv_file_name', '')
-        csv_file_name_for_dta = self.csv_config.get('csv_file_name_for_dta', '')
+        csv_file_name = self.csv_config.file_name
+        csv_file_name_for_dta = self.csv_config.file_name_for_dta
         
         if csv_file_name:
             return csv_file_name
@@ -172,50 +325,55 @@ class CSVProcessor:
     
     async def process_and_save_all_csv(self, header_template_path: str) -> Dict[str, str]:
         """Обработка и сохранение всех CSV файлов"""
-        header_template = await self.load_header_template(header_template_path)
-        
-        files_dict = await self.file_manager.find_matching_files(
-            self.csv_config['csv_path_directory'], 
-            self.csv_config['csv_file_pattern']
-        )
+        with self.metrics.stage('discover'):
+            header_template = await self.load_header_template(header_template_path)
+            
+            files_dict = await self.file_manager.find_matching_files(
+                self.csv_config.path_directory, 
+                self.csv_config.file_pattern
+            )
         self.logger.info(f'Found {len(files_dict)} files matching the pattern.')
+        self.metrics.add('files_found', len(files_dict))
         
         if files_dict:
+            files_dict = await self.preflight_files(files_dict, header_template)
+            if not files_dict:
+                return files_dict
+            await self.sync_barcode_index(files_dict)
+        
+        if files_dict and self.csv_config.engine in MERGE_ENGINE_CLASSES:
+            await self.merge_out_of_core(files_dict, header_template)
+        elif files_dict:
             merged_df = await self.merge_csv_files(files_dict=files_dict)
             await self.telegram_messenger.flush()
             
             if merged_df is not None:
-                for file_name, file_path in files_dict.items():
-                    await self.file_manager.check_file_modification(
-                        file_path, 
-                        self.inactivity_config['inactivity_limit_hours'],
-                        self.telegram_messenger
-                    )
-                    
-                    current_df = merged_df.copy()
-                    place_column = StorageColumns.get_storage_column(file_name)
-                    
-                    if place_column in current_df.columns:
-                        current_df.rename(columns={place_column: PackingColumns.STORAGE_PLACE.value}, inplace=True)
-                        place_columns = [col for col in current_df.columns if ColumnGroups.is_storage_column(col)]
-                        current_df.drop(columns=place_columns, inplace=True)
+                with self.metrics.stage('write'):
+                    for file_name, file_path in files_dict.items():
+                        await self.file_manager.check_file_modification(
+                            file_path, 
+                            self.inactivity_config.limit_hours,
+                            self.telegram_messenger,
+                            self.report_digest,
+                            self.get_store_key(file_name)
+                        )
                         
-                        current_df = await self.sort_columns_by_template(current_df, header_template)
+                        place_column = StorageColumns.get_storage_column(file_name)
                         
-                        csv_file_name = self.get_valid_file_name()
-                        if csv_file_name:
-                            output_path = self.file_manager.get_output_path(file_path, csv_file_name)
-                            await self.save_dataframe_to_csv(current_df, output_path, self.csv_config.get('csv_separator', ';'))
-                            self.logger.info(f'Saved merged file to {output_path}')
+                        if place_column in merged_df.columns:
+                            current_df = await self.executor.run_in_thread(
+                                self.select_store_columns, merged_df, place_column)
+                            current_df = await self.sort_columns_by_template(current_df, header_template)
                             
-                            csv_file_name_for_checker = self.csv_config.get('csv_file_name_for_checker', '')
-                            if csv_file_name_for_checker:
-                                checker_path = self.file_manager.get_checker_path(file_path, csv_file_name_for_checker)
-                                await self.file_manager.copy_file(output_path, checker_path)
+                            csv_file_name = self.get_valid_file_name()
+                            if csv_file_name:
+                                output_path = self.file_manager.get_output_path(file_path, csv_file_name)
+                                await self.save_dataframe_to_csv(current_df, output_path, self.csv_config.separator)
+                                await self.finish_output(file_name, file_path, output_path, len(current_df))
+                            else:
+                                self.logger.warning(f'Both "CSV_FILE_NAME" and "CSV_FILE_NAME_FOR_DTA" are empty for file {file_name}.')
                         else:
-                            self.logger.warning(f'Both "CSV_FILE_NAME" and "CSV_FILE_NAME_FOR_DTA" are empty for file {file_name}.')
-                    else:
-                        self.logger.warning(f'Missing expected column {place_column} for file {file_name}.')
+                            self.logger.warning(f'Missing expected column {place_column} for file {file_name}.')
             else:
                 self.logger.warning('No data to save after merging.')
         else:
@@ -223,18 +381,277 @@ class CSVProcessor:
         
         return files_dict
     
-    async def run_merge(self) -> None:
-        """Основной метод запуска процесса объединения"""
-        self.logger.info('Run Script!')
-        path = str(os_join(
-            self.csv_config['csv_path_template_directory'], 
-            self.csv_config['csv_file_name_for_dta']
+    async def preflight_files(self, files_dict: Dict[str, str], header_template: List[str]) -> Dict[str, str]:
+        """
+        Проверка заголовков всех файлов до разбора данных (CSV_PREFLIGHT): читается только первая строка.
+        
+        Файлы с ошибками (нет обязательных столбцов, повторяются столбцы, заголовок не читается) отклоняются
+        и при CSV_QUARANTINE_DIR переносятся в карантин; расхождения с шаблоном только записываются в лог.
+        
+        :return: Файлы для объединения; при CSV_PREFLIGHT = fail и отклоненных файлах - пустой словарь,
+            а счетчик jobs_stopped увеличивается.
+        """
+        if self.csv_config.preflight == 'off':
+            return files_dict
+        
+        with self.metrics.stage('preflight'):
+            header_lines = await aio_gather(*[
+                self.executor.run_in_thread(read_header_line, file_path) for file_path in files_dict.values()
+            ], return_exceptions=True)
+            rejected: Dict[str, List[str]] = {}
+            for (file_name, file_path), header_line in zip(files_dict.items(), header_lines):
+                if isinstance(header_line, Exception):
+                    errors, warnings = [f'header cannot be read: {header_line}'], []
+                elif header_line is None:
+                    # Пустой файл пропускается при чтении, как и без проверки
+                    continue
+                else:
+                    errors, warnings = check_headers(
+                        split_headers(header_line, self.csv_config.separator), header_template)
+                for warning in warnings:
+                    self.logger.warning(f'File {file_path}: {warning}.')
+                if errors:
+                    rejected[file_name] = errors
+            
+            for file_name, errors in rejected.items():
+                await self.reject_file(file_name, files_dict[file_name], errors)
+        
+        if not rejected:
+            return files_dict
+        if self.csv_config.preflight == 'fail':
+            message = f'*Merge stopped:* `{len(rejected)}` of `{len(files_dict)}` files failed the header check.'
+            self.logger.error(message.replace('*', '').replace('`', ''))
+            await self.telegram_messenger.add_message(f'⛔ {message}')
+            self.metrics.add('jobs_stopped')
+            return {}
+        return {file_name: file_path for file_name, file_path in files_dict.items() if file_name not in rejected}
+    
+    async def reject_file(self, file_name: str, file_path: str, errors: List[str]) -> None:
+        """Сообщение об отклоненном файле и перенос его в карантин (CSV_QUARANTINE_DIR)"""
+        self.metrics.add('files_rejected')
+        message = f'*File:*```\n{file_path} ```failed the header check: {"; ".join(errors)}.'
+        self.logger.error(message.replace('\n', ' ').replace('*', '').replace('`', ''))
+        if self.report_digest is not None:
+            self.report_digest.add_rejected(self.get_store_key(file_name), file_path, errors)
+        else:
+            await self.telegram_messenger.add_message(f'🟥️ {message}')
+        if self.csv_config.quarantine_dir:
+            await self.file_manager.quarantine_file(file_path, self.csv_config.quarantine_dir)
+    
+    async def finish_output(self, file_name: str, file_path: str, output_path: str, rows: int) -> None:
+        """Учет записанного файла склада и копия для проверки"""
+        self.logger.info(f'Saved merged file to {output_path}')
+        self.metrics.add('files_written')
+        self.metrics.add('bytes_written', await self.executor.run_in_thread(os_getsize, output_path))
+        if self.report_digest is not None:
+            self.report_digest.update_store(self.get_store_key(file_name), output_rows=rows, output_path=output_path)
+        await self.write_delta(file_path, output_path)
+        
+        csv_file_name_for_checker = self.csv_config.file_name_for_checker
+        if csv_file_name_for_checker:
+            checker_path = self.file_manager.get_checker_path(file_path, csv_file_name_for_checker)
+            await self.file_manager.copy_file(output_path, checker_path)
+    
+    async def write_delta(self, file_path: str, output_path: str) -> None:
+        """Файл изменений выгрузки склада относительно прошлого запуска (CSV_DELTA_FILE_NAME)"""
+        if self.delta_state is None:
+            return
+        delta_path = self.file_manager.get_output_path(file_path, self.csv_config.delta_file_name)
+        try:
+            counts = await self.executor.run_in_thread(
+                self.delta_state.write_delta, output_path, delta_path, self.csv_config.separator)
+        except Exception as e:
+            self.logger.error(f'Failed to write delta file {delta_path}: {e}')
+            return
+        self.metrics.add('delta_rows', sum(counts.values()))
+        self.metrics.add('bytes_written', await self.executor.run_in_thread(os_getsize, delta_path))
+        self.logger.info(
+            f'Saved delta file to {delta_path}: ' + ', '.join(f'{change} {count}' for change, count in counts.items()))
+    
+    async def merge_out_of_core(self, files_dict: Dict[str, str], header_template: List[str]) -> None:
+        """
+        Объединение без общего DataFrame: через таблицу SQLite (CSV_ENGINE = sqlite) или
+        сортировкой и слиянием временных файлов (CSV_ENGINE = stream).
+        
+        Файлы читаются и загружаются по одному, а сгруппированный результат блоками записывается
+        сразу во все файлы складов, поэтому память не зависит от объема данных.
+        """
+        engine_class = MERGE_ENGINE_CLASSES[self.csv_config.engine]
+        engine = await self.executor.run_in_thread(
+            engine_class, self.csv_config.staging_dir or None, self.datas_config.decimal_places)
+        try:
+            loop = get_running_loop()
+            loaded = []
+            for file_name, file_path in files_dict.items():
+                with self.metrics.stage('read'):
+                    df = await self.read_csv_async(file_path)
+                if df is None:
+                    continue
+                with self.metrics.stage('transform'):
+                    tasks: List[aio_Task] = []
+                    df = await self.executor.run_in_thread(self.transform_store_dataframe, file_name, df, tasks, loop)
+                    await aio_gather(*tasks)
+                with self.metrics.stage('index'):
+                    await self.update_barcode_index(file_name, file_path, len(loaded), df)
+                with self.metrics.stage('load'):
+                    await self.executor.run_in_thread(
+                        engine.add, file_name, df, StorageColumns.get_storage_column(file_name))
+                loaded.append(file_name)
+                del df
+            
+            if not loaded:
+                self.logger.warning('No valid dataframes to merge.')
+                self.logger.warning('No data to save after merging.')
+                return
+            self.logger.info(f'Loaded {engine.rows} rows from {len(loaded)} files for the {self.csv_config.engine} engine.')
+            self.log_product_name()
+            await self.telegram_messenger.flush()
+            
+            with self.metrics.stage('write'):
+                outputs: Dict[str, str] = {}
+                for file_name, file_path in files_dict.items():
+                    await self.file_manager.check_file_modification(
+                        file_path,
+                        self.inactivity_config.limit_hours,
+                        self.telegram_messenger,
+                        self.report_digest,
+                        self.get_store_key(file_name)
+                    )
+                    csv_file_name = self.get_valid_file_name()
+                    if file_name not in loaded:
+                        place_column = StorageColumns.get_storage_column(file_name)
+                        self.logger.warning(f'Missing expected column {place_column} for file {file_name}.')
+                    elif csv_file_name:
+                        outputs[file_name] = self.file_manager.get_output_path(file_path, csv_file_name)
+                    else:
+                        self.logger.warning(f'Both "CSV_FILE_NAME" and "CSV_FILE_NAME_FOR_DTA" are empty for file {file_name}.')
+                
+                groups = await self.executor.run_in_thread(
+                    engine.write, outputs, header_template, self.csv_config.separator)
+                self.metrics.add('rows_merged', groups)
+                for file_name, output_path in outputs.items():
+                    await self.finish_output(file_name, files_dict[file_name], output_path, groups)
+        finally:
+            await self.executor.run_in_thread(engine.close)
+    
+    def find_slowdowns(self, summary: Dict[str, Any]) -> List[str]:
+        """
+        Сравнение текущего запуска с историей прошлых запусков.
+        
+        :param summary: Метрики запуска; в историю записываются эти же метрики, чтобы сравнение было на одной основе.
+        """
+        if self.run_history is None:
+            return []
+        try:
+            slowdowns = self.run_history.find_slowdowns(
+                summary,
+                self.history_config.slow_factor,
+                self.history_config.min_runs,
+                self.history_config.min_seconds
+            )
+        except Exception as e:
+            self.logger.error(f'Failed to read run history: {e}')
+            return []
+        for slowdown in slowdowns:
+            self.logger.warning(f'Slow run detected: {slowdown}')
+        return slowdowns
+    
+    def get_store_key(self, file_name: str) -> str:
+        """Имя склада в отчете; в заданиях [CSV:имя] дополняется именем задания"""
+        return f'{self.job_name}:{file_name}' if self.job_name else file_name
+    
+    def get_template_path(self) -> str:
+        """Путь к шаблону заголовка задания"""
+        return str(os_join(
+            self.csv_config.path_template_directory, 
+            self.csv_config.file_name_for_dta
         ))
+    
+    async def run_job(self, job_name: str, csv_config: CsvConfig) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Обработка задания [CSV:имя]; мессенджер, отчет и история общие с основным процессором"""
+        job = CSVProcessor(csv_config, job_name, self)
+        with self.metrics.stage(job_name):
+            files_dict = await job.process_and_save_all_csv(job.get_template_path())
+        self.metrics.merge(job.metrics, job_name)
+        summary = job.metrics.summary()
+        self.logger.info(f'Job {job_name} finished in {summary["duration"]:.2f} s.', extra={'metrics': summary})
+        return files_dict, summary
+    
+    @staticmethod
+    def format_job_summary(job_name: str, summary: Dict[str, Any]) -> str:
+        """Строка сводки задания для сообщения Telegram"""
+        counters = summary['counters']
+        return (
+            f'*Job {job_name}:* `{counters.get("files_written", 0)}/{counters.get("files_found", 0)} files, '
+            f'{counters.get("rows_read", 0)} rows, {summary["duration"]:.1f} s`'
+        )
+    
+    async def run_merge(self) -> bool:
+        """
+        Основной метод запуска процесса объединения.
+        
+        :return: False, если задание остановлено проверкой заголовков (CSV_PREFLIGHT = fail); такой запуск
+            не записывается в историю и не сравнивается с ней.
+        """
+        self.metrics = RunMetrics()
+        self.logger.info('Run Script!')
+        
+        jobs = self.config.csv_jobs
+        if jobs:
+            # Задания выполняются одновременно в одном цикле событий
+            results = dict(zip(jobs, await aio_gather(*[
+                self.run_job(job_name, csv_config) for job_name, csv_config in jobs.items()
+            ])))
+        else:
+            results = {'': (await self.process_and_save_all_csv(self.get_template_path()), None)}
+        stopped = self.metrics.counters.get('jobs_stopped', 0)
+        # История сравнивается и пополняется метриками до отправки сводки: этап notify в нее не входит,
+        # и длительность запуска в истории считается так же, как при сравнении
+        run_summary = self.metrics.summary()
+        slowdowns = [] if stopped else self.find_slowdowns(run_summary)
         
-        files_dict = await self.process_and_save_all_csv(path)
-        files_list_str = '\n'.join([f'`{key}: {value}`' for key, value in files_dict.items()])
+        with self.metrics.stage('notify'):
+            await self.telegram_messenger.flush()
+            if not stopped:
+                title = '*CSV files merged completed successfully.*'
+            elif jobs:
+                title = f'*CSV files merge stopped:* `{stopped}` of `{len(jobs)}` jobs failed the header check.'
+            else:
+                title = '*CSV files merge stopped:* files failed the header check.'
+
+            slowdowns_str = (
+                '\n\n*Slow run:*\n' + '\n'.join([f'`{slowdown}`' for slowdown in slowdowns]) if slowdowns else ''
+            )
+            if self.report_digest is not None:
+                # Короткая сводка в подписи и полный отчет одним документом
+                jobs_str = ''.join([
+                    f'\n{self.format_job_summary(job_name, summary)}'
+                    for job_name, (_, summary) in results.items() if summary is not None
+                ])
+                file_name, content = self.report_digest.to_document()
+                await self.telegram_messenger.add_document(
+                    file_name, content, self.report_digest.summary(title + jobs_str) + slowdowns_str)
+            else:
+                sections = []
+                for job_name, (files_dict, summary) in results.items():
+                    if summary is None and stopped:
+                        # Файлы не записывались, причина уже отправлена сообщением проверки заголовков
+                        continue
+                    files_list_str = '\n'.join([f'`{key}: {value}`' for key, value in files_dict.items()])
+                    header = 'Files:' if summary is None else self.format_job_summary(job_name, summary)
+                    sections.append(f'{header}\n' + files_list_str)
+                message = '\n\n'.join([title, *sections]) + slowdowns_str
+                await self.telegram_messenger.add_message(message)
         
-        await self.telegram_messenger.flush()
-        message = f'*CSV files merged completed successfully.*\n\nFiles:\n' + files_list_str
-        await self.telegram_messenger.add_message(message)
-        self.logger.info('Finished Script!') 
\ No newline at end of file
+        # Итоговая запись с метриками запуска (в JSON-логе попадает в поле metrics)
+        self.logger.info(
+            f'Run {self.metrics.run_id} finished in {self.metrics.duration:.2f} s.',
+            extra={'metrics': self.metrics.summary()}
+        )
+        if self.run_history is not None and not stopped:
+            try:
+                self.run_history.record(run_summary)
+            except Exception as e:
+                self.logger.error(f'Failed to save run history: {e}')
+        self.logger.info('Finished Script!')
+        return not stopped 
\ No newline at end of file
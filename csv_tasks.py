@@ -0,0 +1,325 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Вычислительные этапы обработки CSV, которые StageExecutor может выполнить в пуле процессов.
+
+Модуль не импортирует config, logger и Telegram, чтобы дочерние процессы запускались быстро,
+а функции и их аргументы сериализовались pickle.
+"""
+
+from codecs import BOM_UTF8, BOM_UTF16_LE, BOM_UTF16_BE, BOM_UTF32_LE, BOM_UTF32_BE, getincrementaldecoder
+from collections import Counter
+from decimal import Decimal, ROUND_HALF_UP
+import re
+from functools import lru_cache
+from io import RawIOBase
+from mmap import mmap, ACCESS_READ
+from os import fstat, stat as os_stat
+from threading import local
+from typing import List, Optional, Pattern, Tuple, TYPE_CHECKING
+
+from column_enums import PackingColumns, AggregationColumns, ColumnGroups, StorageColumns
+
+if TYPE_CHECKING:
+    from pandas import Series, DataFrame
+
+
+# Метки порядка байтов; UTF-32 проверяется раньше UTF-16, так как ее метка LE начинается с метки UTF-16 LE
+BOM_ENCODINGS = (
+    (BOM_UTF8, 'utf-8'), (BOM_UTF32_LE, 'utf-32-le'), (BOM_UTF32_BE, 'utf-32-be'),
+    (BOM_UTF16_LE, 'utf-16-le'), (BOM_UTF16_BE, 'utf-16-be'),
+)
+
+# Буфер чтения отдельного потока (и процесса пула), переиспользуется между файлами
+_read_buffers = local()
+
+
+def read_file_buffer(file_path: str) -> memoryview:
+    """
+    Читает файл целиком вызовами readinto в переиспользуемый буфер текущего потока.
+
+    :return: Представление прочитанных байтов; действительно до следующего чтения в этом же потоке.
+    """
+    with open(file_path, 'rb', buffering=0) as file:
+        size = fstat(file.fileno()).st_size
+        buffer: Optional[bytearray] = getattr(_read_buffers, 'buffer', None)
+        # Запас в один байт позволяет заметить, что файл вырос после fstat
+        if buffer is None or len(buffer) <= size:
+            buffer = _read_buffers.buffer = bytearray(size + 1)
+        view = memoryview(buffer)
+        total = 0
+        while total < len(buffer):
+            read = file.readinto(view[total:])
+            if not read:
+                return view[:total]
+            total += read
+        # Файл дописывается во время чтения: остаток читается обычным способом
+        return memoryview(bytes(view) + file.read())
+
+
+def detect_encoding(data: memoryview) -> Tuple[str, int]:
+    """Кодировка по метке порядка байтов (по умолчанию UTF-8) и длина метки"""
+    for bom, encoding in BOM_ENCODINGS:
+        if data[:len(bom)] == bom:
+            return encoding, len(bom)
+    return 'utf-8', 0
+
+
+@lru_cache(maxsize=None)
+def separator_lines_pattern(csv_sep: str) -> Pattern[bytes]:
+    """Строки из одних разделителей и пробелов; шаблон начинается с перевода строки, поэтому поиск быстрый"""
+    sep = re.escape(csv_sep.encode('utf-8'))
+    return re.compile(rb'\n[ \t\r]*' + sep + rb'[ \t\r' + sep + rb']*(?=\n|\Z)')
+
+
+class BufferReader(RawIOBase):
+    """Файловый объект поверх memoryview: read_csv читает данные из буфера блоками без копирования файла целиком"""
+
+    def __init__(self, data: memoryview):
+        super().__init__()
+        self._data = data
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self._data[self._position:self._position + len(buffer)]
+        size = len(chunk)
+        memoryview(buffer).cast('B')[:size] = chunk
+        self._position += size
+        return size
+
+    def close(self) -> None:
+        # Отпускает буфер: отображение файла нельзя закрыть, пока на него есть ссылки
+        self._data.release()
+        super().close()
+
+
+def split_headers(header_line: str, csv_sep: str) -> List[str]:
+    """Непустые заголовки из строки заголовков CSV"""
+    headers = header_line.strip().split(csv_sep)
+    return [header for header in headers if header.strip()]
+
+
+def read_header_line(file_path: str, block_size: int = 2 ** 16) -> Optional[str]:
+    """
+    Первая строка файла без чтения остальных данных: читаются блоки до первого перевода строки.
+
+    :return: Строка заголовков без перевода строки или None, если файл пуст.
+    """
+    with open(file_path, 'rb') as file:
+        block = file.read(block_size)
+        encoding, offset = detect_encoding(memoryview(block))
+        decoder = getincrementaldecoder(encoding)()
+        text = decoder.decode(block[offset:])
+        while '\n' not in text:
+            block = file.read(block_size)
+            text += decoder.decode(block, final=not block)
+            if not block:
+                break
+    return text.split('\n', 1)[0] if text else None
+
+
+def check_headers(headers: List[str], header_template: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Проверка заголовков файла склада по обязательным столбцам (column_enums) и шаблону заголовка.
+
+    :param header_template: Заголовки шаблона; пустой список - шаблон не проверяется.
+    :return: Ошибки, с которыми файл нельзя объединять, и предупреждения.
+    """
+    errors = []
+    missing = [column for column in ColumnGroups.get_required_columns() if column not in headers]
+    if missing:
+        errors.append(f'missing required columns {", ".join(missing)}')
+    duplicates = [column for column, count in Counter(headers).items() if count > 1]
+    if duplicates:
+        errors.append(f'duplicate columns {", ".join(duplicates)}')
+
+    warnings = []
+    if header_template:
+        absent = [column for column in header_template if column not in headers and column not in missing]
+        if absent:
+            warnings.append(f'columns of the template are missing and will be empty: {", ".join(absent)}')
+        extra = [column for column in dict.fromkeys(headers) if column not in header_template]
+        if extra:
+            warnings.append(f'columns are not in the template and will not be written: {", ".join(extra)}')
+    return errors, warnings
+
+
+def parse_csv_view(data: memoryview, csv_sep: str) -> Optional['DataFrame']:
+    """
+    Разбор данных файла CSV (первая строка - заголовки) без создания строк Python для каждой строки файла.
+
+    Байты декодируются один раз: UTF-8 передается в read_csv как есть, другие кодировки с меткой порядка
+    байтов перекодируются в UTF-8 целиком.
+
+    :param data: Представление с начала буфера файла (буфер чтения или отображение mmap).
+    :return: DataFrame или None, если файл пуст.
+    """
+    from pandas import read_csv
+
+    encoding, offset = detect_encoding(data)
+    if encoding != 'utf-8':
+        data, offset = memoryview(str(data[offset:], encoding).encode('utf-8')), 0
+    if len(data) == offset:
+        return None
+
+    # Представление всегда начинается с начала своего буфера, поэтому поиск идет по буферу без копирования
+    newline = data.obj.find(b'\n', offset, len(data))
+    header_end = newline if newline >= 0 else len(data)
+    headers = split_headers(str(data[offset:header_end], 'utf-8'), csv_sep)
+    # Данные начинаются с перевода строки после заголовка: read_csv пропускает его как пустую строку
+    content = data[header_end:]
+    # Строки из одних разделителей, как и пустые строки, не считаются данными (копия только при их наличии)
+    separator_lines = separator_lines_pattern(csv_sep)
+    if separator_lines.search(content):
+        content = memoryview(separator_lines.sub(b'', content))
+    # Пробелы в начале значений и лишние разделители в конце строк обрабатывает парсер pandas
+    # (skipinitialspace, usecols), пробелы вокруг чисел он пропускает сам; остаются строковые столбцы
+    with BufferReader(content) as reader:
+        df = read_csv(
+            reader, sep=csv_sep, names=headers, header=None, encoding='utf-8',
+            skipinitialspace=True, usecols=range(len(headers))
+        )
+    for column in df.select_dtypes(include=['object', 'string']).columns:
+        df[column] = df[column].str.strip()
+    return df
+
+
+def load_csv_file(file_path: str, csv_sep: str, mmap_min_size: int = 0) -> Optional['DataFrame']:
+    """
+    Чтение и разбор файла CSV.
+
+    Файлы от mmap_min_size байт отображаются в память только для чтения: данные читаются парсером прямо
+    из страничного кэша без копии в памяти процесса. Меньшие файлы читаются в буфер потока.
+
+    :param mmap_min_size: Минимальный размер файла для mmap, байт; 0 - всегда читать в буфер.
+    :return: DataFrame или None, если файл пуст.
+    """
+    if not mmap_min_size or os_stat(file_path).st_size < mmap_min_size:
+        return parse_csv_view(read_file_buffer(file_path), csv_sep)
+
+    with open(file_path, 'rb') as file, mmap(file.fileno(), 0, access=ACCESS_READ) as mapped:
+        data = memoryview(mapped)
+        try:
+            return parse_csv_view(data, csv_sep)
+        finally:
+            data.release()
+
+
+def safe_sum(series: 'Series', decimal_places: Optional[int] = None) -> float:
+    """Безопасное суммирование с округлением"""
+    total = Decimal(0)
+    for item in series.dropna():
+        total += Decimal(str(item))
+
+    if decimal_places is not None:
+        total = total.quantize(Decimal(10) ** -decimal_places, rounding=ROUND_HALF_UP)
+
+    return float(total)
+
+
+def group_safe_sum(series: 'Series', keys: 'Series', decimal_places: Optional[int] = None) -> 'Series':
+    """
+    Суммы safe_sum по группам keys без вызова функции на группу.
+
+    Каждое различное значение переводится в Decimal один раз, суммы складываются группировкой, поэтому
+    сумма и округление ROUND_HALF_UP совпадают с safe_sum (0.1 + 0.025 = 0.13, а не 0.12 при округлении float).
+    """
+    from numpy import array
+    from pandas import Series, factorize
+    from pandas.api.extensions import take
+
+    codes, uniques = factorize(series)
+    # Пропуски safe_sum отбрасывает, здесь они заменяются нулем, что не меняет сумму
+    unique_decimals = array([Decimal(str(item)) for item in uniques], dtype=object)
+    decimals = Series(take(unique_decimals, codes, allow_fill=True, fill_value=Decimal(0)), index=series.index)
+    sums = decimals.groupby(keys, sort=True).sum()
+    quant = Decimal(10) ** -decimal_places if decimal_places is not None else None
+    return Series(
+        [float(total if quant is None else total.quantize(quant, rounding=ROUND_HALF_UP))
+         for total in sums.tolist()],
+        index=sums.index, dtype=float
+    )
+
+
+def aggregate_by_barcode(combined_df: 'DataFrame', decimal_places: Optional[int] = None) -> 'DataFrame':
+    """Группировка по штрих-коду: суммы количества, первые значения описания и списки мест хранения"""
+    all_columns = combined_df.columns.tolist()
+    first_columns = [col for col in all_columns if col not in AggregationColumns.get_sum_columns()]
+
+    return combined_df.groupby(PackingColumns.BARCODE.value, as_index=False).agg(
+        {
+            PackingColumns.QUANTITY.value: lambda x: safe_sum(x, decimal_places),
+            PackingColumns.FREE_BALANCE.value: lambda x: safe_sum(x, decimal_places),
+            **{col: 'first' for col in first_columns},
+            **{col: lambda x: ', '.join(filter(None, x)) for col in all_columns if ColumnGroups.is_storage_column(col)}
+        }
+    )
+
+
+def aggregate_store_items(
+        store_df: 'DataFrame', storage_column: str, decimal_places: Optional[int] = None
+) -> 'DataFrame':
+    """
+    Товары одного склада для индекса штрих-кодов: суммы остатков, первые значения и места хранения склада.
+
+    Строки берутся после замены наименования и правил ширины и состава, поэтому описание совпадает с выгрузкой.
+    Группировка без функций Python на группу: суммы считаются как в safe_sum (group_safe_sum), места
+    хранения склеиваются только для непустых значений.
+
+    :param store_df: Строки склада после CSVProcessor.extract_fields.
+    :param storage_column: Столбец мест хранения склада (Storage_<склад>).
+    """
+    barcode = PackingColumns.BARCODE.value
+    sum_columns = [col for col in AggregationColumns.get_sum_columns() if col in store_df.columns]
+    # Столбцы мест хранения других складов и имя файла источника в описание не входят
+    first_columns = [
+        col for col in store_df.columns
+        if col != barcode and col not in sum_columns and col != StorageColumns.SOURCE_FILE.value
+        and not ColumnGroups.is_storage_column(col)
+    ]
+    grouped = store_df.groupby(barcode, sort=True)
+    result = grouped[first_columns].first()
+    # Номера групп в порядке штрих-кодов результата: суммы не группируют строки по штрих-коду заново
+    group_ids = grouped.ngroup()
+    for col in sum_columns:
+        result[col] = group_safe_sum(store_df[col], group_ids, decimal_places).to_numpy()
+
+    places = store_df[storage_column].fillna('').astype(str) if storage_column in store_df.columns else None
+    if places is not None:
+        filled = places != ''
+        # Сумма строк с разделителем складывается без вызова Python на группу; лишний разделитель отрезается
+        joined = (places[filled] + ', ').groupby(store_df.loc[filled, barcode]).sum().str[:-2]
+        result[PackingColumns.STORAGE_PLACE.value] = joined.reindex(result.index, fill_value='')
+    return result.reset_index()
+
+
+def shard_by_barcode(combined_df: 'DataFrame', shards: int) -> List['DataFrame']:
+    """
+    Делит строки на части по хешу штрих-кода: все строки одного товара попадают в одну часть
+    в исходном порядке, поэтому части группируются независимо. Пустые части не возвращаются.
+    """
+    from pandas.util import hash_pandas_object
+
+    shard_ids = hash_pandas_object(combined_df[PackingColumns.BARCODE.value], index=False).to_numpy() % shards
+    return [part for _, part in combined_df.groupby(shard_ids, sort=True)]
+
+
+def concat_shards(grouped_parts: List['DataFrame']) -> 'DataFrame':
+    """Объединяет сгруппированные части в порядке штрих-кодов, как при группировке целиком"""
+    from pandas import concat
+
+    # Пустые части (только строки без штрих-кода) не участвуют: иначе concat может сменить типы столбцов
+    grouped_parts = [part for part in grouped_parts if len(part)] or grouped_parts[:1]
+    return concat(grouped_parts, ignore_index=True).sort_values(
+        PackingColumns.BARCODE.value, kind='stable', ignore_index=True)
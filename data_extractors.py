@@ -8,13 +8,17 @@
 # __status__ = 'Production'  # 'Production / Development'
 # __version__ = '2.0.0.1'
 
-from typing import Optional, List
-from pandas import Series, notna
-from re import search
-from asyncio import Task as aio_Task, create_task as aio_create_task
+from typing import Coroutine, Optional, List, TYPE_CHECKING
+from asyncio import Task as aio_Task, create_task as aio_create_task, get_running_loop, AbstractEventLoop
+from logging import INFO, WARNING, ERROR
 
-from column_enums import PackingColumns, DescriptionColumns, StorageColumns
 from send_msg_optimized import TelegramMessenger
+from report_digest import ReportDigest
+from validation_rules import ValidationRule, apply_rules, SEVERITY_INFO, SEVERITY_WARNING, SEVERITY_ERROR
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+    from derived_cache import DerivedCache
 
 
 class DataExtractor:
@@ -23,60 +27,73 @@ class DataExtractor:
     def __init__(self, telegram_messenger: TelegramMessenger, logger):
         self.telegram_messenger = telegram_messenger
         self.logger = logger
+    
+    @staticmethod
+    def schedule(coroutine: Coroutine, tasks: List[aio_Task], loop: Optional[AbstractEventLoop] = None) -> None:
+        """Создает задачу отправки; при вызове из пула потоков - в потоке цикла событий loop"""
+        try:
+            get_running_loop()
+        except RuntimeError:
+            loop.call_soon_threadsafe(lambda: tasks.append(loop.create_task(coroutine)))
+        else:
+            tasks.append(aio_create_task(coroutine))
 
 
-class WidthExtractor(DataExtractor):
-    """Класс для извлечения значения ширины"""
+class RuleExtractor(DataExtractor):
+    """Извлечение и проверка столбцов по декларативным правилам (validation_rules)"""
     
-    def __init__(self, telegram_messenger: TelegramMessenger, logger, max_width: int):
+    # Уровень записи в лог и отметка сообщения Telegram по уровню нарушения
+    SEVERITY_LEVELS = {
+        SEVERITY_INFO: (INFO, 'ℹ️'),
+        SEVERITY_WARNING: (WARNING, '️🟥'),
+        SEVERITY_ERROR: (ERROR, '⛔'),
+    }
+    
+    def __init__(
+            self, telegram_messenger: TelegramMessenger, logger, rules: List[ValidationRule],
+            report_digest: Optional[ReportDigest] = None, cache: Optional['DerivedCache'] = None
+    ):
         super().__init__(telegram_messenger, logger)
-        self.max_width = max_width
+        self.rules = rules
+        self.report_digest = report_digest
+        self.cache = cache
     
-    def extract(self, row: Series, tasks: List[aio_Task]) -> Optional[float]:
-        """Извлечение значения ширины из строки"""
-        value = None
+    def extract(
+            self, df: 'DataFrame', tasks: List[aio_Task], loop: Optional[AbstractEventLoop] = None
+    ) -> 'DataFrame':
+        """
+        Заполняет столбцы правил и сообщает о нарушениях.
         
-        # Проверяем основное поле ширины
-        width_value = row[PackingColumns.WIDTH.value]
-        if notna(width_value) and isinstance(width_value, (int, float)):
-            value = float(width_value)
-        # Если нет, ищем в описании
+        :param loop: Цикл событий для отправки предупреждений, если метод вызывается из пула потоков.
+        """
+        if self.cache is None:
+            df, violations = apply_rules(df, self.rules)
         else:
-            desc_value = row[DescriptionColumns.DESCRIPTION.value]
-            if isinstance(desc_value, str) and desc_value:
-                found_value = search(r'\d+', desc_value)
-                value = float(found_value.group()) if found_value else None
-        
-        # Проверяем валидность
-        if value is not None:
-            if not 0 < value <= self.max_width:
-                barcode_value = row[PackingColumns.BARCODE.value]
-                source_value = row[StorageColumns.SOURCE_FILE.value]
-                message = (
-                    f'*For product:* `{barcode_value}` the width value `{value}` was outside the acceptable range.\n\n*Source:* ```{source_value}```'
-                )
-                self.logger.warning(message.replace('\n', ' ').replace('*', '').replace('`', ''))
-                tasks.append(aio_create_task(self.telegram_messenger.add_message(f'️🟥 {message}')))
-                return None
-        
-        return value
-
-
-class CompoundExtractor(DataExtractor):
-    """Класс для извлечения информации о составе"""
+            hits, misses = self.cache.hits, self.cache.misses
+            df, violations = apply_rules(df, self.rules, self.cache)
+            self.logger.info(
+                f'Derived values cache: {self.cache.hits - hits} unique values found, '
+                f'{self.cache.misses - misses} computed'
+            )
+            while self.cache.errors:
+                self.logger.error(f'Derived values cache is unavailable, values computed without it: '
+                                  f'{self.cache.errors.pop(0)}')
+        self.report(violations, tasks, loop)
+        return df
     
-    def extract(self, row: Series) -> Optional[str]:
-        """Извлечение информации о составе"""
-        value = None
-        
-        # Проверяем основное поле состава
-        compound_value = row[PackingColumns.COMPOUND.value]
-        if isinstance(compound_value, str) and compound_value:
-            value = compound_value
-        # Если нет, проверяем дополнительное описание
-        else:
-            desc_value = row[DescriptionColumns.ADDITIONAL_DESCRIPTION.value]
-            if isinstance(desc_value, str) and desc_value:
-                value = desc_value
-        
-        return value.upper() if value else None 
\ No newline at end of file
+    def report(
+            self, violations: 'DataFrame', tasks: List[aio_Task], loop: Optional[AbstractEventLoop] = None
+    ) -> None:
+        """Записывает нарушения в лог и отправляет их в Telegram или в отчет сводки"""
+        for rule, severity, barcode_value, value, source_value, text in violations.itertuples(
+                index=False, name=None):
+            level, mark = self.SEVERITY_LEVELS[severity]
+            message = (
+                f'*For product:* `{barcode_value}` the {rule} value `{value}` {text}.\n\n*Source:* ```{source_value}```'
+            )
+            self.logger.log(level, message.replace('\n', ' ').replace('*', '').replace('`', ''))
+            if self.report_digest is not None:
+                # В режиме сводки нарушения уходят в отчет, а не отдельными сообщениями
+                self.report_digest.add_violation(barcode_value, value, source_value, rule)
+            else:
+                self.schedule(self.telegram_messenger.add_message(f'{mark} {message}'), tasks, loop)
@@ -0,0 +1,104 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Файлы изменений (дельта) к полным выгрузкам складов.
+
+Для каждой выгрузки хранится хеш строки по штрих-коду из прошлого запуска. Новая выгрузка читается
+один раз потоково, и в файл изменений попадают добавленные и измененные строки целиком, а удаленные -
+только штрих-кодом. Столбец Change в конце строки содержит вид изменения.
+"""
+
+from contextlib import closing
+from csv import reader as csv_reader, writer as csv_writer
+from hashlib import blake2b
+from os import linesep
+from pathlib import Path
+from sqlite3 import connect, Connection
+from typing import Dict, List
+
+from column_enums import PackingColumns
+
+# Столбец вида изменения и его значения
+CHANGE_COLUMN = 'Change'
+CHANGE_ADDED = 'added'
+CHANGE_CHANGED = 'changed'
+CHANGE_REMOVED = 'removed'
+
+
+def row_digest(row: List[str]) -> bytes:
+    """Хеш значений строки выгрузки"""
+    return blake2b('\x1f'.join(row).encode('utf-8'), digest_size=16).digest()
+
+
+class DeltaState:
+    """Хеши строк прошлых выгрузок в локальной базе SQLite"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def _connect(self) -> Connection:
+        """Открывает базу, создавая файл и таблицу при необходимости"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Задания [CSV:имя] пишут выгрузки одновременно: ожидание блокировки вместо ошибки
+        conn = connect(self.path, timeout=30)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS rows ('
+            'output TEXT NOT NULL, barcode TEXT NOT NULL, digest BLOB NOT NULL, PRIMARY KEY (output, barcode)'
+            ') WITHOUT ROWID'
+        )
+        return conn
+
+    def write_delta(self, output_path: str, delta_path: str, sep: str) -> Dict[str, int]:
+        """
+        Сравнивает выгрузку с прошлой и записывает файл изменений; хеши обновляются только для изменений.
+
+        Для выгрузки без сохраненного состояния (первый запуск) все строки считаются добавленными.
+
+        :param output_path: Записанная полная выгрузка склада.
+        :param delta_path: Путь к файлу изменений.
+        :return: Количество строк по видам изменений.
+        """
+        counts = {CHANGE_ADDED: 0, CHANGE_CHANGED: 0, CHANGE_REMOVED: 0}
+        key = str(Path(output_path).resolve())
+        with closing(self._connect()) as conn, conn:
+            previous: Dict[str, bytes] = dict(
+                conn.execute('SELECT barcode, digest FROM rows WHERE output = ?', (key,)))
+            updates = []
+            # Формат строк как у DataFrame.to_csv: минимальное экранирование и перевод строки системы
+            with open(output_path, 'r', encoding='utf-8', newline='') as source, \
+                    open(delta_path, 'w', encoding='utf-8', newline='') as target:
+                rows = csv_reader(source, delimiter=sep)
+                writer = csv_writer(target, delimiter=sep, lineterminator=linesep)
+                header = next(rows, [])
+                writer.writerow(header + [CHANGE_COLUMN])
+                barcode_position = header.index(PackingColumns.BARCODE.value)
+                for row in rows:
+                    barcode = row[barcode_position]
+                    digest = row_digest(row)
+                    old_digest = previous.pop(barcode, None)
+                    if old_digest == digest:
+                        continue
+                    change = CHANGE_ADDED if old_digest is None else CHANGE_CHANGED
+                    writer.writerow(row + [change])
+                    updates.append((key, barcode, digest))
+                    counts[change] += 1
+                # Штрих-коды прошлой выгрузки, которых нет в новой
+                for barcode in previous:
+                    removed = [''] * len(header)
+                    removed[barcode_position] = barcode
+                    writer.writerow(removed + [CHANGE_REMOVED])
+                    counts[CHANGE_REMOVED] += 1
+
+            conn.executemany('INSERT OR REPLACE INTO rows (output, barcode, digest) VALUES (?, ?, ?)', updates)
+            conn.executemany('DELETE FROM rows WHERE output = ? AND barcode = ?', [
+                (key, barcode) for barcode in previous
+            ])
+        return counts
@@ -0,0 +1,113 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Ограниченный кэш значений, производных от строк описаний (ширина из Description, состав в верхнем регистре),
+в локальной базе SQLite между запусками. Вычисляются только строки, которых еще нет в кэше;
+при превышении размера удаляются записи, дольше всего не использовавшиеся.
+"""
+
+from contextlib import closing
+from math import isnan
+from pathlib import Path
+from sqlite3 import connect, Connection, Error as SqliteError
+from time import time
+from typing import Any, Callable, Dict, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pandas import Series
+
+
+def _stored(value: Any) -> Any:
+    """Значение для SQLite: пропуск - NULL, типы numpy - встроенные типы Python"""
+    if value is None or isinstance(value, float) and isnan(value):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+
+class DerivedCache:
+    """Кэш производных значений по видам вычисления (kind) и исходной строке"""
+
+    # Точность времени использования (сек): запись обновляется не чаще, чтобы повторные запуски не писали в базу
+    USED_AT_RESOLUTION = 3600
+
+    def __init__(self, path: str, max_entries: int = 200000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.errors: List[str] = []
+
+    def _connect(self) -> Connection:
+        """Открывает базу, создавая файл и таблицу при необходимости"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = connect(self.path, timeout=30)
+        conn.executescript(
+            'CREATE TABLE IF NOT EXISTS derived ('
+            'kind TEXT NOT NULL, source TEXT NOT NULL, value, used_at REAL NOT NULL, PRIMARY KEY (kind, source)'
+            ') WITHOUT ROWID;'
+            'CREATE INDEX IF NOT EXISTS derived_used_at ON derived (used_at);'
+        )
+        return conn
+
+    def resolve(self, kind: str, sources: 'Series', derive: Callable[['Series'], 'Series']) -> 'Series':
+        """
+        Производные значения уникальных строк: известные берутся из кэша, остальные вычисляются derive.
+
+        Ошибка базы не прерывает обработку: значения вычисляются без кэша, текст ошибки - в errors.
+
+        :param kind: Вид вычисления; значения разных видов не смешиваются.
+        :param sources: Уникальные строки.
+        :param derive: Векторное вычисление для Series строк, возвращает Series той же длины.
+        :return: Значения в порядке sources (пропуск - None).
+        """
+        from pandas import Series
+
+        keys = sources.tolist()
+        try:
+            with closing(self._connect()) as conn, conn:
+                # Запрошенные строки во временной таблице: из кэша читаются только они, по первичному ключу
+                conn.execute('CREATE TEMP TABLE requested (source TEXT PRIMARY KEY) WITHOUT ROWID')
+                conn.executemany('INSERT OR IGNORE INTO requested (source) VALUES (?)', ((key,) for key in keys))
+                # CROSS JOIN задает порядок: иначе планировщик перебирает все строки вида kind
+                known: Dict[str, Any] = dict(conn.execute(
+                    'SELECT derived.source, derived.value FROM requested '
+                    'CROSS JOIN derived ON derived.kind = ? AND derived.source = requested.source', (kind,)))
+                now = time()
+                # Время использования найденных строк одним запросом: вытесняются давно не встречавшиеся описания
+                conn.execute(
+                    'UPDATE derived SET used_at = ? '
+                    'WHERE kind = ? AND source IN (SELECT source FROM requested) AND used_at < ?',
+                    (now, kind, now - self.USED_AT_RESOLUTION))
+                misses = [key for key in keys if key not in known]
+                if misses:
+                    derived = [_stored(value) for value in derive(Series(misses, dtype=object)).tolist()]
+                    known.update(zip(misses, derived))
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO derived (kind, source, value, used_at) VALUES (?, ?, ?, ?)',
+                        [(kind, key, value, now) for key, value in zip(misses, derived)]
+                    )
+                    # Размер растет только при добавлении
+                    self._evict(conn)
+        except SqliteError as e:
+            self.errors.append(str(e))
+            return derive(Series(keys, dtype=object)).reset_index(drop=True)
+        self.hits += len(keys) - len(misses)
+        self.misses += len(misses)
+        return Series([known[key] for key in keys], dtype=object)
+
+    def _evict(self, conn: Connection) -> None:
+        """Удаляет записи сверх max_entries, начиная с давно не использовавшихся"""
+        (count,) = conn.execute('SELECT COUNT(*) FROM derived').fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                'DELETE FROM derived WHERE (kind, source) IN ('
+                'SELECT kind, source FROM derived ORDER BY used_at LIMIT ?)', (count - self.max_entries,)
+            )
@@ -13,11 +13,12 @@
 """
 
 import asyncio
-from pandas import Series
+from pandas import DataFrame
 
 from csv_processor import CSVProcessor
 from column_enums import PackingColumns, DescriptionColumns, StorageColumns, AggregationColumns, ColumnGroups
-from data_extractors import WidthExtractor, CompoundExtractor
+from data_extractors import RuleExtractor
+from validation_rules import default_rules, apply_rules
 from file_manager import FileManager
 from send_msg_optimized import TelegramMessenger
 
@@ -46,8 +47,8 @@ async def example_custom_processing():
     
     # Поиск файлов
     files_dict = await processor.file_manager.find_matching_files(
-        processor.csv_config['csv_path_directory'],
-        processor.csv_config['csv_file_pattern']
+        processor.csv_config.path_directory,
+        processor.csv_config.file_pattern
     )
     print(f"Найдено файлов: {len(files_dict)}")
     
@@ -98,28 +99,24 @@ def example_data_extraction():
     telegram_messenger = TelegramMessenger()
     logger = logging.getLogger(__name__)
     
-    width_extractor = WidthExtractor(telegram_messenger, logger, max_width=220)
-    compound_extractor = CompoundExtractor(telegram_messenger, logger)
-    
-    # Пример данных (в реальном коде это будет Series из DataFrame)
-    sample_data = {
-        PackingColumns.WIDTH.value: 150.5,
-        PackingColumns.BARCODE.value: "123456789",
-        DescriptionColumns.DESCRIPTION.value: "Ткань 180см",
-        PackingColumns.COMPOUND.value: "100% хлопок",
-        StorageColumns.SOURCE_FILE.value: "MSK-001"
-    }
-    
-    # Создание Series для демонстрации
-    row = Series(sample_data)
-    
-    # Извлечение ширины
-    width = width_extractor.extract(row, [])
-    print(f"Извлеченная ширина: {width}")
-    
-    # Извлечение состава
-    compound = compound_extractor.extract(row)
-    print(f"Извлеченный состав: {compound}")
+    rule_extractor = RuleExtractor(telegram_messenger, logger, default_rules(max_width=220))
+    
+    # Пример данных (в реальном коде это объединенный DataFrame складов)
+    df = DataFrame({
+        PackingColumns.WIDTH.value: [150.5, None],
+        PackingColumns.BARCODE.value: ["123456789", "987654321"],
+        DescriptionColumns.DESCRIPTION.value: ["Ткань 180см", "Ткань 300см"],
+        PackingColumns.COMPOUND.value: ["100% хлопок", None],
+        DescriptionColumns.ADDITIONAL_DESCRIPTION.value: ["", "лен"],
+        StorageColumns.SOURCE_FILE.value: ["MSK-001", "MSK-002"]
+    })
+    
+    # Извлечение ширины и состава по правилам; ширина 300 превышает максимум и становится пропуском,
+    # а нарушение возвращается строкой таблицы (RuleExtractor.extract отправил бы его в Telegram)
+    df, violations = apply_rules(df, rule_extractor.rules)
+    print(f"Нарушения: {violations[['rule', 'barcode', 'value']].to_dict('records')}")
+    print(f"Извлеченная ширина: {df[PackingColumns.WIDTH.value].tolist()}")
+    print(f"Извлеченный состав: {df[PackingColumns.COMPOUND.value].tolist()}")
 
 
 async def example_file_operations():
@@ -180,14 +177,14 @@ async def example_complete_workflow():
         # 1. Загрузка конфигурации
         print("1. Загрузка конфигурации...")
         csv_config = processor.csv_config
-        print(f"   Директория: {csv_config['csv_path_directory']}")
-        print(f"   Шаблон: {csv_config['csv_file_pattern']}")
+        print(f"   Директория: {csv_config.path_directory}")
+        print(f"   Шаблон: {csv_config.file_pattern}")
         
         # 2. Поиск файлов
         print("2. Поиск файлов...")
         files_dict = await processor.file_manager.find_matching_files(
-            csv_config['csv_path_directory'],
-            csv_config['csv_file_pattern']
+            csv_config.path_directory,
+            csv_config.file_pattern
         )
         print(f"   Найдено файлов: {len(files_dict)}")
         
@@ -214,7 +211,7 @@ async def example_complete_workflow():
             # Проверка модификации
             await processor.file_manager.check_file_modification(
                 file_path,
-                processor.inactivity_config['inactivity_limit_hours'],
+                processor.inactivity_config.limit_hours,
                 processor.telegram_messenger
             )
             
@@ -8,13 +8,20 @@
 # __status__ = 'Production'  # 'Production / Development'
 # __version__ = '2.0.0.1'
 
-from typing import Dict, List, Optional
-from aiofiles import open as aio_open
-from os.path import dirname, getmtime, join as os_join
-from os import walk as os_walk
+from typing import Dict, List, Optional, TYPE_CHECKING
+from functools import partial
+from os.path import basename, dirname, getmtime, join as os_join
+from os import makedirs, walk as os_walk
 from re import match
 from datetime import datetime, timedelta
-from shutil import copy as shutil_copy
+from shutil import copy as shutil_copy, move as shutil_move
+
+from report_digest import ReportDigest
+from stage_executor import StageExecutor
+from csv_tasks import read_file_buffer, detect_encoding, load_csv_file
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
 
 
 class FileManager:
@@ -22,24 +29,58 @@ class FileManager:
     
     def __init__(self, logger):
         self.logger = logger
+        self.executor = StageExecutor()
     
-    async def read_file_lines(self, file_path: str) -> Optional[List[str]]:
-        """Чтение строк из файла"""
-        try:
-            async with aio_open(file_path, mode='r', encoding='utf-8') as file:
-                lines = await file.readlines()
-                return lines if lines else None
-        except FileNotFoundError:
+    def log_read_error(self, file_path: str, error: Exception) -> None:
+        """Запись в лог ошибки чтения файла"""
+        if isinstance(error, FileNotFoundError):
             self.logger.error(f'File not found: "{file_path}"')
-        except PermissionError:
+        elif isinstance(error, PermissionError):
             self.logger.error(f'Access denied for file: "{file_path}"')
+        else:
+            self.logger.error(f'An error occurred while reading "{file_path}": {str(error)}')
+    
+    async def read_file_bytes(self, file_path: str) -> Optional[bytes]:
+        """Чтение файла целиком одним обращением к диску в пуле потоков"""
+        try:
+            data = await self.executor.run_in_thread(lambda: bytes(read_file_buffer(file_path)))
+            return data if data else None
+        except Exception as e:
+            self.log_read_error(file_path, e)
+        return None
+    
+    async def read_file_lines(self, file_path: str) -> Optional[List[str]]:
+        """Чтение строк из файла; кодировка определяется по метке порядка байтов (по умолчанию UTF-8)"""
+        data = await self.read_file_bytes(file_path)
+        if data is None:
+            return None
+        encoding, offset = detect_encoding(memoryview(data))
+        try:
+            lines = data[offset:].decode(encoding).splitlines(keepends=True)
+        except UnicodeDecodeError as e:
+            self.log_read_error(file_path, e)
+            return None
+        return lines if lines else None
+    
+    async def read_csv(self, file_path: str, csv_sep: str, mmap_min_size: int = 0) -> Optional['DataFrame']:
+        """
+        Чтение и разбор файла CSV в одном вызове пула: байты из буфера чтения сразу передаются в read_csv.
+        
+        :param mmap_min_size: Файлы от этого размера (байт) отображаются в память (mmap); 0 - не отображать.
+        :return: DataFrame или None, если файл пуст или не прочитан.
+        """
+        try:
+            return await self.executor.run_cpu(load_csv_file, file_path, csv_sep, mmap_min_size)
         except Exception as e:
-            self.logger.error(f'An error occurred while reading "{file_path}": {str(e)}')
+            self.log_read_error(file_path, e)
         return None
     
-    async def check_file_modification(self, file_path: str, inactivity_limit_hours: int, telegram_messenger) -> None:
+    async def check_file_modification(
+            self, file_path: str, inactivity_limit_hours: int, telegram_messenger,
+            report_digest: Optional[ReportDigest] = None, store: str = ''
+    ) -> None:
         """Проверка времени последней модификации файла"""
-        file_mod_time = datetime.fromtimestamp(getmtime(file_path))
+        file_mod_time = datetime.fromtimestamp(await self.executor.run_in_thread(getmtime, file_path))
         current_time = datetime.now()
         file_mod_delta = current_time - file_mod_time
         
@@ -58,18 +99,28 @@ class FileManager:
         file_mod_date = file_mod_time.strftime('%y.%d.%m %H:%M:%S')
         message = f'*The file was modified at:*\n{file_mod_date}\n{time_description} ago.'
         
-        if file_mod_delta <= timedelta(hours=inactivity_limit_hours):
+        is_stale = file_mod_delta > timedelta(hours=inactivity_limit_hours)
+        if report_digest is not None:
+            report_digest.add_file(store, file_path, file_mod_time, is_stale)
+
+        if not is_stale:
             self.logger.info(message.replace('\n', ' ').replace('*', '').replace('`', ''))
         else:
             message = (
                 f'*File:*```\n{file_path} ```has not been modified for more than *{inactivity_limit_hours}* '
                 f'hours.\n\n{message}')
             self.logger.warning(message.replace('\n', ' ').replace('*', '').replace('`', ''))
-            await telegram_messenger.add_message(f'🟥️ {message}')
+            if report_digest is None:
+                await telegram_messenger.add_message(f'🟥️ {message}')
     
     @staticmethod
     async def find_matching_files(directory: str, pattern: str) -> Dict[str, str]:
         """Поиск файлов по шаблону"""
+        return await StageExecutor().run_in_thread(FileManager.walk_matching_files, directory, pattern)
+    
+    @staticmethod
+    def walk_matching_files(directory: str, pattern: str) -> Dict[str, str]:
+        """Обход каталога (блокирующий): имя из первой группы шаблона -> путь к файлу"""
         files_dict = {}
         for root, dirs, files in os_walk(directory):
             for file in files:
@@ -84,11 +135,27 @@ class FileManager:
     async def copy_file(self, src: str, dst: str) -> None:
         """Копирование файла"""
         try:
-            shutil_copy(src, dst)
+            await self.executor.run_in_thread(shutil_copy, src, dst)
             self.logger.info(f'File copied from "{src}" to "{dst}".')
         except Exception as e:
             self.logger.error(f'Failed to copy file from "{src}" to "{dst}": {e}.')
     
+    async def quarantine_file(self, file_path: str, directory: str) -> Optional[str]:
+        """
+        Перенос отклоненного файла в каталог карантина; к имени добавляется время переноса.
+        
+        :return: Новый путь файла или None, если перенести не удалось.
+        """
+        target = os_join(directory, f'{datetime.now().strftime("%Y%m%d_%H%M%S")}_{basename(file_path)}')
+        try:
+            await self.executor.run_in_thread(partial(makedirs, directory, exist_ok=True))
+            await self.executor.run_in_thread(shutil_move, file_path, target)
+        except Exception as e:
+            self.logger.error(f'Failed to move file "{file_path}" to quarantine "{directory}": {e}.')
+            return None
+        self.logger.warning(f'File moved from "{file_path}" to quarantine "{target}".')
+        return target
+    
     @staticmethod
     def get_output_path(file_path: str, csv_file_name: str) -> str:
         """Получение пути для выходного файла"""
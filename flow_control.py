@@ -0,0 +1,109 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+from asyncio import sleep as aio_sleep
+from enum import Enum
+from time import monotonic
+from typing import Dict
+
+
+class TokenBucket:
+    """Token bucket: пополняется на rate токенов в секунду, хранит не больше capacity"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = monotonic()
+
+    def _refill(self) -> None:
+        """Начисляет токены за прошедшее время"""
+        now = monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, tokens: float = 1.0) -> float:
+        """Возвращает, сколько секунд нужно подождать до появления tokens токенов"""
+        self._refill()
+        if self._tokens >= tokens:
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+    def consume(self, tokens: float = 1.0) -> None:
+        """Списывает токены (баланс может уйти в минус при одновременных запросах)"""
+        self._refill()
+        self._tokens -= tokens
+
+
+class TelegramRateLimiter:
+    """Проактивное ограничение частоты отправки по лимитам Telegram Bot API"""
+
+    def __init__(self, global_rate: float, per_chat_rate: float, per_group_per_minute: float):
+        self._global = TokenBucket(global_rate, global_rate)
+        self._per_chat_rate = per_chat_rate
+        self._per_group_rate = per_group_per_minute / 60
+        self._chats: Dict[int, TokenBucket] = {}
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        """Возвращает bucket чата (у групп и каналов отрицательный chat_id и более строгий лимит)"""
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            rate = self._per_group_rate if chat_id < 0 else self._per_chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, 1)
+        return bucket
+
+    async def acquire(self, chat_id: int) -> None:
+        """Ждет, пока отправка в чат не будет разрешена глобальным и чатовым лимитами"""
+        chat_bucket = self._chat_bucket(chat_id)
+        while True:
+            delay = max(self._global.delay(), chat_bucket.delay())
+            if delay <= 0:
+                break
+            await aio_sleep(delay)
+        self._global.consume()
+        chat_bucket.consume()
+
+
+class CircuitState(Enum):
+    """Состояния автоматического выключателя"""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Автоматический выключатель: после серии сбоев прекращает попытки на время остывания"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def allow_request(self) -> bool:
+        """Проверяет, можно ли выполнить запрос; по истечении остывания пропускает пробный"""
+        if self.state == CircuitState.OPEN:
+            if monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = CircuitState.HALF_OPEN
+        return True
+
+    def record_success(self) -> None:
+        """Фиксирует успешный запрос и замыкает цепь"""
+        self.state = CircuitState.CLOSED
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        """Фиксирует сбой; размыкает цепь при достижении порога или неудачной пробе"""
+        self._failures += 1
+        if self.state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+            self.state = CircuitState.OPEN
+            self._opened_at = monotonic()
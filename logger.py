@@ -9,13 +9,87 @@
 
 import logging
 import logging.config
+import logging.handlers
+from atexit import register as atexit_register
 from colorlog import ColoredFormatter
+from json import dumps as json_dumps
 from pathlib import Path
-from typing import List, Dict
+from queue import Queue
+from typing import Dict, Optional, Any, Tuple
 from os.path import join as os_join
 from datetime import datetime as dt
 
-from config import Config, ConfigNames
+from config import Config, LogConfig
+from run_metrics import run_id_var, stage_var, source_file_var
+
+
+# Queue listener: formatting and writing of log records happen on its own thread
+_queue_listener: Optional['BoundedQueueListener'] = None
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for a bounded queue.
+
+    Records are not formatted on the calling thread; the listener's handlers do that.
+    When the queue is full the caller waits for free space, so no records are lost.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.queue.put(record)
+
+
+class RunContextFilter(logging.Filter):
+    """Tags every record with the current run ID, stage and source file (empty when unknown)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.run_id = run_id_var.get()
+        record.stage = stage_var.get()
+        record.source_file = source_file_var.get()
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line; metrics passed via extra={'metrics': ...} are included."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            'time': dt.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'run_id': getattr(record, 'run_id', ''),
+            'stage': getattr(record, 'stage', ''),
+            'source_file': getattr(record, 'source_file', ''),
+            'message': record.getMessage(),
+        }
+        metrics = getattr(record, 'metrics', None)
+        if metrics is not None:
+            entry['metrics'] = metrics
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json_dumps(entry, ensure_ascii=False, default=str)
+
+
+class BoundedQueueListener(logging.handlers.QueueListener):
+    """QueueListener that waits for free space when stopping, so a full queue is drained on shutdown."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def stop_logger() -> None:
+    """
+    Stops the log queue listener after writing out all queued records.
+
+    :return: None
+    """
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
 
 
 def setup_logger(log_path: str | None = None) -> str | None:
@@ -26,18 +100,24 @@ def setup_logger(log_path: str | None = None) -> str | None:
 
     :return: None
     """
-    config: Dict[str, str] = Config().get_config(ConfigNames.LOG)
-
-    log_level_console: str = config.get('log_level_console')
-    log_level_file: str = config.get('log_level_file')
-    log_level_root: str = config.get('log_level_root', 'INFO')
-    log_format_console: str = config.get('log_format_console')
-    log_format_file: str = config.get('log_format_file')
-    log_date_format: str = config.get('log_date_format')
-    log_console_language: str = config.get('log_console_language')
-    log_dir: str = config.get('log_dir', r'logs\%Y\%Y.%m')
-    log_file: str = config.get('log_file', 'backup_log_%Y.%m.%d.log')
-    log_ignore_list: List[str] = config.get('log_ignore_list', [])
+    global _queue_listener
+    stop_logger()
+
+    config: LogConfig = Config().log
+
+    log_level_console: str = config.level_console
+    log_level_file: str = config.level_file
+    log_level_root: str = config.level_root
+    log_format_console: str = config.format_console
+    log_format_file: str = config.format_file
+    log_date_format: str = config.date_format
+    log_console_language: str = config.console_language
+    log_dir: str = config.dir
+    log_file: str = config.file
+    log_ignore_list: Tuple[str, ...] = config.ignore_list
+    log_queue_size: int = config.queue_size
+    log_json_file: str = config.json_file
+    log_level_json: str = config.level_json
 
     if log_path is None:
         log_path = os_join(log_dir, log_file)
@@ -56,6 +136,33 @@ def setup_logger(log_path: str | None = None) -> str | None:
         logging.error(f'Failed to create log directory: {e}')
         return None
 
+    handlers_config: Dict[str, Dict] = {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'colored',
+            'level': log_level_console,
+        },
+        'rotating_file': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'formatter': 'standard',
+            'level': log_level_file,
+            'filename': log_path,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+        },
+    }
+    if log_json_file:
+        # Machine-readable run log next to the text log: one JSON object per line
+        handlers_config['json_file'] = {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'formatter': 'json',
+            'level': log_level_json,
+            'filename': os_join(log_dir, log_json_file),
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+        }
+
     try:
         logging.config.dictConfig(
             {
@@ -64,6 +171,9 @@ def setup_logger(log_path: str | None = None) -> str | None:
                     'standard': {
                         'format': log_format_file,
                     },
+                    'json': {
+                        '()': JsonLinesFormatter,
+                    },
                     'colored': {
                         '()': ColoredFormatter,
                         'format': log_format_console,
@@ -78,23 +188,9 @@ def setup_logger(log_path: str | None = None) -> str | None:
                         }
                     }
                 },
-                'handlers': {
-                    'console': {
-                        'class': 'logging.StreamHandler',
-                        'formatter': 'colored',
-                        'level': log_level_console,
-                    },
-                    'rotating_file': {
-                        'class': 'logging.handlers.RotatingFileHandler',
-                        'formatter': 'standard',
-                        'level': log_level_file,
-                        'filename': log_path,
-                        'maxBytes': 10 * 1024 * 1024,
-                        'backupCount': 5,
-                    },
-                },
+                'handlers': handlers_config,
                 'root': {
-                    'handlers': ['console', 'rotating_file'],
+                    'handlers': list(handlers_config),
                     'level': log_level_root,
                 },
             }
@@ -103,6 +199,19 @@ def setup_logger(log_path: str | None = None) -> str | None:
         logging.error(f'Error configuring logging: {e}')
         return None
 
+    # Move the handlers behind a queue so formatting and file writes do not block the event loop
+    root_logger = logging.getLogger()
+    handlers = list(root_logger.handlers)
+    for handler in handlers:
+        root_logger.removeHandler(handler)
+    log_queue: Queue = Queue(maxsize=log_queue_size)
+    queue_handler = BoundedQueueHandler(log_queue)
+    # The context variables are read on the calling thread, before the record is queued
+    queue_handler.addFilter(RunContextFilter())
+    root_logger.addHandler(queue_handler)
+    _queue_listener = BoundedQueueListener(log_queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
+
     # log_ignore_list: List[str] = [
     #     # 'smbprotocol'
     # ]
@@ -125,20 +234,24 @@ def change_log_levels(console_level: str, file_level: str | None = None) -> None
 
     :return: None
     """
-    root_logger = logging.getLogger()
     if file_level is None:
         file_level = console_level
 
-    for handler in root_logger.handlers:
-        if isinstance(handler, logging.StreamHandler):
-            logging.info(f'Set logger level {console_level} to console.')
-            handler.setLevel(console_level)
-        elif isinstance(handler, logging.handlers.RotatingFileHandler):
+    handlers = _queue_listener.handlers if _queue_listener is not None else logging.getLogger().handlers
+    for handler in handlers:
+        # RotatingFileHandler is a StreamHandler subclass, so it is checked first
+        if isinstance(handler.formatter, JsonLinesFormatter):
+            continue
+        if isinstance(handler, logging.handlers.RotatingFileHandler):
             logging.info(f'Set logger level {file_level} to log file.')
             handler.setLevel(file_level)
+        elif isinstance(handler, logging.StreamHandler):
+            logging.info(f'Set logger level {console_level} to console.')
+            handler.setLevel(console_level)
 
 
 setup_logger()
+atexit_register(stop_logger)
 
 if __name__ == '__main__':
     log_levels: list = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
@@ -9,14 +9,29 @@
 # __version__ = '2.0.0.1'
 
 from asyncio import run as aio_run
-from csv_processor import CSVProcessor
 
 
-async def main():
-    """Основная функция для запуска процесса объединения CSV файлов"""
+async def main() -> bool:
+    """
+    Основная функция для запуска процесса объединения CSV файлов.
+    
+    :return: False, если объединение остановлено проверкой заголовков.
+    """
+    # Импорт внутри функции: при EXECUTOR_POLICY = process процессы пула (spawn) заново импортируют
+    # этот модуль, и верхнеуровневый импорт csv_processor загружал бы в каждом из них pandas, Telegram
+    # и настраивал логгер
+    from csv_processor import CSVProcessor
+    from stage_executor import StageExecutor
+    
     processor = CSVProcessor()
-    await processor.run_merge()
+    try:
+        return await processor.run_merge()
+    finally:
+        await processor.telegram_messenger.close()
+        StageExecutor().shutdown()
 
 
 if __name__ == '__main__':
-    aio_run(main()) 
\ No newline at end of file
+    # Остановленное объединение завершается с кодом 1, чтобы планировщик видел сбой
+    if not aio_run(main()):
+        raise SystemExit(1) 
\ No newline at end of file
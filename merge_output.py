@@ -0,0 +1,84 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Общие части движков объединения без DataFrame всех складов (sqlite_merge, stream_merge):
+учет типов столбцов и запись сгруппированных строк блоками в файлы складов.
+"""
+
+from typing import Dict, IO, Iterable, List, Sequence, Set, TYPE_CHECKING
+
+from column_enums import PackingColumns
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+class ColumnKinds:
+    """Типы столбцов по файлам, чтобы числа записывались так же, как после concat в pandas"""
+
+    def __init__(self):
+        self.files = 0
+        self._kinds: Dict[str, Set[str]] = {}
+        self._present: Dict[str, int] = {}
+
+    def add(self, df: 'DataFrame', columns: Iterable[str]) -> None:
+        """Учитывает столбцы очередного файла"""
+        self.files += 1
+        for column in columns:
+            self._kinds.setdefault(column, set()).add(df[column].dtype.kind)
+            self._present[column] = self._present.get(column, 0) + 1
+
+    def float_columns(self) -> List[str]:
+        """Столбцы, которые после concat в pandas стали бы float: дробные в каком-либо файле или целые с пропусками"""
+        return [
+            column for column, kinds in self._kinds.items()
+            if 'f' in kinds and kinds <= {'i', 'u', 'f'}
+            or kinds <= {'i', 'u'} and self._present[column] < self.files
+        ]
+
+
+def write_grouped_chunks(
+        chunks: Iterable[Sequence[tuple]], result_columns: List[str], place_columns: Dict[str, str],
+        outputs: Dict[str, str], header_template: List[str], sep: str, float_columns: Iterable[str] = ()
+) -> int:
+    """
+    Записывает сгруппированные строки блоками сразу во все файлы складов.
+
+    :param chunks: Блоки строк результата в порядке штрих-кодов; значения по result_columns.
+    :param place_columns: Склад -> столбец результата с его местами хранения.
+    :param outputs: Склад -> путь к выходному файлу.
+    :param float_columns: Столбцы, приводимые к float (см. ColumnKinds.float_columns).
+    :return: Количество записанных строк (товаров).
+    """
+    from pandas import DataFrame
+
+    float_columns = [column for column in float_columns if column in result_columns]
+    files: Dict[str, IO[str]] = {}
+    groups = 0
+    try:
+        for store, output_path in outputs.items():
+            files[store] = open(output_path, 'w', encoding='utf-8', newline='')
+        for rows in chunks:
+            chunk = DataFrame.from_records(rows, columns=result_columns)
+            if float_columns:
+                chunk[float_columns] = chunk[float_columns].astype('float64')
+            for store, file in files.items():
+                store_chunk = chunk.rename(columns={place_columns[store]: PackingColumns.STORAGE_PLACE.value})
+                store_chunk.reindex(columns=header_template).to_csv(file, index=False, sep=sep, header=groups == 0)
+            groups += len(rows)
+        if groups == 0:
+            # Пустой результат: только заголовок, как при записи пустого DataFrame
+            for file in files.values():
+                DataFrame(columns=header_template).to_csv(file, index=False, sep=sep)
+    finally:
+        for file in files.values():
+            file.close()
+    return groups
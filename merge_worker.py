@@ -0,0 +1,172 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Постоянный воркер объединения: импорты, конфигурация, логирование и HTTP-сессия Telegram
+загружаются один раз, а объединения запускаются по расписанию или по команде через локальный сокет.
+
+Пример: python merge_worker.py                 # запустить воркер
+        python merge_worker.py --send merge    # запустить объединение в работающем воркере
+"""
+
+from argparse import ArgumentParser
+from asyncio import (
+    run as aio_run, start_server as aio_start_server, wait_for as aio_wait_for, Lock as aio_Lock,
+    Event as aio_Event, StreamReader, StreamWriter, TimeoutError as aio_TimeoutError, create_task as aio_create_task
+)
+from json import dumps
+from os import getpid
+from pathlib import Path
+from sys import platform
+from typing import Any, Dict, Optional
+
+from config import Config
+from logger import logging, setup_logger
+from stage_executor import StageExecutor
+from worker_protocol import (
+    WORKER_HOST, COMMAND_MERGE, COMMAND_STATUS, COMMAND_STOP, WORKER_COMMANDS, encode_reply, send_worker_command
+)
+
+
+def memory_usage_mb() -> float:
+    """Текущий объем памяти процесса (RSS), МБ"""
+    if platform == 'win32':
+        from ctypes import Structure, byref, c_size_t, c_ulong, sizeof, windll
+
+        class ProcessMemoryCounters(Structure):
+            _fields_ = [
+                ('cb', c_ulong), ('PageFaultCount', c_ulong), ('PeakWorkingSetSize', c_size_t),
+                ('WorkingSetSize', c_size_t), ('QuotaPeakPagedPoolUsage', c_size_t),
+                ('QuotaPagedPoolUsage', c_size_t), ('QuotaPeakNonPagedPoolUsage', c_size_t),
+                ('QuotaNonPagedPoolUsage', c_size_t), ('PagefileUsage', c_size_t), ('PeakPagefileUsage', c_size_t),
+            ]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = sizeof(counters)
+        windll.psapi.GetProcessMemoryInfo(windll.kernel32.GetCurrentProcess(), byref(counters), counters.cb)
+        return counters.WorkingSetSize / 2 ** 20
+
+    statm = Path('/proc/self/statm')
+    if statm.exists():
+        from os import sysconf
+        return int(statm.read_text().split()[1]) * sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+    # Прочие системы: пиковое значение (на macOS ru_maxrss - в байтах, на остальных - в КБ)
+    from resource import getrusage, RUSAGE_SELF
+    max_rss = getrusage(RUSAGE_SELF).ru_maxrss
+    return max_rss / 2 ** 20 if platform == 'darwin' else max_rss / 2 ** 10
+
+
+class MergeWorker:
+    """Долгоживущий процесс, выполняющий объединения по одному за раз"""
+
+    def __init__(self, port: int, interval: float = 0):
+        self.port = port
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+        self.runs: int = 0
+        self.last_summary: Optional[Dict[str, Any]] = None
+        self._lock = aio_Lock()
+        self._stopping = aio_Event()
+
+    async def merge(self) -> Dict[str, Any]:
+        """Выполняет одно объединение; параллельные запросы ждут завершения текущего"""
+        # Импортируется при первом объединении: pandas и прочие тяжелые модули остаются загруженными
+        from csv_processor import CSVProcessor
+
+        async with self._lock:
+            if Config().reload_if_changed():
+                setup_logger()
+                # Пулы пересоздаются при следующем использовании по новой политике [EXECUTOR]
+                StageExecutor().shutdown()
+                self.logger.info('config.ini changed, configuration reloaded.')
+            processor = CSVProcessor()
+            await processor.run_merge()
+            # Воркер не закрывает TelegramMessenger: очередь и HTTP-сессия переживают запуск
+            await processor.telegram_messenger.flush()
+            self.runs += 1
+            self.last_summary = processor.metrics.summary()
+            return self.last_summary
+
+    def status(self) -> Dict[str, Any]:
+        """Состояние воркера для супервизора"""
+        return {
+            'ok': True, 'pid': getpid(), 'runs': self.runs, 'busy': self._lock.locked(),
+            'memory_mb': round(memory_usage_mb(), 1), 'last_run': self.last_summary,
+        }
+
+    async def _handle(self, reader: StreamReader, writer: StreamWriter) -> None:
+        """Обрабатывает одну команду клиента"""
+        try:
+            command = (await aio_wait_for(reader.readline(), timeout=10)).decode('utf-8').strip()
+            if command == COMMAND_MERGE:
+                try:
+                    reply = {'ok': True, 'metrics': await self.merge()}
+                except Exception as e:
+                    self.logger.exception(f'Merge failed: {e}')
+                    reply = {'ok': False, 'error': str(e)}
+            elif command == COMMAND_STATUS:
+                reply = self.status()
+            elif command == COMMAND_STOP:
+                self.logger.info('Stop requested.')
+                self._stopping.set()
+                reply = {'ok': True}
+            else:
+                reply = {'ok': False, 'error': f'Unknown command "{command}", expected one of {WORKER_COMMANDS}'}
+            writer.write(encode_reply(reply))
+            await writer.drain()
+        except (aio_TimeoutError, ConnectionError) as e:
+            self.logger.warning(f'Worker client error: {e!r}')
+        finally:
+            writer.close()
+
+    async def _schedule(self) -> None:
+        """Запускает объединение каждые interval секунд, пока воркер не остановлен"""
+        while not self._stopping.is_set():
+            try:
+                await aio_wait_for(self._stopping.wait(), timeout=self.interval)
+            except aio_TimeoutError:
+                try:
+                    await self.merge()
+                except Exception as e:
+                    self.logger.exception(f'Scheduled merge failed: {e}')
+
+    async def serve(self) -> None:
+        """Принимает команды до запроса остановки, затем дожидается текущего объединения"""
+        server = await aio_start_server(self._handle, WORKER_HOST, self.port)
+        self.logger.info(f'Merge worker {getpid()} listening on {WORKER_HOST}:{self.port}.')
+        scheduler = aio_create_task(self._schedule()) if self.interval > 0 else None
+        try:
+            await self._stopping.wait()
+        finally:
+            server.close()
+            if scheduler is not None:
+                # Планировщик завершается сам после текущего объединения
+                await scheduler
+            async with self._lock:
+                from send_msg_optimized import TelegramMessenger
+                await TelegramMessenger().close()
+                StageExecutor().shutdown()
+        self.logger.info(f'Merge worker {getpid()} stopped after {self.runs} runs.')
+
+
+if __name__ == '__main__':
+    arg_parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument('--send', choices=WORKER_COMMANDS, help='отправить команду работающему воркеру')
+    arg_parser.add_argument('--port', type=int, help='порт воркера (по умолчанию [RUN] WORKER_PORT)')
+    args = arg_parser.parse_args()
+
+    worker_port = args.port or Config().run.worker_port
+    if args.send:
+        # Объединение может длиться долго, поэтому ответ на merge ждем без таймаута
+        print(dumps(send_worker_command(args.send, worker_port, None if args.send == COMMAND_MERGE else 5.0),
+                    ensure_ascii=False, indent=2))
+    else:
+        aio_run(MergeWorker(worker_port, Config().run.worker_interval).serve())
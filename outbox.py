@@ -0,0 +1,93 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+from contextlib import closing
+from datetime import datetime
+from json import dumps, loads
+from pathlib import Path
+from sqlite3 import connect, Connection
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class TelegramOutbox:
+    """
+    Журнал неотправленных сообщений Telegram в локальной базе SQLite.
+
+    В журнал попадают только временные сбои (таймаут, 5xx, долгий 429, открытый выключатель).
+    Запросы, отклоненные Telegram (4xx), повторять бесполезно: они хранятся в таблице dead_letter
+    для разбора и не задерживают отправку следующих сообщений.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def _connect(self) -> Connection:
+        """Открывает базу, создавая файл и таблицу при необходимости"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = connect(self.path)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT NOT NULL, '
+            'method TEXT NOT NULL, payload TEXT NOT NULL, attachment BLOB)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS dead_letter ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, created_at TEXT NOT NULL, rejected_at TEXT NOT NULL, '
+            'method TEXT NOT NULL, payload TEXT NOT NULL, attachment BLOB, error TEXT NOT NULL)'
+        )
+        return conn
+
+    def append(self, method: str, payload: Dict[str, Any], attachment: Optional[bytes] = None) -> None:
+        """Добавляет запрос к API (и файл для отправки, если есть) в конец журнала"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT INTO outbox (created_at, method, payload, attachment) VALUES (?, ?, ?, ?)',
+                (datetime.now().isoformat(timespec='seconds'), method, dumps(payload, ensure_ascii=False), attachment)
+            )
+
+    def pending(self) -> List[Tuple[int, str, Dict[str, Any], Optional[bytes]]]:
+        """Возвращает неотправленные запросы в порядке добавления"""
+        if not self.path.exists():
+            return []
+        with closing(self._connect()) as conn:
+            rows = conn.execute('SELECT id, method, payload, attachment FROM outbox ORDER BY id').fetchall()
+        return [(entry_id, method, loads(payload), attachment) for entry_id, method, payload, attachment in rows]
+
+    def remove(self, entry_id: int) -> None:
+        """Удаляет доставленный запрос из журнала"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM outbox WHERE id = ?', (entry_id,))
+
+    def reject(self, method: str, payload: Dict[str, Any], attachment: Optional[bytes], error: str) -> None:
+        """Сохраняет запрос, отклоненный Telegram, в таблицу dead_letter"""
+        now = datetime.now().isoformat(timespec='seconds')
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT INTO dead_letter (created_at, rejected_at, method, payload, attachment, error) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (now, now, method, dumps(payload, ensure_ascii=False), attachment, error)
+            )
+
+    def bury(self, entry_id: int, error: str) -> None:
+        """Переносит запрос журнала, отклоненный Telegram при переотправке, в таблицу dead_letter"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT INTO dead_letter (created_at, rejected_at, method, payload, attachment, error) '
+                'SELECT created_at, ?, method, payload, attachment, ? FROM outbox WHERE id = ?',
+                (datetime.now().isoformat(timespec='seconds'), error, entry_id)
+            )
+            conn.execute('DELETE FROM outbox WHERE id = ?', (entry_id,))
+
+    def count(self) -> int:
+        """Количество неотправленных запросов"""
+        if not self.path.exists():
+            return 0
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
@@ -0,0 +1,88 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+from csv import writer as csv_writer
+from datetime import datetime
+from gzip import compress as gzip_compress
+from io import StringIO
+from typing import Any, Dict, List, Tuple
+
+
+class ReportDigest:
+    """Сводка запуска: короткий текст для Telegram и подробный отчет в виде сжатого документа"""
+
+    VIOLATION_COLUMNS = ['barcode', 'value', 'source', 'rule']
+    FILE_COLUMNS = ['store', 'path', 'modified', 'hours_since_modified', 'stale']
+    STORE_COLUMNS = ['store', 'input_rows', 'output_rows', 'output_path']
+    REJECTED_COLUMNS = ['store', 'path', 'problems']
+
+    def __init__(self, separator: str = ';'):
+        self.separator = separator
+        self.created_at = datetime.now()
+        self.violations: List[Tuple[Any, Any, Any, str]] = []
+        self.files: List[Tuple[str, str, str, float, bool]] = []
+        self.stores: Dict[str, Dict[str, Any]] = {}
+        self.rejected: List[Tuple[str, str, str]] = []
+
+    def add_violation(self, barcode: Any, value: Any, source: Any, rule: str = 'width') -> None:
+        """Добавляет нарушение проверки данных (rule - имя правила validation_rules)"""
+        self.violations.append((barcode, value, source, rule))
+
+    def add_file(self, store: str, path: str, modified: datetime, stale: bool) -> None:
+        """Добавляет сведения о входном файле"""
+        hours = round((datetime.now() - modified).total_seconds() / 3600, 2)
+        self.files.append((store, path, modified.strftime('%Y-%m-%d %H:%M:%S'), hours, stale))
+
+    def add_rejected(self, store: str, path: str, problems: List[str]) -> None:
+        """Добавляет файл, отклоненный проверкой заголовков"""
+        self.rejected.append((store, path, '; '.join(problems)))
+
+    def update_store(self, store: str, **values: Any) -> None:
+        """Обновляет счетчики склада (input_rows, output_rows, output_path)"""
+        self.stores.setdefault(store, {}).update(values)
+
+    @property
+    def stale_files(self) -> int:
+        """Количество файлов, не изменявшихся дольше допустимого"""
+        return sum(1 for file in self.files if file[-1])
+
+    def summary(self, title: str) -> str:
+        """Короткий текст сводки для подписи к документу"""
+        return (
+            f'{title}\n\n'
+            f'*Files:* {len(self.files) or len(self.stores)}\n'
+            f'*Stale files:* {self.stale_files}\n'
+            + (f'*Rejected files:* {len(self.rejected)}\n' if self.rejected else '') +
+            f'*Violations:* {len(self.violations)}\n'
+            f'*Rows read:* {sum(store.get("input_rows", 0) for store in self.stores.values())}\n\n'
+            f'Details are in the attached report.'
+        )
+
+    def to_document(self) -> Tuple[str, bytes]:
+        """Формирует отчет: текстовый файл с CSV-разделами, сжатый gzip"""
+        buffer = StringIO()
+        writer = csv_writer(buffer, delimiter=self.separator, lineterminator='\n')
+
+        sections = [
+            ('stores', self.STORE_COLUMNS,
+             [[store] + [values.get(column, '') for column in self.STORE_COLUMNS[1:]]
+              for store, values in self.stores.items()]),
+            ('files', self.FILE_COLUMNS, self.files),
+            ('rejected', self.REJECTED_COLUMNS, self.rejected),
+            ('violations', self.VIOLATION_COLUMNS, self.violations),
+        ]
+        for name, columns, rows in sections:
+            buffer.write(f'# {name}\n')
+            writer.writerow(columns)
+            writer.writerows(rows)
+            buffer.write('\n')
+
+        file_name = f'merge_report_{self.created_at.strftime("%Y%m%d_%H%M%S")}.txt.gz'
+        return file_name, gzip_compress(buffer.getvalue().encode('utf-8'))
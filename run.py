@@ -8,15 +8,18 @@ __maintainer__ = 'InfSub'
 # __version__ = '2.0.0.1'
 
 import logging
+from hashlib import sha256
 from logging import getLogger
 from os import getlogin
-from sys import platform
-from subprocess import check_call, run as sub_run, CalledProcessError
+from sys import platform, version as sys_version
+from subprocess import check_call, run as sub_run, CalledProcessError, Popen, TimeoutExpired
+from time import sleep
 from pathlib import Path
 from venv import create as venv_create
 from configparser import ConfigParser
 
-from config import Config, ConfigNames
+from config import Config
+from worker_protocol import send_worker_command, COMMAND_STATUS, COMMAND_STOP
 
 # Константы
 CONFIG_FILE = 'config.ini'
@@ -24,6 +27,11 @@ DEFAULT_LOG_FORMAT = (
     '%(filename)s:%(lineno)d\n%(asctime)-20s| %(levelname)-8s| %(name)-14| %(funcName)-27s| %(message)s')
 DEFAULT_LOG_DATE_FORMAT = '%Y.%m.%d %H:%M:%S'
 DEFAULT_LOG_LEVEL = 'INFO'
+WORKER_SCRIPT = 'merge_worker'
+# Пауза перед перезапуском упавшего воркера, сек
+WORKER_RESTART_DELAY = 5
+# Отпечаток зависимостей в виртуальном окружении: pip запускается, только если он изменился
+REQUIREMENTS_STAMP_FILE = '.requirements.stamp'
 
 # Сообщения логирования
 LOG_MESSAGES = {
@@ -31,6 +39,8 @@ LOG_MESSAGES = {
         'venv_create': 'Creating virtual environment in "{path}"...',
         'venv_exists': 'Virtual environment already exists in "{path}".',
         'requirements': 'Installing dependencies...',
+        'requirements_skip': 'Dependencies are up to date, skipping pip.',
+        'pip_upgrade': 'Upgrading pip...',
         'pip_output': 'Pip output: {output}',
         'run_script': 'Running script "{file}"...',
         'task_cancelled': 'Task was cancelled.',
@@ -41,12 +51,18 @@ LOG_MESSAGES = {
         'git_pull_not_found': 'Git not found in PATH.',
         'git_pull_failed': 'Git pull failed: "{error}".',
         'setup_complete': 'Setup completed successfully.',
-        'setup_failed': 'Setup failed: {error}.'
+        'setup_failed': 'Setup failed: {error}.',
+        'worker_start': 'Merge worker started (pid {pid}).',
+        'worker_crashed': 'Merge worker exited with code {code}, restarting in {delay} s...',
+        'worker_memory': 'Merge worker uses {memory} MB (limit {limit} MB), restarting...',
+        'worker_stopped': 'Merge worker stopped.'
     },
     'ru': {
         'venv_create': 'Создаем виртуальное окружение в "{path}"...',
         'venv_exists': 'Виртуальное окружение уже существует в "{path}".',
         'requirements': 'Устанавливаем зависимости...',
+        'requirements_skip': 'Зависимости не изменились, pip пропущен.',
+        'pip_upgrade': 'Обновляем pip...',
         'pip_output': 'Результат выполнения pip: {output}',
         'run_script': 'Запускаем скрипт "{file}"...',
         'task_cancelled': 'Задание отменено.',
@@ -57,7 +73,11 @@ LOG_MESSAGES = {
         'git_pull_not_found': 'Git не найден в PATH.',
         'git_pull_failed': 'Ошибка git pull: "{error}".',
         'setup_complete': 'Настройка завершена успешно.',
-        'setup_failed': 'Ошибка настройки: {error}.'
+        'setup_failed': 'Ошибка настройки: {error}.',
+        'worker_start': 'Воркер объединения запущен (pid {pid}).',
+        'worker_crashed': 'Воркер объединения завершился с кодом {code}, перезапуск через {delay} с...',
+        'worker_memory': 'Воркер объединения занимает {memory} МБ (лимит {limit} МБ), перезапускаем...',
+        'worker_stopped': 'Воркер объединения остановлен.'
     }
 }
 
@@ -73,6 +93,7 @@ class VirtualEnvironmentManager:
         self.venv_dir = Path('.venv')  # значение по умолчанию
         self.git_pull_enabled = True  # значение по умолчанию
         self.log_output_enabled = True  # значение по умолчанию
+        self.pip_upgrade = False  # значение по умолчанию
         
         # Определяем пути к исполняемым файлам
         self._bin_dir = 'Scripts' if platform == 'win32' else 'bin'
@@ -83,20 +104,21 @@ class VirtualEnvironmentManager:
     def _load_config(self) -> None:
         """Загружает конфигурацию (вызывается после настройки логирования)"""
         if self._config is None:
-            self._config = {**Config().get_config(ConfigNames.RUN), **Config().get_config(ConfigNames.MSG)}
+            self._config = Config().run
             
             # Определяем настройки
             is_maintainer = getlogin().lower() == __maintainer__.lower()
-            individual = not is_maintainer and self._config.get('run_venv_individual', True)
-            git_pull_enabled = not is_maintainer and self._config.get('run_git_pull_enabled', True)
+            individual = not is_maintainer and self._config.venv_individual
+            git_pull_enabled = not is_maintainer and self._config.git_pull_enabled
             
-            self._log_language = self._config.get('msg_language', 'en')
-            self._main_script = self._config.get('run_main_script', 'merge_csv_oop')
-            self._requirements_file = self._config.get('run_requirements_file', 'requirements.txt')
-            self.log_output_enabled = self._config.get('run_log_output_enabled', True)
+            self._log_language = Config().msg.language
+            self._main_script = self._config.main_script
+            self._requirements_file = self._config.requirements_file
+            self.log_output_enabled = self._config.log_output_enabled
+            self.pip_upgrade = self._config.pip_upgrade
             
             # Настройка пути к виртуальному окружению
-            venv_path = Path(self._config.get('run_venv_path', '.venv'))
+            venv_path = Path(self._config.venv_path)
             self.venv_dir = venv_path.with_name(f'{venv_path.name}_{getlogin()}') if individual else venv_path
             self.git_pull_enabled = git_pull_enabled
             
@@ -117,13 +139,40 @@ class VirtualEnvironmentManager:
         else:
             self._log('venv_exists', path=str(self.venv_dir))
     
+    @staticmethod
+    def _git_head() -> str:
+        """Текущий коммит репозитория или пустая строка, если git недоступен"""
+        try:
+            return sub_run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        except (FileNotFoundError, CalledProcessError):
+            return ''
+    
+    def _requirements_stamp(self) -> str:
+        """Отпечаток зависимостей: хеш requirements.txt, версии Python окружения и коммита репозитория"""
+        digest = sha256(Path(self._requirements_file).read_bytes())
+        pyvenv_cfg = self.venv_dir / 'pyvenv.cfg'
+        digest.update((pyvenv_cfg.read_text(encoding='utf-8') if pyvenv_cfg.exists() else sys_version).encode())
+        digest.update(self._git_head().encode())
+        return digest.hexdigest()
+    
     def install_dependencies(self) -> None:
-        """Устанавливает зависимости"""
+        """Устанавливает зависимости, если они изменились с прошлой установки"""
         if not self.pip_executable.exists():
             raise FileNotFoundError(f"Pip executable not found: {self.pip_executable}")
-            
-        self._log('requirements')
+        
+        stamp_path = self.venv_dir / REQUIREMENTS_STAMP_FILE
+        stamp = self._requirements_stamp()
+        if stamp_path.exists() and stamp_path.read_text(encoding='utf-8').strip() == stamp:
+            self._log('requirements_skip')
+            return
+        
         try:
+            if self.pip_upgrade:
+                self._log('pip_upgrade')
+                sub_run([str(self.python_executable), '-m', 'pip', 'install', '--upgrade', 'pip'],
+                        capture_output=True, check=True)
+            
+            self._log('requirements')
             result = sub_run(
                 [str(self.pip_executable), 'install', '-r', self._requirements_file],
                 capture_output=True, text=True, check=True
@@ -132,6 +181,9 @@ class VirtualEnvironmentManager:
                 self._log('pip_output', output=f'\n{result.stdout.strip()}')
         except CalledProcessError as e:
             raise RuntimeError(f"Failed to install dependencies: {e.stderr}")
+        
+        # Отпечаток записывается только после успешной установки
+        stamp_path.write_text(stamp, encoding='utf-8')
     
     def run_main_script(self) -> None:
         """Запускает основной скрипт"""
@@ -140,10 +192,6 @@ class VirtualEnvironmentManager:
             
         self._log('run_script', file=self._main_script)
         try:
-            # Обновляем pip
-            sub_run([str(self.python_executable), '-m', 'pip', 'install', '--upgrade', 'pip'],
-                   capture_output=True, check=True)
-            
             # Запускаем основной скрипт
             check_call([str(self.python_executable), f'{self._main_script}.py'])
         except KeyboardInterrupt:
@@ -151,6 +199,54 @@ class VirtualEnvironmentManager:
         except CalledProcessError as e:
             raise RuntimeError(f"Failed to run script: {e}")
 
+    def _stop_worker(self, process: Popen) -> None:
+        """Просит воркер завершиться после текущего объединения, при отказе завершает процесс"""
+        try:
+            send_worker_command(COMMAND_STOP, self._config.worker_port)
+            process.wait(timeout=self._config.worker_check_interval * 10)
+        except (OSError, TimeoutExpired):
+            process.kill()
+            process.wait()
+
+    def run_worker(self) -> None:
+        """Запускает постоянный воркер и перезапускает его при падении или превышении лимита памяти"""
+        if not self.python_executable.exists():
+            raise FileNotFoundError(f'Python executable not found: {self.python_executable}')
+        
+        while True:
+            process = Popen([str(self.python_executable), f'{WORKER_SCRIPT}.py'])
+            self._log('worker_start', pid=process.pid)
+            restart = False
+            try:
+                while process.poll() is None:
+                    try:
+                        process.wait(timeout=self._config.worker_check_interval)
+                        break
+                    except TimeoutExpired:
+                        pass
+                    try:
+                        status = send_worker_command(COMMAND_STATUS, self._config.worker_port)
+                    except OSError:
+                        # Воркер еще запускается или занят объединением
+                        continue
+                    if status.get('memory_mb', 0) > self._config.worker_max_memory_mb:
+                        self._log('worker_memory', memory=status['memory_mb'], limit=self._config.worker_max_memory_mb)
+                        self._stop_worker(process)
+                        restart = True
+            except KeyboardInterrupt:
+                self._log('task_cancelled')
+                self._stop_worker(process)
+                return
+            
+            if restart:
+                continue
+            if process.returncode == 0:
+                # Воркер остановлен командой stop
+                self._log('worker_stopped')
+                return
+            self._log('worker_crashed', code=process.returncode, delay=WORKER_RESTART_DELAY)
+            sleep(WORKER_RESTART_DELAY)
+
     def git_pull(self) -> None:
         """Выполняет git pull"""
         if not self.git_pull_enabled:
@@ -188,7 +284,10 @@ class VirtualEnvironmentManager:
             # Установка зависимостей и запуск
             self.install_dependencies()
             self._log('setup_complete')
-            self.run_main_script()
+            if self._config.mode == 'worker':
+                self.run_worker()
+            else:
+                self.run_main_script()
             
             
         except Exception as e:
@@ -200,23 +299,23 @@ def setup_logging():
     """Настраивает логирование на основе config.ini"""
     try:
         # Используем Config() для основных секций
-        config_data = Config().get_config(ConfigNames.LOG)
+        config_data = Config().log
         
-        # Читаем LOGFORMAT напрямую из config.ini (Config().get_config() не возвращает эту секцию)
+        # Читаем LOGFORMAT напрямую из config.ini (Config() не возвращает эту секцию)
         config_parser = ConfigParser(interpolation=None)
         ini_path = Path(Path(__file__).parent, CONFIG_FILE)
         config_parser.read(ini_path, encoding='utf-8')
         logformat_data = dict(config_parser['LOGFORMAT']) if 'LOGFORMAT' in config_parser else {}
         
         # Уровни логирования
-        level_root = config_data.get('log_level_root', DEFAULT_LOG_LEVEL).upper()
-        level_console = config_data.get('log_level_console', DEFAULT_LOG_LEVEL).upper()
-        level_file = config_data.get('log_level_file', 'WARNING').upper()
+        level_root = config_data.level_root
+        level_console = config_data.level_console
+        level_file = config_data.level_file
         
         # Форматы
-        date_format = config_data.get('log_date_format', DEFAULT_LOG_DATE_FORMAT)
-        format_console = config_data.get('log_format_console', DEFAULT_LOG_FORMAT)
-        format_file = config_data.get('log_format_file', DEFAULT_LOG_FORMAT)
+        date_format = config_data.date_format or DEFAULT_LOG_DATE_FORMAT
+        format_console = config_data.format_console or DEFAULT_LOG_FORMAT
+        format_file = config_data.format_file or DEFAULT_LOG_FORMAT
         
         # Удаляем colorlog (еще не установлен)
         format_console = format_console.replace('%(log_color)s', '')
@@ -235,8 +334,8 @@ def setup_logging():
         from datetime import datetime
         current_date = datetime.now()
         
-        log_dir = current_date.strftime(config_data.get('log_dir', 'logs'))
-        log_file = current_date.strftime(config_data.get('log_file', 'app.log'))
+        log_dir = current_date.strftime(config_data.dir)
+        log_file = current_date.strftime(config_data.file)
         
         log_path = Path(log_dir)
         log_path.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,98 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+from contextlib import closing
+from json import dumps
+from pathlib import Path
+from sqlite3 import connect, Connection
+from typing import Any, Dict, List
+
+# Имя, под которым в истории хранится длительность всего запуска
+RUN_STAGE = 'run'
+
+
+class RunHistory:
+    """История запусков в локальной базе SQLite и поиск замедлений относительно медианы прошлых запусков"""
+
+    def __init__(self, path: str, window: int = 20):
+        self.path = Path(path)
+        self.window = window
+
+    def _connect(self) -> Connection:
+        """Открывает базу, создавая файл и таблицы при необходимости"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = connect(self.path)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS runs ('
+            'run_id TEXT PRIMARY KEY, started_at TEXT NOT NULL, duration REAL NOT NULL, counters TEXT NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS stages ('
+            'run_id TEXT NOT NULL REFERENCES runs(run_id), stage TEXT NOT NULL, duration REAL NOT NULL, '
+            'PRIMARY KEY (run_id, stage))'
+        )
+        return conn
+
+    def record(self, summary: Dict[str, Any]) -> None:
+        """Сохраняет итоговые метрики запуска (см. RunMetrics.summary)"""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO runs (run_id, started_at, duration, counters) VALUES (?, ?, ?, ?)',
+                (summary['run_id'], summary['started_at'], summary['duration'],
+                 dumps(summary['counters'], ensure_ascii=False))
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO stages (run_id, stage, duration) VALUES (?, ?, ?)',
+                [(summary['run_id'], stage, duration) for stage, duration in summary['stages'].items()]
+            )
+
+    def baseline(self, exclude_run_id: str = '') -> Dict[str, List[float]]:
+        """Длительности запуска и этапов за последние window запусков, от новых к старым"""
+        if not self.path.exists():
+            return {}
+        with closing(self._connect()) as conn:
+            runs = conn.execute(
+                'SELECT run_id, duration FROM runs WHERE run_id != ? ORDER BY started_at DESC, rowid DESC LIMIT ?',
+                (exclude_run_id, self.window)
+            ).fetchall()
+            if not runs:
+                return {}
+            durations: Dict[str, List[float]] = {RUN_STAGE: [duration for _, duration in runs]}
+            placeholders = ', '.join('?' * len(runs))
+            for stage, duration in conn.execute(
+                f'SELECT stage, duration FROM stages WHERE run_id IN ({placeholders})',
+                [run_id for run_id, _ in runs]
+            ):
+                durations.setdefault(stage, []).append(duration)
+        return durations
+
+    def find_slowdowns(
+            self, summary: Dict[str, Any], factor: float = 2.0, min_runs: int = 5, min_seconds: float = 1.0
+    ) -> List[str]:
+        """
+        Сравнивает запуск с медианой прошлых запусков.
+
+        Замедлением считается длительность, превышающая медиану в factor раз. Этапы с историей короче
+        min_runs запусков и длительностью меньше min_seconds не проверяются, чтобы не реагировать на шум.
+
+        :return: Строки с описанием замедлений для сообщения в Telegram.
+        """
+        from statistics import median
+
+        current = {RUN_STAGE: summary['duration'], **summary['stages']}
+        slowdowns = []
+        for stage, durations in self.baseline(summary['run_id']).items():
+            duration = current.get(stage)
+            if duration is None or len(durations) < min_runs or duration < min_seconds:
+                continue
+            typical = median(durations)
+            if duration > typical * factor:
+                slowdowns.append(f'{stage}: {duration:.2f} s (median {typical:.2f} s)')
+        return slowdowns
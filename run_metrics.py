@@ -0,0 +1,81 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Dict, Iterator, Optional
+from uuid import uuid4
+
+
+# Контекст текущего запуска; подставляется в каждую запись лога (см. logger.RunContextFilter)
+run_id_var: ContextVar[str] = ContextVar('run_id', default='')
+stage_var: ContextVar[str] = ContextVar('stage', default='')
+source_file_var: ContextVar[str] = ContextVar('source_file', default='')
+
+
+class RunMetrics:
+    """Метрики одного запуска: длительности этапов и счетчики"""
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id: str = run_id or uuid4().hex[:12]
+        self.started_at: datetime = datetime.now()
+        self._started: float = perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counters: Dict[str, float] = {}
+        run_id_var.set(self.run_id)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Выполняет блок как этап запуска: помечает записи лога и замеряет длительность"""
+        token = stage_var.set(name)
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + perf_counter() - started
+            stage_var.reset(token)
+
+    @staticmethod
+    @contextmanager
+    def source_file(file_name: str) -> Iterator[None]:
+        """Помечает записи лога внутри блока именем исходного файла"""
+        token = source_file_var.set(file_name)
+        try:
+            yield
+        finally:
+            source_file_var.reset(token)
+
+    def add(self, name: str, value: float = 1) -> None:
+        """Увеличивает счетчик"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, other: 'RunMetrics', prefix: str) -> None:
+        """Добавляет метрики задания: этапы - с префиксом имени задания, счетчики - к общим"""
+        for name, seconds in other.stages.items():
+            self.stages[f'{prefix}.{name}'] = self.stages.get(f'{prefix}.{name}', 0.0) + seconds
+        for name, value in other.counters.items():
+            self.add(name, value)
+
+    @property
+    def duration(self) -> float:
+        """Длительность запуска на текущий момент, сек"""
+        return perf_counter() - self._started
+
+    def summary(self) -> Dict[str, Any]:
+        """Итоговые метрики запуска"""
+        return {
+            'run_id': self.run_id,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'duration': round(self.duration, 4),
+            'stages': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            'counters': dict(self.counters),
+        }
@@ -8,18 +8,34 @@
 # __status__ = 'Production'  # 'Production / Development'
 # __version__ = '2.0.0.1'
 
-from typing import List, Optional, Dict, Literal, Tuple
-from aiohttp import ClientSession as aio_ClientSession, ClientTimeout as aio_ClientTimeout
-from asyncio import sleep as aio_sleep, Lock as aio_Lock, TimeoutError as aio_TimeoutError
+from typing import List, Optional, Dict, Literal, Tuple, Callable, Awaitable, Any, TYPE_CHECKING
+from asyncio import (
+    sleep as aio_sleep, TimeoutError as aio_TimeoutError, Queue as aio_Queue, QueueFull as aio_QueueFull,
+    Event as aio_Event, Task as aio_Task, CancelledError as aio_CancelledError, AbstractEventLoop,
+    create_task as aio_create_task, get_running_loop as aio_get_running_loop, wait as aio_wait, FIRST_COMPLETED,
+    to_thread as aio_to_thread
+)
+from dataclasses import dataclass
 from enum import Enum
 import re
 
-from config import Config, ConfigNames
+from config import Config, TelegramConfig
 from logger import logging
+from flow_control import TelegramRateLimiter, CircuitBreaker, CircuitState
+from outbox import TelegramOutbox
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession
 
 
 logging = logging.getLogger(__name__)
 
+# Маркер в очереди отправки: переотправить сообщения из outbox
+_REPLAY_OUTBOX = object()
+
+# Ограничение Telegram на длину подписи к документу
+TELEGRAM_MAX_CAPTION_LENGTH = 1024
+
 
 class MessageState(Enum):
     SEND = 'send'
@@ -32,30 +48,59 @@ class ParseMode(Enum):
     NONE = None
 
 
+# Экранирование спецсимволов: цепочка str.replace быстрее str.translate с многосимвольными заменами
+MARKDOWN_V2_ESCAPES = tuple((char, f'\\{char}') for char in '_*[]()~`>#+-=|{}.!')
+HTML_ESCAPES = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&#39;'))
+
+# Токенизаторы разметки MarkdownV2 с приоритетом прежнего форматирования: сначала ```блоки кода```, затем `код`,
+# затем *жирный текст*. Жирный текст может содержать `код` целиком, но не пересекает его границу:
+# обратная кавычка внутри него - либо целый `код` без *, либо одиночная, не открывающая `код`.
+# split() обоих шаблонов возвращает [текст, токен, текст, ...]
+CODE_BLOCK_PATTERN = re.compile(r'(```.*?```)', flags=re.DOTALL)
+INLINE_MARKUP_PATTERN = re.compile(r'(`[^`]+`|\*(?=[^*])[^*`]*(?:(?:`[^`*]+`|`(?![^`]+`))[^*`]*)*\*)')
+
+# Разметка HTML заменяется по очереди, как и раньше: блоки кода, код, жирный текст. Символы * и ` внутри кода
+# временно заменяются ссылками &#42; и &#96;, поэтому следующие замены не заходят внутрь кода, а `код` не
+# пересекает теги (после экранирования знак < есть только в них); жирный текст содержит код только целиком
+HTML_CODE_BLOCK_PATTERN = re.compile(r'```(.*?)```', flags=re.DOTALL)
+HTML_INLINE_CODE_PATTERN = re.compile(r'`([^`<]+)`')
+HTML_BOLD_PATTERN = re.compile(r'\*([^*]+)\*')
+HTML_PROTECTED = (('*', '&#42;'), ('`', '&#96;'))
+
+# Разделитель для экранирования всех фрагментов обычного текста одним вызовом
+SEGMENT_SEPARATOR = '\x00'
+
+
+def _replace_all(text: str, escapes: Tuple[Tuple[str, str], ...]) -> str:
+    """Последовательно применяет замены к тексту"""
+    for char, escape in escapes:
+        text = text.replace(char, escape)
+    return text
+
+
+def _split_markup(text: str) -> List[str]:
+    """Делит текст на [текст, токен, текст, ...]; токены - блоки кода, код и жирный текст с разметкой"""
+    parts: List[str] = []
+    segments = CODE_BLOCK_PATTERN.split(text)
+    for index in range(0, len(segments) - 1, 2):
+        parts.extend(INLINE_MARKUP_PATTERN.split(segments[index]))
+        parts.append(segments[index + 1])
+    parts.extend(INLINE_MARKUP_PATTERN.split(segments[-1]))
+    return parts
+
+
 class MessageFormatter:
     """Класс для форматирования сообщений в разных режимах"""
     
     @staticmethod
     def escape_markdown_v2(text: str) -> str:
         """Экранирование специальных символов для MarkdownV2"""
-        special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-        for char in special_chars:
-            text = text.replace(char, f'\\{char}')
-        return text
+        return _replace_all(text, MARKDOWN_V2_ESCAPES)
     
     @staticmethod
     def escape_html(text: str) -> str:
         """Экранирование специальных символов для HTML"""
-        html_escapes = {
-            '&': '&amp;',
-            '<': '&lt;',
-            '>': '&gt;',
-            '"': '&quot;',
-            "'": '&#39;'
-        }
-        for char, escape in html_escapes.items():
-            text = text.replace(char, escape)
-        return text
+        return _replace_all(text, HTML_ESCAPES)
     
     @staticmethod
     def format_message(text: str, parse_mode: ParseMode) -> str:
@@ -84,57 +129,59 @@ class MessageFormatter:
     @staticmethod
     def _format_markdown_v2(text: str) -> str:
         """Форматирование для MarkdownV2"""
-        # Сначала защищаем Markdown-синтаксис, заменяя его на временные маркеры
-        placeholders = {}
-        
-        # Защищаем ```блоки кода```
-        code_blocks = re.findall(r'```(.*?)```', text, flags=re.DOTALL)
-        for i, block in enumerate(code_blocks):
-            placeholder = f'CODEBLOCK{i}'
-            placeholders[placeholder] = f'```{block}```'
-            text = text.replace(f'```{block}```', placeholder)
-        
-        # Защищаем `код`
-        inline_codes = re.findall(r'`([^`]+)`', text)
-        for i, code in enumerate(inline_codes):
-            placeholder = f'INLINECODE{i}'
-            placeholders[placeholder] = f'`{code}`'
-            text = text.replace(f'`{code}`', placeholder)
-        
-        # Защищаем *жирный текст*
-        bold_texts = re.findall(r'\*([^*]+)\*', text)
-        for i, bold in enumerate(bold_texts):
-            placeholder = f'BOLD{i}'
-            placeholders[placeholder] = f'*{bold}*'
-            text = text.replace(f'*{bold}*', placeholder)
-        
-        # Экранируем специальные символы в обычном тексте
-        special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-        for char in special_chars:
-            text = text.replace(char, f'\\{char}')
-        
-        # Восстанавливаем Markdown-синтаксис
-        for placeholder, original in placeholders.items():
-            text = text.replace(placeholder, original)
-        
-        return text
+        parts = _split_markup(text)
+
+        # Экранируем весь обычный текст одним проходом, разметку оставляем как есть
+        if SEGMENT_SEPARATOR in text:
+            parts[::2] = [MessageFormatter.escape_markdown_v2(segment) for segment in parts[::2]]
+        else:
+            parts[::2] = MessageFormatter.escape_markdown_v2(
+                SEGMENT_SEPARATOR.join(parts[::2])).split(SEGMENT_SEPARATOR)
+        return ''.join(parts)
     
     @staticmethod
     def _format_html(text: str) -> str:
         """Форматирование для HTML"""
-        # Экранируем HTML символы
+        # Экранирование не затрагивает символы разметки, поэтому экранируем текст целиком
         text = MessageFormatter.escape_html(text)
-        
-        # Заменяем ``` на <pre><code>
-        text = re.sub(r'```(.*?)```', r'<pre><code>\1</code></pre>', text, flags=re.DOTALL)
-        # Заменяем ` на <code>
-        text = re.sub(r'`([^`]+)`', r'<code>\1</code>', text)
-        # Заменяем * на <b>
-        text = re.sub(r'\*([^*]+)\*', r'<b>\1</b>', text)
-        
+        if '```' in text:
+            text = HTML_CODE_BLOCK_PATTERN.sub(
+                lambda match: '<pre><code>' + _replace_all(match.group(1), HTML_PROTECTED) + '</code></pre>', text)
+        if '`' in text:
+            text = HTML_INLINE_CODE_PATTERN.sub(
+                lambda match: '<code>' + match.group(1).replace('*', '&#42;') + '</code>', text)
+        if '*' in text:
+            text = HTML_BOLD_PATTERN.sub(r'<b>\1</b>', text)
+        # В экранированном тексте & записан как &amp;, поэтому &#42; и &#96; - только временные замены выше
+        for char, reference in HTML_PROTECTED:
+            text = text.replace(reference, char)
         return text
 
 
+@dataclass
+class TelegramDocument:
+    """Документ для отправки через sendDocument"""
+    file_name: str
+    content: bytes
+    caption: Optional[str] = None
+
+
+class SendResult(Enum):
+    """Итог запроса к API"""
+    SENT = 'sent'
+    # Telegram отклонил запрос (4xx, кроме 429): повтор не поможет
+    REJECTED = 'rejected'
+    # Временный сбой (таймаут, 5xx, долгий 429, открытый выключатель): запрос можно повторить позже
+    FAILED = 'failed'
+
+
+class QueueOverflowPolicy(Enum):
+    """Поведение очереди отправки при переполнении"""
+    BLOCK = 'block'
+    DROP_NEW = 'drop_new'
+    DROP_OLDEST = 'drop_oldest'
+
+
 class TelegramMessenger:
     """Оптимизированный класс для отправки сообщений в Telegram"""
     
@@ -150,29 +197,62 @@ class TelegramMessenger:
             telegram_token: Optional[str] = None,
             telegram_chat_id: Optional[str] = None,
             max_message_length: Optional[int] = None,
-            parse_mode: Optional[Literal['Markdown', 'MarkdownV2', 'HTML']] = None
+            parse_mode: Optional[Literal['Markdown', 'MarkdownV2', 'HTML']] = None,
+            api_url: Optional[str] = None,
+            outbox_path: Optional[str] = None,
+            queue_overflow: Optional[Literal['block', 'drop_new', 'drop_oldest']] = None
     ):
         # Инициализация, если еще не инициализирован
         if not hasattr(self, '_initialized'):
             self._initialized = True
     
-            config: Dict[str, int | str] = Config().get_config(ConfigNames.TELEGRAM)
-            telegram_token: str = config['telegram_token'] if telegram_token is None else telegram_token
-            telegram_chat_id: str = config['telegram_chat_id'] if telegram_chat_id is None else telegram_chat_id
+            config: TelegramConfig = Config().telegram
+            telegram_token: str = config.token if telegram_token is None else telegram_token
+            telegram_chat_id: str = config.chat_id if telegram_chat_id is None else telegram_chat_id
             telegram_parse_mode: Optional[Literal['Markdown', 'MarkdownV2', 'HTML']] = (
-                config['telegram_parse_mode'] if parse_mode is None else parse_mode)
-            telegram_line_height: int = config['telegram_line_height']
-            max_message_length: int = config['telegram_max_msg_length'] if max_message_length is None else (
+                config.parse_mode if parse_mode is None else parse_mode)
+            telegram_line_height: int = config.line_height
+            max_message_length: int = config.max_msg_length if max_message_length is None else (
                 max_message_length)
+            api_url: str = config.api_url if api_url is None else api_url.rstrip('/')
+            outbox_path: str = config.outbox_path if outbox_path is None else outbox_path
+            queue_overflow: str = config.queue_overflow if queue_overflow is None else queue_overflow
         
             self._telegram_token: Optional[str] = telegram_token
+            self._api_url: str = api_url
             self._chat_id, self._message_thread_id = self._parse_chat_id(telegram_chat_id)
             self._telegram_parse_mode: ParseMode = ParseMode(telegram_parse_mode) if telegram_parse_mode else ParseMode.NONE
             self.max_message_length: int = max_message_length
-            self._messages: List[str] = []
-            self.buffer: str = ''
-            self.lock = aio_Lock()
             self.selector: str = f'\n\n{'─' * telegram_line_height}\n\n'
+
+            # Очередь отправки: продюсеры только кладут сообщения, сетью занимается фоновый воркер
+            self._queue_size: int = config.queue_size
+            self._overflow_policy: QueueOverflowPolicy = QueueOverflowPolicy(queue_overflow)
+            self._batch_delay: float = config.batch_delay
+            self._queue: Optional[aio_Queue] = None
+            self._flush_event: Optional[aio_Event] = None
+            self._worker: Optional[aio_Task] = None
+            self._loop: Optional[AbstractEventLoop] = None
+            # Последний элемент очереди со списком сообщений, еще не взятый воркером: новые сообщения
+            # дописываются в него, пока он не достигнет длины пакета, поэтому очередь считает пакеты
+            self._tail: Optional[List[str]] = None
+            self._tail_length: int = 0
+            self.dropped_messages: int = 0
+
+            # Проактивное ограничение частоты и защита от долгих сбоев Telegram
+            self._timeout: float = config.timeout
+            # HTTP-сессия переиспользуется между запросами (соединения и TLS остаются открытыми)
+            self._session: Optional['ClientSession'] = None
+            self._session_loop: Optional[AbstractEventLoop] = None
+            self._max_retry_after: float = config.max_retry_after
+            self.rate_limiter = TelegramRateLimiter(
+                config.rate_global, config.rate_per_chat, config.rate_per_group)
+            self.circuit_breaker = CircuitBreaker(
+                config.circuit_failures, config.circuit_cooldown)
+
+            # Неотправленные сообщения сохраняются на диск и переотправляются по порядку
+            self._outbox: Optional[TelegramOutbox] = TelegramOutbox(outbox_path) if outbox_path else None
+            self._outbox_pending: int = self._outbox.count() if self._outbox else 0
     
     async def __call__(self, message: Optional[str] = None, action: Optional[MessageState] = None):
         """Обработка вызова с обоими или одним аргументом"""
@@ -197,71 +277,353 @@ class TelegramMessenger:
         message_thread_id = int(parts[1]) if len(parts) > 1 else None
         return chat_id, message_thread_id
 
+    def _ensure_worker(self) -> None:
+        """Создает очередь и запускает фоновый воркер в текущем цикле событий"""
+        loop = aio_get_running_loop()
+        if self._loop is not loop:
+            # Очередь и события привязаны к циклу событий, в котором были созданы
+            self._loop = loop
+            self._queue = aio_Queue(maxsize=self._queue_size)
+            self._flush_event = aio_Event()
+            self._worker = None
+            self._tail = None
+            if self._outbox_pending:
+                self._queue.put_nowait(_REPLAY_OUTBOX)
+        if self._worker is None or self._worker.done():
+            self._worker = aio_create_task(self._sender_worker())
+
     async def add_message(self, new_message: str) -> None:
-        """Добавляет сообщение в буфер с форматированием"""
-        async with self.lock:
-            # Форматируем сообщение в соответствии с выбранным режимом
-            formatted_message = MessageFormatter.format_message(new_message, self._telegram_parse_mode)
-            
-            logging.debug(f'Adding new message of length: "{len(formatted_message)}".')
-            self._messages.append(formatted_message)
-
-            # Объединяем все сообщения в одну строку
-            combined_message = self.selector.join(self._messages)
-
-            if len(combined_message) <= self.max_message_length:
-                # Всё помещается — ничего не отправляем
-                self.buffer = combined_message
-                logging.debug('Messages combined within limit, buffer updated.')
+        """Кладет сообщение в очередь отправки, не дожидаясь сети"""
+        await self._enqueue(new_message)
+
+    async def add_document(self, file_name: str, content: bytes, caption: Optional[str] = None) -> None:
+        """Кладет документ с необязательной подписью в очередь отправки"""
+        await self._enqueue(TelegramDocument(file_name, content, caption))
+
+    async def _enqueue(self, item: str | TelegramDocument) -> None:
+        """
+        Кладет элемент в очередь с учетом политики переполнения.
+        
+        Сообщения дописываются в последний элемент очереди, пока он помещается в одно сообщение Telegram.
+        При переполнении вытесненный элемент сохраняется в outbox, а без outbox - теряется.
+        """
+        self._ensure_worker()
+
+        if isinstance(item, str):
+            new_length = self._tail_length + len(self.selector) + len(item)
+            if self._tail is not None and new_length <= self.max_message_length:
+                self._tail.append(item)
+                self._tail_length = new_length
+                return
+            messages = [item]
+        else:
+            # Сообщения после документа не дописываются в элементы перед ним
+            messages, self._tail = None, None
+        queue_item = item if messages is None else messages
+        overflow_item = None
+
+        try:
+            self._queue.put_nowait(queue_item)
+        except aio_QueueFull:
+            if self._overflow_policy == QueueOverflowPolicy.BLOCK:
+                # Пока продюсер ждал места, за ним могли встать другие элементы: в этот не дописываем
+                await self._queue.put(queue_item)
+                return
+            if self._overflow_policy == QueueOverflowPolicy.DROP_OLDEST:
+                overflow_item = self._queue.get_nowait()
+                self._queue.task_done()
+                self._queue.put_nowait(queue_item)
             else:
-                # Не помещается — отправляем текущие сообщения
-                await self._send_buffer()
-                # После отправки очищаем список сообщений
-                self._messages = []
+                await self._spill(queue_item, 'new')
+                return
+        if messages is not None:
+            self._tail, self._tail_length = messages, len(item)
+        # Маркер outbox можно вытеснить без потерь: outbox переотправляется перед каждой отправкой
+        if overflow_item is not None and overflow_item is not _REPLAY_OUTBOX:
+            await self._spill(overflow_item, 'oldest')
+
+    async def _spill(self, item: List[str] | TelegramDocument, which: str) -> None:
+        """Сохраняет элемент, не поместившийся в очередь, в outbox; без outbox элемент теряется"""
+        count = len(item) if isinstance(item, list) else 1
+        if self._outbox is None:
+            self.dropped_messages += count
+            logging.warning(f'Message queue is full ({self._queue_size}), the {which} item was dropped.')
+            return
+        parse_mode = self._telegram_parse_mode.value
+        if isinstance(item, list):
+            text = self.selector.join(MessageFormatter.format_message(message, self._telegram_parse_mode)
+                                      for message in item)
+            await aio_to_thread(self._outbox.append, 'sendMessage', {'text': text, 'parse_mode': parse_mode})
+        else:
+            caption = MessageFormatter.format_message(item.caption, self._telegram_parse_mode) if item.caption else None
+            if caption and len(caption) > TELEGRAM_MAX_CAPTION_LENGTH:
+                await aio_to_thread(self._outbox.append, 'sendMessage', {'text': caption, 'parse_mode': parse_mode})
+                self._outbox_pending += 1
+                caption = None
+            payload = {'file_name': item.file_name, 'caption': caption, 'parse_mode': parse_mode}
+            await aio_to_thread(self._outbox.append, 'sendDocument', payload, item.content)
+        self._outbox_pending += 1
+        logging.warning(
+            f'Message queue is full ({self._queue_size}), the {which} item ({count} message(s)) '
+            f'was saved to outbox "{self._outbox.path}".')
+
+    def _take(self, item: Any) -> Any:
+        """Отмечает элемент взятым воркером: в него больше не дописываются сообщения"""
+        if item is self._tail:
+            self._tail = None
+        return item
 
     async def flush(self) -> None:
-        """Отправляет все накопленные сообщения"""
-        logging.debug('Flushing buffer.')
-        async with self.lock:
-            # Отправляем все накопленные сообщения
-            if self._messages:
-                combined_message = self.selector.join(self._messages)
-                self.buffer = combined_message
-                await self._send_buffer()
-                self._messages.clear()
+        """Дожидается отправки всех сообщений из очереди"""
+        if self._queue is None or self._loop is not aio_get_running_loop():
+            return
+        logging.debug('Flushing message queue.')
+        self._ensure_worker()
+        self._flush_event.set()
+        await self._queue.join()
+
+    async def close(self) -> None:
+        """Отправляет оставшиеся сообщения и останавливает воркер"""
+        await self.flush()
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except aio_CancelledError:
+                pass
+        self._worker = None
+        if self._session is not None and self._session_loop is aio_get_running_loop():
+            await self._session.close()
+        self._session = None
+        if self.dropped_messages:
+            logging.warning(f'Messages dropped due to queue overflow: {self.dropped_messages}.')
+        if self._outbox_pending:
+            logging.warning(f'Messages left in outbox for the next run: {self._outbox_pending}.')
+
+    async def _next_message(self, timeout: float) -> Optional[Any]:
+        """Ждет следующий элемент очереди не дольше timeout или до запроса flush"""
+        if not self._queue.empty():
+            return self._queue.get_nowait()
+        if self._flush_event.is_set() or timeout <= 0:
+            return None
+
+        get_task = aio_create_task(self._queue.get())
+        flush_task = aio_create_task(self._flush_event.wait())
+        done, pending = await aio_wait({get_task, flush_task}, timeout=timeout, return_when=FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        return get_task.result() if get_task in done else None
+
+    async def _sender_worker(self) -> None:
+        """Фоновый воркер: собирает сообщения из очереди в пакеты и отправляет их"""
+        loop = aio_get_running_loop()
+        while True:
+            item = self._take(await self._queue.get())
+            batch: List[str] = []
+            batch_length = 0
+            # Элементы очереди, все сообщения которых уже в пакете
+            completed = 0
+            deadline = loop.time() + self._batch_delay
+
+            while item is not None:
+                if item is _REPLAY_OUTBOX:
+                    try:
+                        await self._replay_outbox()
+                    finally:
+                        self._queue.task_done()
+                elif isinstance(item, TelegramDocument):
+                    # Документ отправляется после уже накопленных сообщений, с сохранением порядка
+                    await self._deliver_batch(batch, completed)
+                    batch, batch_length, completed = [], 0, 0
+                    await self._deliver_document(item)
+                    break
+                else:
+                    for message in item:
+                        formatted_message = MessageFormatter.format_message(message, self._telegram_parse_mode)
+                        new_length = batch_length + len(self.selector) + len(formatted_message)
+                        if batch and new_length > self.max_message_length:
+                            # Не помещается — отправляем накопленное, сообщение начинает следующий пакет
+                            await self._deliver_batch(batch, completed)
+                            batch, batch_length, completed = [], 0, 0
+                            new_length = len(formatted_message)
+                        batch.append(formatted_message)
+                        batch_length = new_length
+                    completed += 1
+                item = await self._next_message(deadline - loop.time())
+                self._take(item)
+
+            await self._deliver_batch(batch, completed)
+            if self._queue.empty():
+                self._flush_event.clear()
+
+    async def _deliver_batch(self, batch: List[str], completed: int) -> None:
+        """
+        Отправляет пакет сообщений.
         
-    async def _send_buffer(self) -> bool:
-        """Отправляет сообщение из буфера"""
-        if not self.buffer:
-            logging.info('Buffer is empty, nothing to send.')
+        :param completed: Сколько элементов очереди отметить обработанными после отправки.
+        """
+        try:
+            if batch:
+                await self._deliver(self.selector.join(batch))
+        except Exception as e:
+            logging.exception(f'Unexpected error while sending messages: {e}')
+        finally:
+            for _ in range(completed):
+                self._queue.task_done()
+
+    async def _deliver(self, message: str) -> None:
+        """Отправляет сообщение после накопленных в outbox, при временном сбое сохраняет его в outbox"""
+        result, response = await self._send_buffer(message) if await self._replay_outbox() else (SendResult.FAILED, {})
+        payload = {'text': message, 'parse_mode': self._telegram_parse_mode.value}
+        await self._keep_unsent('sendMessage', payload, None, result, response)
+
+    async def _keep_unsent(
+            self, method: str, payload: Dict, attachment: Optional[bytes], result: SendResult, response: Dict
+    ) -> None:
+        """Сохраняет неотправленный запрос: временный сбой - в outbox, отказ Telegram - в dead_letter"""
+        if result == SendResult.SENT or self._outbox is None:
+            return
+        if result == SendResult.REJECTED:
+            await aio_to_thread(self._outbox.reject, method, payload, attachment, self._describe_error(response))
+            logging.error(f'Request {method} rejected by Telegram, saved to dead letters of "{self._outbox.path}".')
+            return
+        await aio_to_thread(self._outbox.append, method, payload, attachment)
+        self._outbox_pending += 1
+        logging.warning(f'Request {method} saved to outbox "{self._outbox.path}" for later delivery.')
+
+    @staticmethod
+    def _describe_error(response: Dict) -> str:
+        """Код и описание ошибки из ответа API"""
+        return f'{response.get("error_code")}: {response.get("description", "")}'
+
+    async def _deliver_document(self, document: TelegramDocument) -> None:
+        """Отправляет документ (как и сообщения — после outbox) и отмечает его обработанным"""
+        try:
+            caption = None
+            if document.caption:
+                caption = MessageFormatter.format_message(document.caption, self._telegram_parse_mode)
+                if len(caption) > TELEGRAM_MAX_CAPTION_LENGTH:
+                    # Длинная подпись уходит отдельным сообщением перед документом
+                    await self._deliver(caption)
+                    caption = None
+
+            parse_mode = self._telegram_parse_mode.value
+            result, response = await self._send_document(
+                document.file_name, document.content, caption, parse_mode
+            ) if await self._replay_outbox() else (SendResult.FAILED, {})
+            payload = {'file_name': document.file_name, 'caption': caption, 'parse_mode': parse_mode}
+            await self._keep_unsent('sendDocument', payload, document.content, result, response)
+        except Exception as e:
+            logging.exception(f'Unexpected error while sending document: {e}')
+        finally:
+            self._queue.task_done()
+
+    async def _replay_outbox(self) -> bool:
+        """
+        Переотправляет сообщения из outbox по порядку; True, если outbox пуст.
+        
+        Отклоненные Telegram запросы переносятся в dead_letter, переотправка продолжается;
+        при временном сбое она останавливается до следующей отправки.
+        """
+        if self._outbox is None or not self._outbox_pending:
             return True
 
-        success = False
+        entries = await aio_to_thread(self._outbox.pending)
+        self._outbox_pending = len(entries)
+        if entries:
+            logging.info(f'Replaying {len(entries)} message(s) from outbox.')
+        for entry_id, method, payload, attachment in entries:
+            result, response = await self._send_outbox_entry(method, payload, attachment)
+            if result == SendResult.FAILED:
+                return False
+            if result == SendResult.REJECTED:
+                await aio_to_thread(self._outbox.bury, entry_id, self._describe_error(response))
+                logging.error(f'Outbox entry {entry_id} ({method}) rejected by Telegram, moved to dead letters.')
+            else:
+                await aio_to_thread(self._outbox.remove, entry_id)
+            self._outbox_pending -= 1
+        return True
+
+    async def _send_outbox_entry(
+            self, method: str, payload: Dict, attachment: Optional[bytes]
+    ) -> Tuple[SendResult, Dict]:
+        """Выполняет сохраненный в outbox запрос к API"""
+        if method == 'sendMessage':
+            return await self._send_buffer(payload['text'], payload.get('parse_mode'))
+        if method == 'sendDocument':
+            return await self._send_document(
+                payload['file_name'], attachment or b'', payload.get('caption'), payload.get('parse_mode'))
+        logging.error(f'Unknown outbox method "{method}".')
+        return SendResult.REJECTED, {'description': f'unknown method {method}'}
+        
+    async def _send_buffer(self, message: str, parse_mode: Optional[str] = None) -> Tuple[SendResult, Dict]:
+        """Отправляет объединенное сообщение"""
+        if not message:
+            logging.info('Buffer is empty, nothing to send.')
+            return SendResult.SENT, {}
+
+        result, response = await self._send_with_retries(lambda: self._send_telegram_message(message, parse_mode))
+        if result == SendResult.FAILED:
+            logging.error('Failed to send buffer after retries.')
+        return result, response
+
+    async def _send_document(
+            self, file_name: str, content: bytes, caption: Optional[str], parse_mode: Optional[str] = None
+    ) -> Tuple[SendResult, Dict]:
+        """Отправляет документ с подписью"""
+        result, response = await self._send_with_retries(
+            lambda: self._send_telegram_document(file_name, content, caption, parse_mode))
+        if result == SendResult.FAILED:
+            logging.error(f'Failed to send document "{file_name}" after retries.')
+        return result, response
+
+    async def _send_with_retries(self, request: Callable[[], Awaitable[Dict]]) -> Tuple[SendResult, Dict]:
+        """
+        Выполняет запрос к API с учетом лимитов, повторов по 429 и автоматического выключателя.
+        
+        :return: Итог запроса и последний ответ API.
+        """
+        result = SendResult.FAILED
+        response: Dict = {}
         max_retries = 3
         retries = 0
-        message = self.buffer
 
         while retries < max_retries:
-            response = await self._send_telegram_message(message)
+            if not self.circuit_breaker.allow_request():
+                logging.error('Telegram circuit is open, skipping send until cool-down expires.')
+                break
+
+            await self.rate_limiter.acquire(self._chat_id)
+            response = await request()
             if response.get('ok', False):
-                success = True
+                self.circuit_breaker.record_success()
+                result = SendResult.SENT
                 break
             else:
                 error_code = response.get('error_code')
                 if error_code == 429:
-                    logging.warning(f'Message failed with error code: {error_code}. Retrying after delay.')
                     retry_after = response.get('parameters', {}).get('retry_after', 5)
+                    if retry_after > self._max_retry_after:
+                        logging.error(f'Telegram asked to retry after {retry_after}s, which exceeds the limit.')
+                        self.circuit_breaker.record_failure()
+                        break
+                    logging.warning(f'Message failed with error code: {error_code}. Retrying after delay.')
                     await aio_sleep(retry_after)
+                elif error_code is None or error_code >= 500:
+                    # Сетевые сбои, таймауты и ошибки сервера считаются отказом Telegram
+                    logging.error(f'Failed to send message: {response}')
+                    self.circuit_breaker.record_failure()
+                    if self.circuit_breaker.state == CircuitState.OPEN:
+                        logging.warning(
+                            f'Telegram circuit opened for {self.circuit_breaker.reset_timeout}s after repeated failures.')
+                        break
                 else:
                     logging.error(f'Failed to send message: {response}')
+                    result = SendResult.REJECTED
                     break
             retries += 1
 
-        if success:
-            self.buffer = ''
-        else:
-            logging.error('Failed to send buffer after retries.')
-        return success
+        return result, response
 
     async def _send_telegram_message(self, message: str, parse_mode: Optional[str] = None) -> Dict:
         """
@@ -271,7 +633,7 @@ class TelegramMessenger:
         :param parse_mode: Тип разметки: 'Markdown', 'MarkdownV2', 'HTML' или None (без разметки).
         :return: Ответ API Telegram.
         """
-        url = f'https://api.telegram.org/bot{self._telegram_token}/sendMessage'
+        url = f'{self._api_url}/bot{self._telegram_token}/sendMessage'
         payload = {'chat_id': self._chat_id, 'text': message}
 
         # Используем переданный parse_mode или настройку по умолчанию
@@ -283,23 +645,68 @@ class TelegramMessenger:
         if self._message_thread_id is not None:
             payload['message_thread_id'] = self._message_thread_id
 
-        # Указываем таймаут ожидания (10 секунд)
-        timeout = aio_ClientTimeout(total=10)
-        async with aio_ClientSession(timeout=timeout) as session:
-            try:
-                async with session.post(url, data=payload) as response:
+        return await self._post(url, payload)
+
+    async def _send_telegram_document(
+            self, file_name: str, content: bytes, caption: Optional[str], parse_mode: Optional[str] = None
+    ) -> Dict:
+        """
+        Отправляет документ в Telegram через sendDocument.
+
+        :param file_name: Имя файла, которое увидит получатель.
+        :param content: Содержимое файла.
+        :param caption: Подпись к документу (уже отформатированная) или None.
+        :param parse_mode: Тип разметки подписи.
+        :return: Ответ API Telegram.
+        """
+        # aiohttp импортируется при первой отправке, а не при запуске скрипта
+        from aiohttp import FormData as aio_FormData
+        
+        url = f'{self._api_url}/bot{self._telegram_token}/sendDocument'
+        form = aio_FormData()
+        form.add_field('chat_id', str(self._chat_id))
+        if self._message_thread_id is not None:
+            form.add_field('message_thread_id', str(self._message_thread_id))
+        if caption:
+            form.add_field('caption', caption)
+            if parse_mode:
+                form.add_field('parse_mode', parse_mode)
+        form.add_field('document', content, filename=file_name, content_type='application/octet-stream')
+        return await self._post(url, form)
+
+    def _get_session(self) -> 'ClientSession':
+        """Возвращает HTTP-сессию текущего цикла событий, создавая ее при первом запросе"""
+        # aiohttp импортируется при первой отправке, а не при запуске скрипта
+        from aiohttp import ClientSession as aio_ClientSession, ClientTimeout as aio_ClientTimeout
+        
+        loop = aio_get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            # Указываем таймаут ожидания
+            self._session = aio_ClientSession(timeout=aio_ClientTimeout(total=self._timeout))
+            self._session_loop = loop
+        return self._session
+
+    async def _post(self, url: str, data: Any) -> Dict:
+        """Выполняет POST-запрос к API с таймаутом и возвращает ответ в виде словаря"""
+        session = self._get_session()
+        try:
+            async with session.post(url, data=data) as response:
+                if response.content_type == 'application/json':
                     resp_json = await response.json()
-                    if response.status == 200:
-                        return resp_json
-                    else:
-                        logging.error(f'HTTP {response.status} response: {resp_json}')
-                        return resp_json
-            except aio_TimeoutError:
-                logging.error('Timeout occurred while sending message to Telegram API.')
-                return {'ok': False, 'error': 'Timeout while sending message'}
-            except Exception as e:
-                logging.exception(f'Exception occurred while sending message: {e}')
-                return {}
+                else:
+                    # Прокси и балансировщики отдают ошибки 5xx без JSON
+                    resp_json = {'ok': False, 'error_code': response.status, 'description': await response.text()}
+                if response.status == 200:
+                    return resp_json
+                else:
+                    logging.error(f'HTTP {response.status} response: {resp_json}')
+                    return resp_json
+        except aio_TimeoutError:
+            logging.error('Timeout occurred while sending message to Telegram API.')
+            return {'ok': False, 'error': 'Timeout while sending message'}
+        except Exception as e:
+            logging.exception(f'Exception occurred while sending message: {e}')
+            return {}
 
     def get_parse_mode(self) -> ParseMode:
         """Возвращает текущий режим парсинга"""
@@ -329,5 +736,6 @@ if __name__ == '__main__':
             await messenger.add_message(f"Test message {i}: {msg}")
         
         await messenger(message="Final message", action=MessageState.SEND)
+        await messenger.close()
     
     aio_run(main()) 
\ No newline at end of file
@@ -0,0 +1,173 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Объединение складских файлов через промежуточную таблицу SQLite на диске (CSV_ENGINE = sqlite).
+
+В памяти одновременно находятся только один прочитанный файл и блок сгруппированных строк, поэтому
+потребление памяти не растет с числом складов и товаров. Суммы, первые значения и места хранения
+считаются в SQL теми же правилами, что и группировка pandas (csv_tasks.aggregate_by_barcode).
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from os import close as os_close, remove as os_remove
+from sqlite3 import connect, Connection
+from tempfile import mkstemp
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from column_enums import PackingColumns, AggregationColumns
+from merge_output import ColumnKinds, write_grouped_chunks
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+class DecimalSum:
+    """Агрегат SQL decimal_sum(value, places): точная сумма через Decimal с округлением, как csv_tasks.safe_sum"""
+
+    def __init__(self):
+        self.total = Decimal(0)
+        self.places: Optional[int] = None
+
+    def step(self, value: Any, places: Optional[int]) -> None:
+        self.places = places
+        if value is not None:
+            self.total += Decimal(str(value))
+
+    def finalize(self) -> float:
+        if self.places is not None:
+            return float(self.total.quantize(Decimal(10) ** -self.places, rounding=ROUND_HALF_UP))
+        return float(self.total)
+
+
+class FirstBy:
+    """Агрегат SQL first_by(value, seq): первое непустое значение в порядке строк, как 'first' в pandas"""
+
+    def __init__(self):
+        self.seq: Optional[int] = None
+        self.value: Any = None
+
+    def step(self, value: Any, seq: int) -> None:
+        if value is not None and (self.seq is None or seq < self.seq):
+            self.seq, self.value = seq, value
+
+    def finalize(self) -> Any:
+        return self.value
+
+
+class JoinBy:
+    """Агрегат SQL join_by(value, seq): непустые значения через запятую в порядке строк"""
+
+    def __init__(self):
+        self.values: List[Tuple[int, str]] = []
+
+    def step(self, value: Optional[str], seq: int) -> None:
+        if value:
+            self.values.append((seq, value))
+
+    def finalize(self) -> str:
+        return ', '.join(value for _, value in sorted(self.values))
+
+
+class SqliteMergeEngine:
+    """
+    Промежуточная таблица SQLite для объединения складов.
+
+    Методы блокирующие: процессор вызывает их в пуле потоков по одному за раз.
+    """
+
+    # Строк сгруппированного результата в одном блоке записи
+    CHUNK_SIZE = 10000
+
+    def __init__(self, directory: Optional[str] = None, decimal_places: Optional[int] = None):
+        """
+        :param directory: Каталог для файла базы; None - временный каталог системы.
+        :param decimal_places: Округление сумм (DATAS_DECIMAL_PLACES).
+        """
+        handle, self.path = mkstemp(prefix='merge_staging_', suffix='.sqlite3', dir=directory or None)
+        os_close(handle)
+        self.decimal_places = decimal_places
+        self.conn: Connection = connect(self.path, check_same_thread=False)
+        # База одноразовая: журнал и синхронизация не нужны, кэш страниц ограничен (64 МБ)
+        self.conn.executescript(
+            'PRAGMA journal_mode = OFF; PRAGMA synchronous = OFF; PRAGMA temp_store = FILE; PRAGMA cache_size = -65536;'
+            'CREATE TABLE staging (seq INTEGER PRIMARY KEY, store TEXT NOT NULL, place TEXT NOT NULL);'
+        )
+        self.conn.create_aggregate('decimal_sum', 2, DecimalSum)
+        self.conn.create_aggregate('first_by', 2, FirstBy)
+        self.conn.create_aggregate('join_by', 2, JoinBy)
+        # Имя столбца данных -> имя столбца таблицы (c0, c1, ...): имена из файлов не попадают в SQL
+        self.columns: Dict[str, str] = {}
+        self.stores: List[str] = []
+        self.rows = 0
+        self.kinds = ColumnKinds()
+
+    def add(self, store: str, df: 'DataFrame', place_column: str) -> None:
+        """
+        Загружает строки склада одним executemany.
+
+        :param place_column: Столбец мест хранения склада (Storage_<склад>).
+        """
+        data_columns = [column for column in df.columns if column != place_column]
+        for column in data_columns:
+            if column not in self.columns:
+                self.columns[column] = f'c{len(self.columns)}'
+                self.conn.execute(f'ALTER TABLE staging ADD COLUMN {self.columns[column]}')
+        self.kinds.add(df, data_columns)
+        self.stores.append(store)
+
+        placeholders = ', '.join('?' * (len(data_columns) + 3))
+        names = ', '.join(['seq', 'store', 'place'] + [self.columns[column] for column in data_columns])
+        # NaN при записи становится NULL; значения без объявленного типа столбца хранятся как есть
+        rows = zip(
+            range(self.rows, self.rows + len(df)), [store] * len(df), df[place_column],
+            *[df[column] for column in data_columns]
+        )
+        with self.conn:
+            self.conn.executemany(f'INSERT INTO staging ({names}) VALUES ({placeholders})', rows)
+        self.rows += len(df)
+
+    def write(self, outputs: Dict[str, str], header_template: List[str], sep: str) -> int:
+        """
+        Группирует строки по штрих-коду в SQL и блоками записывает результат во все файлы складов.
+
+        :param outputs: Склад -> путь к выходному файлу.
+        :return: Количество сгруппированных строк (товаров).
+        """
+        barcode = PackingColumns.BARCODE.value
+        sum_columns = AggregationColumns.get_sum_columns()
+        first_columns = [column for column in self.columns if column not in sum_columns and column != barcode]
+        self.conn.execute(f'CREATE INDEX staging_barcode ON staging ({self.columns[barcode]}, seq)')
+
+        place_columns = [f'place_{index}' for index in range(len(self.stores))]
+        select = (
+            [self.columns[barcode]]
+            + [f'decimal_sum({self.columns[column]}, ?)' for column in sum_columns]
+            + [f'first_by({self.columns[column]}, seq)' for column in first_columns]
+            + ['join_by(CASE WHEN store = ? THEN place END, seq)' for _ in self.stores]
+        )
+        cursor = self.conn.execute(
+            f'SELECT {", ".join(select)} FROM staging WHERE {self.columns[barcode]} IS NOT NULL '
+            f'GROUP BY {self.columns[barcode]} ORDER BY {self.columns[barcode]}',
+            [self.decimal_places] * len(sum_columns) + self.stores
+        )
+        return write_grouped_chunks(
+            iter(lambda: cursor.fetchmany(self.CHUNK_SIZE), []),
+            [barcode] + sum_columns + first_columns + place_columns,
+            dict(zip(self.stores, place_columns)), outputs, header_template, sep, self.kinds.float_columns()
+        )
+
+    def close(self) -> None:
+        """Закрывает и удаляет базу"""
+        self.conn.close()
+        try:
+            os_remove(self.path)
+        except OSError:
+            pass
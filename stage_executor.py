@@ -0,0 +1,106 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Выполнение блокирующих этапов вне цикла событий, чтобы отправка в Telegram шла одновременно с обработкой.
+
+Ввод-вывод и этапы, которым нужны объекты процессора, выполняются в пуле потоков (run_in_thread).
+Вычисления над данными, не зависящие от процессора, - в пуле процессов при EXECUTOR_POLICY = process (run_cpu).
+"""
+
+from asyncio import get_running_loop
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextvars import copy_context
+from functools import partial
+from typing import Any, Callable, Optional, TypeVar, TYPE_CHECKING
+
+from config import Config, ExecutorConfig
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+T = TypeVar('T')
+
+
+class StageExecutor:
+    """Общие для процесса пулы потоков и процессов; создаются при первом использовании"""
+    _instance = None
+
+    def __new__(cls, *args, **kwargs) -> 'StageExecutor':
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if not hasattr(self, '_initialized'):
+            self._initialized = True
+            self._config: Optional[ExecutorConfig] = None
+            self._threads: Optional[ThreadPoolExecutor] = None
+            self._processes: Optional['ProcessPoolExecutor'] = None
+
+    @property
+    def config(self) -> ExecutorConfig:
+        """Политика фиксируется до shutdown, чтобы пулы соответствовали ей"""
+        if self._config is None:
+            self._config = Config().executor
+        return self._config
+
+    @property
+    def policy(self) -> str:
+        return self.config.policy
+
+    def _get_threads(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                max_workers=self.config.threads or None, thread_name_prefix='merge-stage')
+        return self._threads
+
+    def _get_processes(self) -> 'ProcessPoolExecutor':
+        if self._processes is None:
+            # Пул процессов и multiprocessing загружаются только при EXECUTOR_POLICY = process
+            from concurrent.futures import ProcessPoolExecutor
+            from multiprocessing import get_context
+
+            # spawn на всех системах: fork процесса с потоками логирования может зависнуть
+            self._processes = ProcessPoolExecutor(
+                max_workers=self.config.processes or None, mp_context=get_context('spawn'))
+        return self._processes
+
+    @staticmethod
+    async def _submit(executor: Executor, func: Callable[..., T], *args: Any) -> T:
+        return await get_running_loop().run_in_executor(executor, func, *args)
+
+    async def run_in_thread(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Выполняет функцию в пуле потоков (при политике inline - сразу в цикле событий).
+
+        Контекст запуска (run_id, этап, файл) передается в поток, поэтому записи лога сохраняют поля JSON-лога.
+        """
+        if self.policy == 'inline':
+            return func(*args)
+        return await self._submit(self._get_threads(), partial(copy_context().run, func, *args))
+
+    async def run_cpu(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Выполняет вычислительный этап: в пуле процессов при политике process, иначе как run_in_thread.
+
+        Функция и аргументы должны сериализоваться pickle: функция уровня модуля без обращений к логированию.
+        """
+        if self.policy == 'process':
+            return await self._submit(self._get_processes(), func, *args)
+        return await self.run_in_thread(func, *args)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Останавливает пулы; следующий вызов создаст их заново по текущей конфигурации"""
+        for executor in (self._threads, self._processes):
+            if executor is not None:
+                executor.shutdown(wait=wait)
+        self._threads = self._processes = None
+        self._config = None
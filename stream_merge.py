@@ -0,0 +1,195 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Потоковое объединение складских файлов сортировкой и слиянием (CSV_ENGINE = stream).
+
+Строки каждого склада сортируются по штрих-коду (уже отсортированные файлы не пересортировываются)
+и выгружаются блоками во временный файл. Затем файлы сливаются за один последовательный проход
+(heapq.merge): строки одного штрих-кода собираются в группу и сразу записываются во все файлы складов.
+В памяти находятся один прочитанный файл при загрузке и по одному блоку на склад при слиянии.
+Суммы, первые значения и места хранения считаются теми же правилами, что и группировка pandas
+(csv_tasks.aggregate_by_barcode).
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from heapq import merge as heap_merge
+from itertools import groupby, islice
+from math import isnan
+from os import remove as os_remove
+from pickle import dump, load, HIGHEST_PROTOCOL
+from tempfile import NamedTemporaryFile
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+from column_enums import PackingColumns, AggregationColumns
+from merge_output import ColumnKinds, write_grouped_chunks
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+# Строка во временном файле: штрих-код, сквозной номер строки, место хранения, значения столбцов файла
+SpillRow = Tuple[Any, int, str, tuple]
+
+
+def is_null(value: Any) -> bool:
+    """Пропуск значения, как его понимает pandas (None или NaN)"""
+    return value is None or isinstance(value, float) and isnan(value)
+
+
+class StoreSpill:
+    """Отсортированные по штрих-коду строки одного склада во временном файле"""
+
+    def __init__(self, store: str, columns: List[str], file: IO[bytes]):
+        self.store = store
+        self.columns = columns
+        self.path = file.name
+        self._file = file
+
+    def write(self, rows: Iterator[SpillRow], block_size: int) -> None:
+        """Выгружает строки блоками по block_size"""
+        while True:
+            block = list(islice(rows, block_size))
+            if not block:
+                break
+            dump(block, self._file, protocol=HIGHEST_PROTOCOL)
+        self._file.close()
+
+    def read(self, index: int) -> Iterator[Tuple[Any, int, int, str, tuple]]:
+        """
+        Читает строки обратно, держа в памяти один блок.
+
+        :param index: Номер склада, добавляемый в строку после номера строки.
+        """
+        with open(self.path, 'rb') as file:
+            while True:
+                try:
+                    block = load(file)
+                except EOFError:
+                    return
+                for barcode, seq, place, values in block:
+                    yield barcode, seq, index, place, values
+
+
+class StreamMergeEngine:
+    """
+    Сортировка складов во временные файлы и k-путевое слияние по штрих-коду.
+
+    Методы блокирующие: процессор вызывает их в пуле потоков по одному за раз.
+    """
+
+    # Строк в одном блоке временного файла и в одном блоке записи результата
+    CHUNK_SIZE = 10000
+
+    def __init__(self, directory: Optional[str] = None, decimal_places: Optional[int] = None):
+        """
+        :param directory: Каталог для временных файлов; None - временный каталог системы.
+        :param decimal_places: Округление сумм (DATAS_DECIMAL_PLACES).
+        """
+        self.directory = directory or None
+        self.decimal_places = decimal_places
+        # Столбцы данных всех складов в порядке появления
+        self.columns: Dict[str, int] = {}
+        self.spills: List[StoreSpill] = []
+        self.rows = 0
+        self.kinds = ColumnKinds()
+
+    def add(self, store: str, df: 'DataFrame', place_column: str) -> None:
+        """
+        Сортирует строки склада по штрих-коду и выгружает их во временный файл.
+
+        Строки без штрих-кода отбрасываются, как при группировке pandas; сортировка устойчивая,
+        поэтому порядок строк с одним штрих-кодом сохраняется.
+
+        :param place_column: Столбец мест хранения склада (Storage_<склад>).
+        """
+        barcode = PackingColumns.BARCODE.value
+        data_columns = [column for column in df.columns if column != place_column]
+        for column in data_columns:
+            self.columns.setdefault(column, len(self.columns))
+        self.kinds.add(df, data_columns)
+
+        seq = range(self.rows, self.rows + len(df))
+        self.rows += len(df)
+        df = df.assign(_seq=seq)[df[barcode].notna()]
+        if not df[barcode].is_monotonic_increasing:
+            df = df.sort_values(barcode, kind='stable')
+
+        spill = StoreSpill(store, data_columns, NamedTemporaryFile(
+            'wb', prefix='merge_spill_', suffix='.pickle', dir=self.directory, delete=False))
+        self.spills.append(spill)
+        rows = zip(df[barcode], df['_seq'], df[place_column], zip(*[df[column] for column in data_columns]))
+        spill.write(rows, self.CHUNK_SIZE)
+
+    def _sum(self, values: List[Any]) -> float:
+        """Точная сумма через Decimal с округлением, как csv_tasks.safe_sum"""
+        total = Decimal(0)
+        for value in values:
+            if not is_null(value):
+                total += Decimal(str(value))
+        if self.decimal_places is not None:
+            total = total.quantize(Decimal(10) ** -self.decimal_places, rounding=ROUND_HALF_UP)
+        return float(total)
+
+    def _grouped_rows(self, sum_columns: List[str], first_columns: List[str]) -> Iterator[tuple]:
+        """Сливает временные файлы и выдает по одной сгруппированной строке на штрих-код"""
+        positions = [
+            {column: index for index, column in enumerate(spill.columns)} for spill in self.spills
+        ]
+        streams = [spill.read(index) for index, spill in enumerate(self.spills)]
+        # Ключ (штрих-код, номер строки): внутри группы строки идут в порядке объединения файлов
+        for _, group in groupby(heap_merge(*streams), key=lambda row: row[0]):
+            group = list(group)
+            sums = [
+                self._sum([row[4][positions[row[2]][column]] for row in group if column in positions[row[2]]])
+                for column in sum_columns
+            ]
+            firsts = []
+            for column in first_columns:
+                first = None
+                for row in group:
+                    position = positions[row[2]].get(column)
+                    if position is not None and not is_null(row[4][position]):
+                        first = row[4][position]
+                        break
+                firsts.append(first)
+            places = [
+                ', '.join(row[3] for row in group if row[2] == index and row[3])
+                for index in range(len(self.spills))
+            ]
+            yield (group[0][0], *sums, *firsts, *places)
+
+    def write(self, outputs: Dict[str, str], header_template: List[str], sep: str) -> int:
+        """
+        Сливает склады по штрих-коду и блоками записывает результат во все файлы складов.
+
+        :param outputs: Склад -> путь к выходному файлу.
+        :return: Количество сгруппированных строк (товаров).
+        """
+        barcode = PackingColumns.BARCODE.value
+        sum_columns = AggregationColumns.get_sum_columns()
+        first_columns = [column for column in self.columns if column not in sum_columns and column != barcode]
+        place_columns = [f'place_{index}' for index in range(len(self.spills))]
+
+        rows = self._grouped_rows(sum_columns, first_columns)
+        return write_grouped_chunks(
+            iter(lambda: list(islice(rows, self.CHUNK_SIZE)), []),
+            [barcode] + sum_columns + first_columns + place_columns,
+            {spill.store: column for spill, column in zip(self.spills, place_columns)},
+            outputs, header_template, sep, self.kinds.float_columns()
+        )
+
+    def close(self) -> None:
+        """Удаляет временные файлы"""
+        for spill in self.spills:
+            try:
+                os_remove(spill.path)
+            except OSError:
+                pass
+        self.spills = []
@@ -0,0 +1,175 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Development'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Локальная заглушка Telegram Bot API для тестов и нагрузочных замеров.
+
+Имитирует методы sendMessage и sendDocument с настраиваемой задержкой,
+ответами 429 с retry_after, зависаниями (таймаутами) и ошибками 5xx.
+
+Запуск: python telegram_stub.py --port 8081 --latency 0.05 --rate-429 0.02
+В config.ini: [TELEGRAM] API_URL = http://127.0.0.1:8081
+"""
+
+from argparse import ArgumentParser
+from asyncio import sleep as aio_sleep
+from dataclasses import dataclass
+from random import Random
+from time import perf_counter, time
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+
+@dataclass
+class StubSettings:
+    """Параметры поведения заглушки"""
+    latency: float = 0.0
+    rate_429: float = 0.0
+    retry_after: int = 1
+    rate_5xx: float = 0.0
+    rate_timeout: float = 0.0
+    hang: float = 30.0
+    seed: Optional[int] = None
+
+
+class TelegramStub:
+    """Заглушка Telegram Bot API на aiohttp"""
+
+    def __init__(self, settings: StubSettings):
+        self.settings = settings
+        self.received: List[Dict[str, Any]] = []
+        self.responses: Dict[int, int] = {}
+        self._random = Random(settings.seed)
+        self._message_id = 0
+
+    def create_app(self) -> web.Application:
+        """Создает приложение aiohttp с маршрутами API"""
+        app = web.Application()
+        app.router.add_post('/bot{token}/sendMessage', self.handle_send_message)
+        app.router.add_post('/bot{token}/sendDocument', self.handle_send_document)
+        return app
+
+    def _count(self, status: int) -> None:
+        self.responses[status] = self.responses.get(status, 0) + 1
+
+    async def _fault(self) -> Optional[web.Response]:
+        """Выдерживает задержку и с заданной вероятностью возвращает ошибку"""
+        settings = self.settings
+        if settings.latency:
+            await aio_sleep(settings.latency)
+
+        roll = self._random.random()
+        if roll < settings.rate_timeout:
+            # Держим соединение дольше таймаута клиента
+            await aio_sleep(settings.hang)
+        roll -= settings.rate_timeout
+        if 0 <= roll < settings.rate_429:
+            self._count(429)
+            return web.json_response({
+                'ok': False, 'error_code': 429,
+                'description': f'Too Many Requests: retry after {settings.retry_after}',
+                'parameters': {'retry_after': settings.retry_after},
+            }, status=429)
+        roll -= settings.rate_429
+        if 0 <= roll < settings.rate_5xx:
+            self._count(502)
+            return web.Response(status=502, text='Bad Gateway')
+        return None
+
+    def _ok(self, chat_id: Any, **result: Any) -> web.Response:
+        self._message_id += 1
+        self._count(200)
+        return web.json_response({
+            'ok': True,
+            'result': {'message_id': self._message_id, 'chat': {'id': chat_id}, 'date': int(time()), **result},
+        })
+
+    async def handle_send_message(self, request: web.Request) -> web.Response:
+        """Обработчик sendMessage"""
+        data = await request.post()
+        if 'chat_id' not in data or not data.get('text'):
+            self._count(400)
+            return web.json_response(
+                {'ok': False, 'error_code': 400, 'description': 'Bad Request: message text is empty'}, status=400)
+
+        fault = await self._fault()
+        if fault is not None:
+            return fault
+
+        self.received.append({
+            'method': 'sendMessage', 'chat_id': data['chat_id'], 'text': data['text'],
+            'parse_mode': data.get('parse_mode'), 'time': perf_counter(),
+        })
+        return self._ok(data['chat_id'], text=data['text'])
+
+    async def handle_send_document(self, request: web.Request) -> web.Response:
+        """Обработчик sendDocument (multipart/form-data)"""
+        data = await request.post()
+        document = data.get('document')
+        if 'chat_id' not in data or not isinstance(document, web.FileField):
+            self._count(400)
+            return web.json_response(
+                {'ok': False, 'error_code': 400, 'description': 'Bad Request: there is no document in the request'},
+                status=400)
+
+        fault = await self._fault()
+        if fault is not None:
+            return fault
+
+        content = document.file.read()
+        self.received.append({
+            'method': 'sendDocument', 'chat_id': data['chat_id'], 'caption': data.get('caption'),
+            'file_name': document.filename, 'size': len(content), 'time': perf_counter(),
+        })
+        return self._ok(data['chat_id'], document={'file_name': document.filename, 'file_size': len(content)})
+
+
+async def start_stub(
+        settings: StubSettings, host: str = '127.0.0.1', port: int = 0
+) -> Tuple[TelegramStub, web.AppRunner, str]:
+    """Запускает заглушку в текущем цикле событий; возвращает (stub, runner, base_url)"""
+    stub = TelegramStub(settings)
+    runner = web.AppRunner(stub.create_app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_host, bound_port = runner.addresses[0][:2]
+    return stub, runner, f'http://{bound_host}:{bound_port}'
+
+
+def build_arg_parser() -> ArgumentParser:
+    """Общие аргументы командной строки для параметров заглушки"""
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.0, help='задержка ответа, сек')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='доля ответов 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='retry_after в ответах 429, сек')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help='доля ответов 502')
+    parser.add_argument('--rate-timeout', type=float, default=0.0, help='доля зависших запросов')
+    parser.add_argument('--hang', type=float, default=30.0, help='длительность зависания, сек')
+    parser.add_argument('--seed', type=int, default=None, help='seed генератора случайных сбоев')
+    return parser
+
+
+def settings_from_args(args) -> StubSettings:
+    """Создает StubSettings из разобранных аргументов"""
+    return StubSettings(
+        latency=args.latency, rate_429=args.rate_429, retry_after=args.retry_after,
+        rate_5xx=args.rate_5xx, rate_timeout=args.rate_timeout, hang=args.hang, seed=args.seed,
+    )
+
+
+if __name__ == '__main__':
+    arg_parser = build_arg_parser()
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8081)
+    cli_args = arg_parser.parse_args()
+
+    web.run_app(TelegramStub(settings_from_args(cli_args)).create_app(), host=cli_args.host, port=cli_args.port)
@@ -0,0 +1,215 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Декларативные правила извлечения и проверки столбцов.
+
+Правило описывает столбец, запасные источники значения, регулярное выражение для извлечения из них,
+допустимый диапазон или набор значений и уровень нарушения. Все правила выполняются операциями над
+столбцами DataFrame, без прохода по строкам; новая проверка - это новая запись в default_rules, например:
+
+    ValidationRule('free balance', PackingColumns.FREE_BALANCE.value, numeric=True,
+                   value_range=(0, float('inf')), message='is negative', severity=SEVERITY_ERROR)
+
+Извлечение и перевод в верхний регистр выполняются над уникальными строками источника: одно и то же
+описание встречается во всех складах, поэтому результат вычисляется один раз и раскладывается по строкам.
+С кэшем derived_cache.DerivedCache уникальные строки, встречавшиеся в прошлых запусках, не вычисляются.
+
+Модуль не импортирует config, logger и Telegram, поэтому правила можно выполнять в пуле процессов.
+"""
+
+from dataclasses import dataclass
+from re import compile as re_compile
+from typing import Any, Callable, List, Optional, Tuple, TYPE_CHECKING
+
+from column_enums import PackingColumns, DescriptionColumns, StorageColumns
+
+if TYPE_CHECKING:
+    from pandas import Series, DataFrame
+    from derived_cache import DerivedCache
+
+# Уровни нарушений
+SEVERITY_INFO = 'info'
+SEVERITY_WARNING = 'warning'
+SEVERITY_ERROR = 'error'
+SEVERITIES = (SEVERITY_INFO, SEVERITY_WARNING, SEVERITY_ERROR)
+
+# Столбцы таблицы нарушений
+VIOLATION_COLUMNS = ['rule', 'severity', 'barcode', 'value', 'source', 'message']
+
+
+@dataclass(frozen=True, slots=True)
+class ValidationRule:
+    """
+    Правило для одного столбца.
+
+    Значение берется из столбца, а там, где его нет, - из первого источника sources, где оно есть.
+    Из источников значение извлекается регулярным выражением pattern (первая группа или все совпадение);
+    сам столбец принимает значения как есть: числа для numeric, непустые строки для остальных правил.
+    Значения вне value_range (границы по inclusive, как в Series.between) или не из allowed считаются
+    нарушениями и в столбце заменяются пропуском.
+    """
+    name: str
+    column: str
+    sources: Tuple[str, ...] = ()
+    pattern: Optional[str] = None
+    numeric: bool = False
+    value_range: Optional[Tuple[float, float]] = None
+    inclusive: str = 'both'
+    allowed: Optional[Tuple[Any, ...]] = None
+    upper: bool = False
+    severity: str = SEVERITY_WARNING
+    message: str = 'was outside the acceptable range'
+
+    def __post_init__(self):
+        if self.severity not in SEVERITIES:
+            raise ValueError(f'Rule {self.name}: severity must be one of {", ".join(SEVERITIES)}')
+        if self.pattern is not None and re_compile(self.pattern).groups == 0:
+            # Без групп извлекается все совпадение
+            object.__setattr__(self, 'pattern', f'({self.pattern})')
+
+
+def default_rules(max_width: int) -> List[ValidationRule]:
+    """Правила обработки объединенных данных: ширина товара и его состав"""
+    return [
+        ValidationRule(
+            'width', PackingColumns.WIDTH.value, sources=(DescriptionColumns.DESCRIPTION.value,),
+            pattern=r'\d+', numeric=True, value_range=(0, max_width), inclusive='right'
+        ),
+        ValidationRule(
+            'compound', PackingColumns.COMPOUND.value, sources=(DescriptionColumns.ADDITIONAL_DESCRIPTION.value,),
+            upper=True
+        ),
+    ]
+
+
+def _is_numeric(series: 'Series') -> bool:
+    return series.dtype.kind in 'iuf'
+
+
+def _string_lengths(series: 'Series') -> 'Series':
+    """Длины строк столбца; для остальных значений - NaN"""
+    from pandas import Series
+
+    if _is_numeric(series) or series.dtype.kind == 'b':
+        return Series(float('nan'), index=series.index)
+    try:
+        return series.str.len()
+    except AttributeError:
+        # Столбец object без единой строки
+        return Series(float('nan'), index=series.index)
+
+
+def _text_values(series: 'Series') -> 'Series':
+    """Непустые строки столбца; остальное - пропуски"""
+    return series.astype(object).where(_string_lengths(series) > 0)
+
+
+def _number_values(series: 'Series') -> 'Series':
+    """Числа столбца как float; строки и пропуски - NaN"""
+    from pandas import to_numeric
+
+    if _is_numeric(series):
+        return series.astype('float64')
+    # В столбце object после объединения складов числа могут соседствовать со строками
+    numbers = series.astype(object).where(series.notna() & _string_lengths(series).isna())
+    return to_numeric(numbers, errors='coerce').astype('float64')
+
+
+def _derive_unique(
+        values: 'Series', kind: str, derive: Callable[['Series'], 'Series'], cache: Optional['DerivedCache']
+) -> 'Series':
+    """
+    Вычисляет derive только для уникальных строк и раскладывает результат обратно по строкам.
+
+    :param values: Строки и пропуски; для пропусков результат - пропуск.
+    :param kind: Вид вычисления для кэша.
+    """
+    from pandas import Series, factorize
+    from pandas.api.extensions import take
+
+    codes, uniques = factorize(values)
+    if not len(uniques):
+        return values
+    unique_values = Series(uniques, dtype=object)
+    derived = cache.resolve(kind, unique_values, derive) if cache is not None else derive(unique_values)
+    return Series(take(derived.to_numpy(dtype=object), codes, allow_fill=True), index=values.index, dtype=object)
+
+
+def _extract(series: 'Series', pattern: str, numeric: bool, cache: Optional['DerivedCache'] = None) -> 'Series':
+    """Первое совпадение регулярного выражения в строках источника"""
+    from pandas import to_numeric
+
+    extracted = _text_values(series)
+    if extracted.notna().any():
+        extracted = _derive_unique(
+            extracted, f'extract:{pattern}', lambda values: values.str.extract(pattern, expand=True)[0], cache)
+    return to_numeric(extracted, errors='coerce').astype('float64') if numeric else extracted
+
+
+def _resolve(df: 'DataFrame', rule: ValidationRule, cache: Optional['DerivedCache'] = None) -> 'Series':
+    """Значение правила: столбец, дополненный запасными источниками"""
+    from pandas import Series
+
+    if rule.column in df.columns:
+        column = df[rule.column]
+        value = _number_values(column) if rule.numeric else _text_values(column)
+    else:
+        value = Series(float('nan'), index=df.index, dtype='float64' if rule.numeric else object)
+    for source in rule.sources:
+        if source not in df.columns or value.notna().all():
+            continue
+        if rule.pattern is not None:
+            fallback = _extract(df[source], rule.pattern, rule.numeric, cache)
+        else:
+            fallback = _number_values(df[source]) if rule.numeric else _text_values(df[source])
+        value = value.where(value.notna(), fallback)
+    if rule.upper and not rule.numeric and value.notna().any():
+        value = _derive_unique(value, 'upper', lambda values: values.str.upper(), cache)
+    return value
+
+
+def apply_rules(
+        df: 'DataFrame', rules: List[ValidationRule], cache: Optional['DerivedCache'] = None
+) -> Tuple['DataFrame', 'DataFrame']:
+    """
+    Выполняет правила над DataFrame: записывает извлеченные значения в столбцы правил.
+
+    :param cache: Кэш значений, извлеченных из строк в прошлых запусках; None - без кэша.
+
+    :return: Тот же DataFrame и таблица нарушений (VIOLATION_COLUMNS) в порядке правил и строк.
+    """
+    from pandas import DataFrame, Series, concat
+
+    barcodes = df[PackingColumns.BARCODE.value] if PackingColumns.BARCODE.value in df.columns else None
+    sources = df[StorageColumns.SOURCE_FILE.value] if StorageColumns.SOURCE_FILE.value in df.columns else None
+    violations = []
+    for rule in rules:
+        value = _resolve(df, rule, cache)
+        invalid = Series(False, index=df.index)
+        if rule.value_range is not None:
+            invalid |= value.notna() & ~value.between(*rule.value_range, inclusive=rule.inclusive)
+        if rule.allowed is not None:
+            invalid |= value.notna() & ~value.isin(rule.allowed)
+        if invalid.any():
+            count = int(invalid.sum())
+            violations.append(DataFrame({
+                'rule': [rule.name] * count,
+                'severity': [rule.severity] * count,
+                'barcode': barcodes[invalid].tolist() if barcodes is not None else [None] * count,
+                'value': value[invalid].tolist(),
+                'source': sources[invalid].tolist() if sources is not None else [None] * count,
+                'message': [rule.message] * count,
+            }))
+            value = value.mask(invalid)
+        df[rule.column] = value
+    if not violations:
+        return df, DataFrame(columns=VIOLATION_COLUMNS)
+    return df, concat(violations, ignore_index=True)
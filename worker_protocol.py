@@ -0,0 +1,52 @@
+# __author__ = 'InfSub'
+# __contact__ = 'ADmin@TkYD.ru'
+# __copyright__ = 'Copyright (C) 2024-2025, [LegioNTeaM] InfSub'
+# __date__ = '2025/06/27'
+# __deprecated__ = False
+# __email__ = 'ADmin@TkYD.ru'
+# __maintainer__ = 'InfSub'
+# __status__ = 'Production'  # 'Production / Development'
+# __version__ = '2.0.0.1'
+
+"""
+Протокол управления постоянным воркером объединения (merge_worker.py).
+
+Одна команда на соединение: клиент отправляет строку с командой, воркер отвечает одной строкой JSON.
+Модуль использует только стандартную библиотеку, поэтому его может импортировать run.py вне venv.
+"""
+
+from json import dumps, loads
+from socket import create_connection
+from typing import Any, Dict
+
+WORKER_HOST = '127.0.0.1'
+
+# Команды воркера
+COMMAND_MERGE = 'merge'
+COMMAND_STATUS = 'status'
+COMMAND_STOP = 'stop'
+WORKER_COMMANDS = (COMMAND_MERGE, COMMAND_STATUS, COMMAND_STOP)
+
+
+def encode_reply(reply: Dict[str, Any]) -> bytes:
+    """Кодирует ответ воркера в строку JSON"""
+    return dumps(reply, ensure_ascii=False, default=str).encode('utf-8') + b'\n'
+
+
+def send_worker_command(command: str, port: int, timeout: float = 5.0) -> Dict[str, Any]:
+    """
+    Отправляет команду воркеру и ждет ответ.
+
+    :param command: Одна из WORKER_COMMANDS.
+    :param port: Порт воркера на WORKER_HOST.
+    :param timeout: Таймаут подключения и ожидания ответа, сек (для merge - время всего объединения).
+    :return: Ответ воркера.
+    :raises OSError: Воркер не запущен или не ответил вовремя.
+    """
+    with create_connection((WORKER_HOST, port), timeout=timeout) as connection:
+        connection.sendall(command.encode('utf-8') + b'\n')
+        with connection.makefile('rb') as reply:
+            line = reply.readline()
+    if not line:
+        raise ConnectionError('Worker closed the connection without a reply')
+    return loads(line)